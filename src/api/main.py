@@ -1,16 +1,103 @@
-from fastapi import FastAPI, HTTPException, Request
-from .schemas.customer import CustomerBase, CustomerResponse
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import ValidationError
+from starlette.background import BackgroundTask
+from typing import Optional
+from .schemas.customer import (
+    BatchExplanationResponse,
+    BatchRequest,
+    BatchResponse,
+    CustomerBase,
+    CustomerResponse,
+    CustomerScoreResponse,
+    ExplanationResponse,
+)
+from .services.admission import AdmissionController, AdmissionMiddleware
+from .services.batching import MicroBatcher
+from .services.cache import PredictionCache, canonical_key
+from .services.columnar import (
+    ID_FIELD,
+    MEDIA_TYPES,
+    OPENAPI_REQUEST_BODY,
+    ColumnarValidationError,
+    columnar_format,
+    read_columns,
+    validate_columns,
+    write_columns,
+)
+from .services.executor import InferenceExecutor
+from .services.explanation import ExplanationService
+from .services.forest import start_inference_threads
 from .services.prediction import ChurnPredictor
+from .services.registry import ModelRegistry
+from .services.score_table import ScoreTableService
+from .services.serialization import FastJSONResponse, batch_response, prediction_response
+from .services.singleflight import SingleFlight
+from .services.streaming import BodyStreamingResponse, StreamScorer, detect_format
+from .services.timing import StageTimer, current_timer, stage_histograms, timed_route
+import asyncio
+import hmac
 import logging
 import time
-from ..monitoring import setup_monitoring
+import numpy as np
+from ..data.customer_store import CustomerStore
+from ..monitoring import SnapshotWriter, setup_monitoring
+from ..utils.structured_logging import StructuredLogger, configure_async_logging
+from ..utils.config import (
+    API_ADMIN_TOKEN,
+    API_ADMISSION_ENABLED,
+    API_COALESCE_ENABLED,
+    API_EXPLAIN_BUDGET_MS,
+    API_EXPLAIN_MAX_BATCH_SIZE,
+    API_INFERENCE_WORKERS,
+    API_MAX_BATCH_SIZE,
+    API_MAX_COLUMNAR_BYTES,
+    API_MAX_COLUMNAR_ROWS,
+    API_MAX_CUSTOMERS_PAGE,
+    API_MAX_IN_FLIGHT,
+    API_MAX_QUEUED,
+    API_MICRO_BATCH_ENABLED,
+    API_MICRO_BATCH_MAX_SIZE,
+    API_MICRO_BATCH_WAIT_MS,
+    API_QUEUE_TIMEOUT_MS,
+    API_SERVER_TIMING,
+    API_STAGE_TIMING,
+    API_STREAM_CHUNK_SIZE,
+    API_STREAM_MAX_LINE_LENGTH,
+    CUSTOMER_SCORES_ENABLED,
+    CUSTOMER_SCORES_PATH,
+    CUSTOMER_STORE_ENABLED,
+    DATA_PATH,
+    EXPLAINER_PRELOAD,
+    EXPLANATION_CACHE_SIZE,
+    EXPLANATION_CACHE_TTL_SECONDS,
+    METRICS_MULTIPROCESS_DIR,
+    METRICS_SYNC_SECONDS,
+    MODEL_WARMUP_LATENCY_TARGET_MS,
+    MODEL_WARMUP_MAX_ROUNDS,
+    MODEL_REGISTRY_POLL_SECONDS,
+    MODEL_WARMUP_REQUESTS,
+    MODELS_PATH,
+    PREDICTION_CACHE_ENABLED,
+    PREDICTION_CACHE_ROUND_DECIMALS,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL_SECONDS,
+    TARGET,
+)
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Configurar logging: os registros são escritos por uma thread em segundo
+# plano, e os eventos por requisição podem ser amostrados (LOG_SAMPLE_RATES)
+log_writer = configure_async_logging(logging.INFO)
 logger = logging.getLogger(__name__)
+events = StructuredLogger(__name__)
 
 # Inicializar o monitoramento
 metrics = setup_monitoring("churn-prediction-api")
+# Diretório onde cada worker grava suas métricas, somadas por
+# /metrics/prometheus (o src.serve define um antes do fork)
+metrics_dir = METRICS_MULTIPROCESS_DIR or None
+metrics_writer = None
 
 app = FastAPI(
     title="Bank Customer Churn Prediction API",
@@ -18,8 +105,156 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Inicializa o predictor
-predictor = ChurnPredictor()
+# Cache opcional de predições, invalidado quando a versão do modelo muda
+cache = None
+if PREDICTION_CACHE_ENABLED:
+    round_decimals = None
+    if PREDICTION_CACHE_ROUND_DECIMALS is not None:
+        round_decimals = {
+            "balance": PREDICTION_CACHE_ROUND_DECIMALS,
+            "estimated_salary": PREDICTION_CACHE_ROUND_DECIMALS
+        }
+    cache = PredictionCache(
+        max_size=PREDICTION_CACHE_SIZE,
+        ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+        round_decimals=round_decimals
+    )
+
+# Registro de versões do modelo: carrega e aquece na inicialização (ou na
+# primeira requisição) e troca de versão sem derrubar requisições em andamento
+registry = ModelRegistry(
+    MODELS_PATH,
+    cache=cache,
+    warmup_requests=MODEL_WARMUP_REQUESTS,
+    latency_target_ms=MODEL_WARMUP_LATENCY_TARGET_MS,
+    warmup_max_rounds=MODEL_WARMUP_MAX_ROUNDS
+)
+
+# Scores pré-calculados de todos os clientes conhecidos: a cada versão
+# ativada do modelo, a tabela é criada (uma vez por versão, em disco) ou
+# carregada, na mesma thread que carregou o modelo
+score_tables = None
+if CUSTOMER_SCORES_ENABLED:
+    score_tables = ScoreTableService(CUSTOMER_SCORES_PATH, DATA_PATH)
+    registry.add_listener(score_tables.on_model_activated)
+
+def get_predictor() -> ChurnPredictor:
+    """Retorna o predictor da versão ativa do modelo"""
+    return registry.get_predictor()
+
+def predict_one(customer_data: dict, timer: Optional[StageTimer] = None) -> tuple[float, bool]:
+    if timer is not None:
+        timer.lap("queue")
+    return get_predictor().predict(customer_data, timer)
+
+def predict_many(customers: list) -> tuple:
+    return get_predictor().predict_batch(customers)
+
+def predict_bulk(customers: list) -> tuple:
+    return get_predictor().predict_batch(customers, use_cache=False)
+
+def predict_columns(columns: dict) -> tuple:
+    predictor = get_predictor()
+    probabilities = predictor.predict_proba(predictor.encoder.encode_columns(columns))
+    return probabilities, probabilities >= predictor.threshold
+
+# Executa a inferência fora do event loop, em um pool limitado de threads
+executor = InferenceExecutor(API_INFERENCE_WORKERS, metrics=metrics)
+
+# Agrupa chamadas concorrentes de /predict em uma única inferência (opcional)
+batcher = None
+if API_MICRO_BATCH_ENABLED:
+    batcher = MicroBatcher(
+        predict_many,
+        max_batch_size=API_MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=API_MICRO_BATCH_WAIT_MS,
+        metrics=metrics,
+        executor=executor
+    )
+
+# Requisições simultâneas para o mesmo cliente compartilham uma única
+# inferência (independente do cache de predições)
+coalescer = SingleFlight(metrics["coalesced_counter"]) if API_COALESCE_ENABLED else None
+
+async def run_prediction(customer_data: dict, timer: Optional[StageTimer] = None) -> tuple[float, bool]:
+    if batcher is not None:
+        return await batcher.submit(customer_data, timer)
+    return await executor.run(predict_one, customer_data, timer)
+
+def load_model_in_background():
+    try:
+        get_predictor()
+        # O master do src.serve pré-carrega o modelo sem chamar os listeners:
+        # cada worker os chama aqui (ex.: a tabela de scores é construída
+        # nos workers, não no processo que faz o fork)
+        registry.notify_listeners()
+    except Exception as e:
+        logger.error(f"Erro ao carregar o modelo: {str(e)}")
+
+# Base de clientes indexada por id, faixas numéricas e categorias, carregada
+# na inicialização
+customer_store = None
+
+def open_customer_store() -> CustomerStore:
+    # O rótulo de churn é o alvo do modelo: não é devolvido nem filtrável
+    return CustomerStore.load(DATA_PATH, exclude=(TARGET,))
+
+def load_customer_store_in_background():
+    global customer_store
+    try:
+        start = time.perf_counter()
+        customer_store = open_customer_store()
+        logger.info(
+            f"Base de clientes indexada: {len(customer_store)} clientes "
+            f"em {time.perf_counter() - start:.2f} s"
+        )
+    except Exception as e:
+        logger.error(f"Erro ao carregar a base de clientes: {str(e)}")
+
+@app.on_event("startup")
+async def load_model():
+    # Inicia as threads do numba na thread principal (se for esta): a
+    # traversal paralela roda depois nas threads do executor
+    start_inference_threads()
+    # Carrega em segundo plano para que /health responda durante o aquecimento
+    asyncio.get_running_loop().run_in_executor(None, load_model_in_background)
+    if CUSTOMER_STORE_ENABLED:
+        asyncio.get_running_loop().run_in_executor(None, load_customer_store_in_background)
+    if MODEL_REGISTRY_POLL_SECONDS > 0:
+        registry.start_watching(MODEL_REGISTRY_POLL_SECONDS)
+
+@app.on_event("startup")
+async def start_metrics_snapshots():
+    global metrics_writer
+    if metrics_dir is not None:
+        metrics_writer = SnapshotWriter(metrics, metrics_dir, METRICS_SYNC_SECONDS)
+        metrics_writer.start()
+
+@app.on_event("shutdown")
+async def stop_metrics_snapshots():
+    if metrics_writer is not None:
+        metrics_writer.stop()
+
+@app.on_event("shutdown")
+async def stop_inference():
+    registry.stop_watching()
+    if batcher is not None:
+        await batcher.stop()
+    executor.shutdown()
+
+# Controle de admissão das rotas do modelo: limita as requisições em
+# execução e a fila de espera, e rejeita com 503 + Retry-After o que não
+# caberia no prazo. Registrado antes do middleware de métricas, que assim
+# também conta as requisições rejeitadas
+admission = None
+if API_ADMISSION_ENABLED:
+    admission = AdmissionController(
+        API_MAX_IN_FLIGHT,
+        API_MAX_QUEUED,
+        API_QUEUE_TIMEOUT_MS,
+        metrics=metrics
+    )
+    app.add_middleware(AdmissionMiddleware, controller=admission, prefixes=("/predict", "/explain"))
 
 @app.middleware("http")
 async def add_metrics(request: Request, call_next):
@@ -44,35 +279,329 @@ async def add_metrics(request: Request, call_next):
         metrics["error_counter"].add(1)
         raise e
 
-@app.post("/predict", response_model=CustomerResponse)
+# Rotas de predição com tempo por etapa (parse, validação, fila, encoding,
+# predict_proba, serialização), cada etapa em seu próprio histograma
+predict_router = APIRouter(
+    route_class=timed_route(stage_histograms(metrics), API_SERVER_TIMING) if API_STAGE_TIMING else APIRoute
+)
+
+@predict_router.post("/predict", response_model=CustomerResponse)
 async def predict_churn(customer: CustomerBase):
+    timer = current_timer()
+    if timer is not None:
+        timer.lap("validate")
     try:
-        start_time = time.time()
-        
         # Converte o modelo Pydantic para dicionário
         customer_data = customer.dict()
-        logger.info(f"Recebida requisição para cliente: {customer_data}")
         
-        # Faz a predição
-        churn_probability, is_likely_to_churn = predictor.predict(customer_data)
+        # Faz a predição, juntando-se a uma predição idêntica em andamento
+        if coalescer is not None:
+            active = registry.active
+            key = (active.predictor.model_version if active is not None else None, canonical_key(customer_data))
+            churn_probability, is_likely_to_churn = await coalescer.run(
+                key, lambda: run_prediction(customer_data, timer), timer
+            )
+        else:
+            churn_probability, is_likely_to_churn = await run_prediction(customer_data, timer)
         
         # Registra a probabilidade de churn no histograma
         metrics["prediction_histogram"].record(float(churn_probability))
+        events.info("prediction", lambda: {
+            "customer": customer_data,
+            "churn_probability": float(churn_probability),
+            "is_likely_to_churn": bool(is_likely_to_churn)
+        })
         
-        # Registra a latência da predição
-        latency = (time.time() - start_time) * 1000  # Converte para milissegundos
-        metrics["latency_histogram"].record(latency)
-        
-        # Retorna a resposta
-        return CustomerResponse(
-            churn_probability=float(churn_probability),
-            is_likely_to_churn=bool(is_likely_to_churn)
-        )
+        # A latência total é registrada uma única vez, no middleware
+        # Retorna a resposta já serializada; response_model continua
+        # documentando o formato no OpenAPI
+        return prediction_response(churn_probability, is_likely_to_churn)
     except Exception as e:
         logger.error(f"Erro ao processar requisição: {str(e)}")
         metrics["error_counter"].add(1)
         raise HTTPException(status_code=500, detail=str(e))
 
+app.include_router(predict_router)
+
+def validate_batch(items: list) -> tuple[list, list, dict]:
+    """Valida cada cliente separadamente para que um registro inválido não derrube o lote"""
+    errors = {}
+    valid_indices = []
+    valid_customers = []
+    for i, item in enumerate(items):
+        try:
+            valid_customers.append(CustomerBase.model_validate(item).model_dump())
+            valid_indices.append(i)
+        except ValidationError as e:
+            errors[i] = str(e)
+    return valid_indices, valid_customers, errors
+
+@app.post("/predict/batch", response_model=BatchResponse)
+async def predict_churn_batch(batch: BatchRequest):
+    """Prevê o churn de vários clientes com uma única chamada ao modelo"""
+    if len(batch.customers) > API_MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(batch.customers)} exceeds the limit of {API_MAX_BATCH_SIZE}"
+        )
+
+    valid_indices, valid_customers, errors = validate_batch(batch.customers)
+
+    probabilities = labels = np.empty(0)
+    if valid_customers:
+        try:
+            probabilities, labels = await executor.run(predict_many, valid_customers)
+        except Exception as e:
+            logger.error(f"Erro ao processar lote: {str(e)}")
+            metrics["error_counter"].add(1)
+            raise HTTPException(status_code=500, detail=str(e))
+        metrics["prediction_histogram"].record_many(probabilities)
+
+    # Serializa direto dos arrays do modelo, sem criar um BatchPrediction por linha
+    return batch_response(len(batch.customers), valid_indices, probabilities, labels, errors)
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Lê o corpo da requisição com no máximo ``max_bytes`` bytes, respondendo 413
+    pelo Content-Length antes de ler (ou assim que um corpo sem ele passar do limite)
+    """
+    too_large = HTTPException(status_code=413, detail=f"Request body exceeds the limit of {max_bytes} bytes")
+    try:
+        declared = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if declared > max_bytes:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@app.post("/predict/columnar", openapi_extra={"requestBody": OPENAPI_REQUEST_BODY})
+async def predict_churn_columnar(request: Request):
+    """
+    Prevê o churn de muitos clientes enviados em colunas (um array por campo),
+    em JSON, Arrow IPC ou NumPy (.npz), e devolve as probabilidades no mesmo formato
+    """
+    fmt = columnar_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type, expected one of {sorted(MEDIA_TYPES.values())}"
+        )
+
+    body = await read_body(request, API_MAX_COLUMNAR_BYTES)
+    try:
+        columns = validate_columns(read_columns(body, fmt))
+    except ColumnarValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    except ImportError as e:
+        raise HTTPException(status_code=415, detail=f"Format {fmt} is not available: {str(e)}")
+
+    n_rows = len(next(iter(columns.values())))
+    if n_rows > API_MAX_COLUMNAR_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {n_rows} exceeds the limit of {API_MAX_COLUMNAR_ROWS}"
+        )
+
+    try:
+        probabilities, labels = await executor.run(predict_columns, columns)
+    except Exception as e:
+        logger.error(f"Erro ao processar lote colunar: {str(e)}")
+        metrics["error_counter"].add(1)
+        raise HTTPException(status_code=500, detail=str(e))
+    metrics["prediction_histogram"].record_many(probabilities)
+
+    result = {"churn_probability": probabilities, "is_likely_to_churn": labels}
+    if ID_FIELD in columns:
+        result = {ID_FIELD: columns[ID_FIELD], **result}
+    return Response(write_columns(result, fmt), media_type=MEDIA_TYPES[fmt])
+
+@app.post("/predict/stream")
+async def predict_churn_stream(request: Request):
+    """
+    Pontua um arquivo CSV (mesmo esquema de "Bank Customer Churn Prediction.csv")
+    ou NDJSON enviado no corpo da requisição, em blocos de tamanho fixo, e
+    devolve as linhas pontuadas à medida que ficam prontas
+    """
+    fmt = detect_format(request.headers.get("content-type"))
+
+    async def score(customers: list) -> tuple:
+        return await executor.run(predict_bulk, customers)
+
+    def log_summary():
+        # O CSV não tem onde levar o resumo; ele fica no log para os dois formatos
+        if scorer.summary is not None:
+            logger.info(f"Stream {fmt} pontuado: {scorer.summary}")
+
+    scorer = StreamScorer(
+        score, fmt=fmt, chunk_size=API_STREAM_CHUNK_SIZE, max_line_length=API_STREAM_MAX_LINE_LENGTH
+    )
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return BodyStreamingResponse(
+        scorer.stream(request.stream()), media_type=media_type, background=BackgroundTask(log_summary)
+    )
+
+# Explicações SHAP: o explicador é criado uma vez por versão do modelo, na
+# primeira chamada a /explain (ou ao ativar a versão, com EXPLAINER_PRELOAD,
+# ao custo de carregar a floresta do sklearn em cada worker); cada requisição
+# tem um orçamento de tempo, e as atribuições exatas ficam em cache
+explanations = ExplanationService(
+    API_EXPLAIN_BUDGET_MS,
+    cache=PredictionCache(max_size=EXPLANATION_CACHE_SIZE, ttl_seconds=EXPLANATION_CACHE_TTL_SECONDS)
+)
+if EXPLAINER_PRELOAD:
+    registry.add_listener(explanations.on_model_activated)
+
+def explain_customers(customers: list, top_k: Optional[int]) -> list:
+    return explanations.explain(get_predictor(), customers, top_k)
+
+@app.post("/explain", response_model=ExplanationResponse)
+async def explain_churn(customer: CustomerBase, top_k: Optional[int] = Query(None, ge=1)):
+    """Explica a probabilidade de churn de um cliente: a contribuição de cada campo"""
+    try:
+        results = await executor.run(explain_customers, [customer.model_dump()], top_k)
+    except Exception as e:
+        logger.error(f"Erro ao explicar predição: {str(e)}")
+        metrics["error_counter"].add(1)
+        raise HTTPException(status_code=500, detail=str(e))
+    return FastJSONResponse(results[0])
+
+@app.post("/explain/batch", response_model=BatchExplanationResponse)
+async def explain_churn_batch(batch: BatchRequest, top_k: Optional[int] = Query(None, ge=1)):
+    """Explica as predições de vários clientes em uma única passada do explicador"""
+    if len(batch.customers) > API_EXPLAIN_MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(batch.customers)} exceeds the limit of {API_EXPLAIN_MAX_BATCH_SIZE}"
+        )
+
+    valid_indices, valid_customers, errors = validate_batch(batch.customers)
+    results = []
+    if valid_customers:
+        try:
+            results = await executor.run(explain_customers, valid_customers, top_k)
+        except Exception as e:
+            logger.error(f"Erro ao explicar lote: {str(e)}")
+            metrics["error_counter"].add(1)
+            raise HTTPException(status_code=500, detail=str(e))
+
+    items = [None] * len(batch.customers)
+    for i, result in zip(valid_indices, results):
+        items[i] = {"customer_index": i, **result, "error": None}
+    for i, error in errors.items():
+        items[i] = {
+            "customer_index": i,
+            "churn_probability": None,
+            "is_likely_to_churn": None,
+            "base_value": None,
+            "method": None,
+            "contributions": None,
+            "error": error
+        }
+    return FastJSONResponse({"explanations": items})
+
+def customer_conditions(store: CustomerStore, params) -> dict:
+    """
+    Converte os parâmetros da busca em condições de ``CustomerStore.query``:
+    colunas categóricas (repetíveis) e min_<coluna>/max_<coluna> numéricos
+    """
+    conditions = {}
+    for name, value in params:
+        if name in ("limit", "offset"):
+            continue
+        if name in store.bitmaps:
+            categories = store.categories(name)
+            if categories and isinstance(categories[0], int):
+                value = int(value)
+            conditions.setdefault(name, []).append(value)
+        elif name[:4] in ("min_", "max_") and name[4:] in store.sorted:
+            low, high = conditions.get(name[4:], (None, None))
+            conditions[name[4:]] = (float(value), high) if name[:4] == "min_" else (low, float(value))
+        else:
+            raise ValueError(f"Unknown filter '{name}'")
+    return conditions
+
+def search_customers(store: CustomerStore, conditions: dict, limit: int, offset: int) -> dict:
+    rows = store.query(**conditions)
+    return {
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "customers": store.take(rows[offset:offset + limit]).to_dict("records")
+    }
+
+def require_customer_store() -> CustomerStore:
+    if not CUSTOMER_STORE_ENABLED:
+        raise HTTPException(status_code=404, detail="Customer store is disabled")
+    if customer_store is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Customer store is not loaded yet",
+            headers={"Retry-After": "5"}
+        )
+    return customer_store
+
+@app.get("/customers")
+async def find_customers(
+    request: Request,
+    limit: int = Query(100, ge=1, le=API_MAX_CUSTOMERS_PAGE),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Busca clientes pelos índices da base, sem percorrê-la: country, gender,
+    active_member e credit_card (repetíveis, qualquer um dos valores) e
+    min_/max_ de cada coluna numérica, p.ex.
+    ?country=France&country=Spain&active_member=0&min_credit_score=600
+    """
+    store = require_customer_store()
+    try:
+        conditions = customer_conditions(store, request.query_params.multi_items())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, search_customers, store, conditions, limit, offset
+    )
+    return FastJSONResponse(result)
+
+@app.get("/customers/{customer_id}")
+async def get_customer(customer_id: int):
+    """Dados de um cliente da base, pelo índice de customer_id"""
+    customer = require_customer_store().get(customer_id)
+    if customer is None:
+        raise HTTPException(status_code=404, detail=f"Unknown customer {customer_id}")
+    return FastJSONResponse(customer)
+
+@app.get("/customers/{customer_id}/score", response_model=CustomerScoreResponse)
+async def customer_score(customer_id: int):
+    """Score pré-calculado de um cliente existente, pela versão ativa do modelo"""
+    if score_tables is None:
+        raise HTTPException(status_code=404, detail="Customer scores are disabled")
+    active = registry.active
+    table = score_tables.table_for(active.predictor.model_version) if active is not None else None
+    if table is None:
+        # Modelo ainda carregando ou tabela da nova versão em construção
+        raise HTTPException(
+            status_code=503,
+            detail="Customer scores are not available yet",
+            headers={"Retry-After": "5"}
+        )
+    score = table.lookup(customer_id)
+    if score is None:
+        raise HTTPException(status_code=404, detail=f"Unknown customer {customer_id}")
+    churn_probability, is_likely_to_churn = score
+    return FastJSONResponse({
+        "customer_id": customer_id,
+        "churn_probability": churn_probability,
+        "is_likely_to_churn": is_likely_to_churn,
+        "model_version": table.model_version,
+        "scored_at": table.built_at
+    })
+
 @app.get("/test-profiles")
 async def test_different_profiles():
     """Testa diferentes perfis de clientes para verificar variações nas predições"""
@@ -124,9 +653,11 @@ async def test_different_profiles():
         }
     ]
     
+    probabilities, labels = await executor.run(
+        predict_many, [profile["data"] for profile in test_profiles]
+    )
     results = []
-    for profile in test_profiles:
-        prob, is_churn = predictor.predict(profile["data"])
+    for profile, prob, is_churn in zip(test_profiles, probabilities, labels):
         results.append({
             "description": profile["description"],
             "prediction": {
@@ -144,14 +675,81 @@ async def get_metrics():
         "status": "healthy",
         "total_requests": metrics["request_counter"].get_value(),
         "total_errors": metrics["error_counter"].get_value(),
-        "average_latency": metrics["latency_histogram"].get_average()
+        "average_latency": metrics["latency_histogram"].get_average(),
+        "latency_ms": metrics["latency_histogram"].summary(),
+        "inference_queue_depth": executor.queue_depth,
+        "inference_running": executor.running,
+        "prediction_cache": cache.stats() if cache is not None else None,
+        "coalesced_requests": metrics["coalesced_counter"].get_value(),
+        "admission": admission.stats() if admission is not None else None,
+        "explanations": explanations.stats(),
+        "customer_scores": score_tables.status() if score_tables is not None else None,
+        "logging": log_writer.stats()
+    }
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_metrics_prometheus():
+    """Métricas no formato de texto do Prometheus, somadas sobre os workers"""
+    exported = metrics_writer.aggregate() if metrics_writer is not None else metrics
+    return PlainTextResponse(
+        exported.prometheus_text(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/health")
+async def health():
+    """Liveness: a API está respondendo; inclui o estado do modelo"""
+    status = registry.status()
+    if registry.active is None and status["error"] is not None:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", **status})
+    return {"status": "healthy", "version": app.version, **status}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: o modelo está carregado, aquecido e dentro da meta de latência"""
+    active = registry.active
+    is_ready = active is not None and active.warmup["meets_target"]
+    status = registry.status()
+    if not is_ready:
+        return JSONResponse(status_code=503, content={"ready": False, **status})
+    return {"ready": True, **status}
+
+@app.get("/model/info")
+async def model_info():
+    """Versão ativa do modelo, tempos de carga e aquecimento e versões disponíveis"""
+    active = registry.active
+    if active is None:
+        return JSONResponse(status_code=503, content={"model_loaded": False, **registry.status()})
+    return {
+        **active.info(),
+        "loading_version": registry.loading_version,
+        "available_versions": [v["version"] for v in registry.versions()]
     }
 
+def require_admin(request: Request):
+    """Exige o token de administração (Authorization: Bearer <API_ADMIN_TOKEN>)"""
+    if not API_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: API_ADMIN_TOKEN is not set")
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), API_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+@app.post("/model/reload", status_code=202)
+async def reload_model(request: Request, version: Optional[str] = None):
+    """Carrega uma versão (a mais recente por padrão) em segundo plano e a ativa; exige o token de administração"""
+    require_admin(request)
+    if version is not None and version not in {v["version"] for v in registry.versions()}:
+        raise HTTPException(status_code=404, detail=f"Unknown model version '{version}'")
+    if not registry.reload_in_background(version):
+        raise HTTPException(status_code=409, detail=f"Version {registry.loading_version} is already loading")
+    return {"status": "loading", "version": version}
+
 @app.get("/")
 async def root():
     return {
         "message": "Bank Customer Churn Prediction API",
         "docs": "/docs",
-        "health": "OK",
+        "health": "/health",
+        "ready": "/ready",
         "metrics": "/metrics"
     } 
\ No newline at end of file
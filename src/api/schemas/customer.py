@@ -1,5 +1,8 @@
+from typing import Any, List, Optional
+
 from pydantic import BaseModel
 
+
 class CustomerBase(BaseModel):
     credit_score: int
     country: str
@@ -12,6 +15,61 @@ class CustomerBase(BaseModel):
     active_member: int
     estimated_salary: float
 
+
 class CustomerResponse(BaseModel):
     churn_probability: float
-    is_likely_to_churn: bool 
\ No newline at end of file
+    is_likely_to_churn: bool
+
+
+class BatchRequest(BaseModel):
+    # Items are validated one by one so a bad row only fails itself
+    customers: List[Any]
+
+
+class BatchPrediction(BaseModel):
+    customer_index: int
+    churn_probability: Optional[float] = None
+    is_likely_to_churn: Optional[bool] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    predictions: List[BatchPrediction]
+
+
+class CustomerScoreResponse(BaseModel):
+    customer_id: int
+    churn_probability: float
+    is_likely_to_churn: bool
+    # Digest of the model version that produced the score, and when
+    model_version: str
+    scored_at: str
+
+
+class FeatureContribution(BaseModel):
+    feature: str
+    value: Any
+    contribution: float
+
+
+class ExplanationResponse(BaseModel):
+    churn_probability: float
+    is_likely_to_churn: bool
+    base_value: float
+    # "shap" (exact attributions) or "importance" (time budget exceeded)
+    method: str
+    contributions: List[FeatureContribution]
+
+
+class BatchExplanation(BaseModel):
+    customer_index: int
+    churn_probability: Optional[float] = None
+    is_likely_to_churn: Optional[bool] = None
+    base_value: Optional[float] = None
+    method: Optional[str] = None
+    contributions: Optional[List[FeatureContribution]] = None
+    error: Optional[str] = None
+
+
+class BatchExplanationResponse(BaseModel):
+    explanations: List[BatchExplanation]
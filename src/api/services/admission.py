@@ -0,0 +1,229 @@
+"""
+Admission control and load shedding for the model routes.
+
+At most ``max_in_flight`` requests run at once; up to ``max_queued`` more
+wait for a slot in arrival order, each until its deadline (the queue
+timeout, or less when the client sends ``X-Request-Timeout-Ms``). Everything
+else is rejected at once with 503 and a ``Retry-After`` header:
+
+    queue_full    the wait queue is full
+    deadline      the expected wait (queue position times the average time
+                  a request holds its slot) would not fit in the deadline
+    timeout       the deadline passed while waiting
+
+So when a burst exceeds capacity, a few callers fail fast and can retry
+elsewhere, instead of every caller queueing in the server until it times
+out. The number of running and waiting requests is published as gauges for
+the autoscaler.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Optional, Sequence
+
+from .serialization import FastJSONResponse
+
+TIMEOUT_HEADER = b"x-request-timeout-ms"
+REASONS = ("queue_full", "deadline", "timeout")
+# Weight of the latest request in the average slot holding time
+SERVICE_TIME_SMOOTHING = 0.1
+
+
+class Overloaded(Exception):
+    """A request was shed; ``retry_after`` is in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Cap concurrent requests with a bounded, deadline-aware wait queue.
+
+    Runs on the event loop of its callers, so it needs no locks.
+
+    Args:
+        max_in_flight (int): Requests allowed to run at once
+        max_queued (int): Requests allowed to wait for a slot
+        queue_timeout_ms (float): Longest wait for a slot
+        metrics (dict, optional): Instruments from ``setup_monitoring``; the
+            in-flight and queued gauges, the wait for a slot (ms) and the
+            rejections are recorded
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int, queue_timeout_ms: float,
+                 metrics: Optional[dict] = None):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout_ms = queue_timeout_ms
+        self.metrics = metrics
+        self.service_time = None
+        self.admitted = 0
+        self.rejected = {reason: 0 for reason in REASONS}
+        self._in_flight = 0
+        self._waiters = deque()
+
+    @property
+    def in_flight(self) -> int:
+        """Requests holding a slot."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a slot."""
+        return len(self._waiters)
+
+    def _gauge(self, key: str, amount: int):
+        if self.metrics is not None:
+            self.metrics[key].add(amount)
+
+    def expected_wait(self, position: int) -> float:
+        """Seconds until the request at queue ``position`` (0 = next) gets a slot."""
+        if self.service_time is None:
+            return 0.0
+        return (position // self.max_in_flight + 1) * self.service_time
+
+    def retry_after(self) -> int:
+        """Seconds after which the current queue should have drained (at least 1)."""
+        return max(1, math.ceil(self.expected_wait(len(self._waiters))))
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        if self.metrics is not None:
+            self.metrics["admission_rejected"].add(1)
+        raise Overloaded(reason, self.retry_after())
+
+    async def acquire(self, timeout_ms: Optional[float] = None):
+        """
+        Wait for a slot.
+
+        Args:
+            timeout_ms (float, optional): Time the client allows for the
+                whole request; capped at ``queue_timeout_ms``
+
+        Raises:
+            Overloaded: The request was shed
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._take()
+            return
+        if len(self._waiters) >= self.max_queued:
+            self._reject("queue_full")
+
+        budget = self.queue_timeout_ms / 1000
+        if timeout_ms is not None:
+            # The slot must come early enough for the request to run
+            budget = min(budget, timeout_ms / 1000 - (self.service_time or 0))
+        if self.expected_wait(len(self._waiters)) > budget:
+            self._reject("deadline")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._gauge("admission_queue_depth", 1)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), budget)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # The slot was handed over as the wait ended: pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._gauge("admission_queue_depth", -1)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject("timeout")
+        if self.metrics is not None:
+            self.metrics["admission_queue_wait"].record((time.perf_counter() - start) * 1000)
+
+    def _take(self):
+        self._in_flight += 1
+        self.admitted += 1
+        self._gauge("admission_in_flight", 1)
+
+    def release(self, held_seconds: Optional[float] = None):
+        """
+        Free a slot, handing it straight to the oldest waiter.
+
+        Args:
+            held_seconds (float, optional): How long the slot was held,
+                which updates the average used to estimate waits
+        """
+        if held_seconds is not None:
+            if self.service_time is None:
+                self.service_time = held_seconds
+            else:
+                self.service_time += SERVICE_TIME_SMOOTHING * (held_seconds - self.service_time)
+        self._in_flight -= 1
+        self._gauge("admission_in_flight", -1)
+        if self._waiters:
+            waiter = self._waiters.popleft()
+            self._gauge("admission_queue_depth", -1)
+            self._take()
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        """Counters reported on ``/metrics``."""
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "service_time_ms": self.service_time * 1000 if self.service_time is not None else None
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an ``AdmissionController`` to some routes.
+
+    The slot is held until the response has been sent, including streamed
+    bodies.
+
+    Args:
+        app: ASGI application
+        controller (AdmissionController): Limits to apply
+        prefixes (Sequence[str]): Path prefixes under admission control
+    """
+
+    def __init__(self, app, controller: AdmissionController, prefixes: Sequence[str]):
+        self.app = app
+        self.controller = controller
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        timeout_ms = None
+        for name, value in scope["headers"]:
+            if name == TIMEOUT_HEADER:
+                try:
+                    timeout_ms = float(value)
+                except ValueError:
+                    pass
+        try:
+            await self.controller.acquire(timeout_ms)
+        except Overloaded as e:
+            response = FastJSONResponse(
+                {"detail": "Server overloaded, retry later", "reason": e.reason},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(time.perf_counter() - start)
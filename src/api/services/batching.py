@@ -0,0 +1,174 @@
+"""
+Dynamic micro-batching for single-customer predictions.
+
+Concurrent ``/predict`` calls are queued and flushed together, either when
+``max_batch_size`` requests are waiting or when the oldest one has waited
+``max_wait_ms``, so that a burst of requests pays for one vectorized model
+call instead of one call per customer.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from .executor import InferenceExecutor
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+PredictBatchFn = Callable[[Sequence[dict]], tuple[np.ndarray, np.ndarray]]
+
+
+class _PendingPrediction:
+    __slots__ = ("customer_data", "future", "enqueued_at", "timer")
+
+    def __init__(self, customer_data: dict, future: asyncio.Future, timer: Optional[StageTimer] = None):
+        self.customer_data = customer_data
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+        self.timer = timer
+
+
+class MicroBatcher:
+    """
+    Collect predictions that arrive close together and score them at once.
+
+    Args:
+        predict_batch (Callable): Function scoring a list of customers, such
+            as ``ChurnPredictor.predict_batch``
+        max_batch_size (int): Flush as soon as this many requests are waiting
+        max_wait_ms (float): Longest time a request waits for others to join
+        metrics (dict, optional): Instruments from ``setup_monitoring``; the
+            batch size and queue wait (ms) of every flush are recorded
+        executor (InferenceExecutor, optional): Pool running the model
+            calls; without it batches are scored on the event loop
+    """
+
+    def __init__(
+        self,
+        predict_batch: PredictBatchFn,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        metrics: Optional[dict] = None,
+        executor: Optional[InferenceExecutor] = None
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics
+        self.executor = executor
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._flushes = set()
+
+    def _ensure_started(self):
+        # The worker is bound to the running loop, so it is (re)created lazily
+        # instead of relying on startup events having been run
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, customer_data: dict, timer: Optional[StageTimer] = None) -> tuple[float, bool]:
+        """
+        Queue one customer and wait for its prediction.
+
+        Args:
+            customer_data (dict): Customer information
+            timer (StageTimer, optional): Charged with the time spent
+                waiting for the batch ("queue") and scoring it ("predict_proba")
+
+        Returns:
+            tuple[float, bool]: (churn probability, is likely to churn)
+        """
+        self._ensure_started()
+        pending = _PendingPrediction(customer_data, self._loop.create_future(), timer)
+        self._queue.put_nowait(pending)
+        return await pending.future
+
+    async def stop(self):
+        """Cancel the worker task; batches being scored still complete."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending = self._queue.get_nowait()
+                if not pending.future.done():
+                    pending.future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Keep collecting while earlier batches are scored by the executor
+            flush = self._loop.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list):
+        # Requests whose caller already gave up are not scored
+        batch = [pending for pending in batch if not pending.future.done()]
+        if not batch:
+            return
+
+        try:
+            self._record_metrics(batch)
+            self._lap(batch, "queue")
+            customers = [p.customer_data for p in batch]
+            if self.executor is not None:
+                probabilities, labels = await self.executor.run(self.predict_batch, customers)
+            else:
+                probabilities, labels = self.predict_batch(customers)
+            self._lap(batch, "predict_proba")
+        except Exception as e:
+            logger.error(f"Erro ao processar micro-lote de {len(batch)} clientes: {str(e)}")
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        for pending, probability, label in zip(batch, probabilities.tolist(), labels.tolist()):
+            if not pending.future.done():
+                pending.future.set_result((probability, label))
+
+    @staticmethod
+    def _lap(batch: list, stage: str):
+        for pending in batch:
+            if pending.timer is not None:
+                pending.timer.lap(stage)
+
+    def _record_metrics(self, batch: list):
+        if self.metrics is None:
+            return
+        now = time.perf_counter()
+        self.metrics["batch_size_histogram"].record(len(batch))
+        for pending in batch:
+            self.metrics["queue_wait_histogram"].record((now - pending.enqueued_at) * 1000)
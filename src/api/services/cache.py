@@ -0,0 +1,123 @@
+"""
+In-process LRU cache of churn probabilities.
+
+Keys are a canonical tuple of the customer features, so the same customer
+sent with different key order, ``600`` vs ``600.0`` or (optionally) a few
+cents of difference in ``balance`` maps to the same entry. Entries expire
+after a TTL and the least recently used entry is evicted when the cache is
+full. Entries are stored per model version, so requests still served by
+the previous version during a swap neither see nor clear the new one's;
+entries of a retired version simply age out.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Mapping, Optional
+
+from .encoder import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+
+
+def canonical_key(customer_data: Mapping, round_decimals: Optional[Mapping[str, int]] = None) -> tuple:
+    """
+    Canonical, hashable form of a customer's features.
+
+    Args:
+        customer_data (Mapping): Customer features
+        round_decimals (Mapping[str, int], optional): Decimals kept for
+            numeric fields, e.g. ``{"balance": 0}``
+
+    Returns:
+        tuple: Numeric fields as floats, then categorical fields as strings
+    """
+    round_decimals = round_decimals or {}
+    numeric = []
+    for field in NUMERIC_FIELDS:
+        value = float(customer_data[field])
+        decimals = round_decimals.get(field)
+        if decimals is not None:
+            value = round(value, decimals)
+        numeric.append(value)
+    categorical = [str(customer_data[field]) for field in CATEGORICAL_FIELDS]
+    return tuple(numeric + categorical)
+
+
+class PredictionCache:
+    """
+    Bounded, thread-safe LRU cache with TTL.
+
+    Args:
+        max_size (int): Maximum number of cached customers
+        ttl_seconds (float): Lifetime of an entry
+        round_decimals (Mapping[str, int], optional): Decimals kept for
+            numeric fields in the key, e.g. ``{"balance": 0}``
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl_seconds: float = 300,
+        round_decimals: Optional[Mapping[str, int]] = None
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.round_decimals = dict(round_decimals or {})
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, customer_data: Mapping) -> tuple:
+        """Canonical, hashable form of a customer's features."""
+        return canonical_key(customer_data, self.round_decimals)
+
+    def get(self, key: tuple, version: Hashable) -> Optional[float]:
+        """
+        Cached probability for ``key`` under model ``version``, if any.
+
+        Args:
+            key (tuple): Result of ``self.key``
+            version (Hashable): Version of the model asking
+
+        Returns:
+            Optional[float]: Churn probability, or None on a miss
+        """
+        versioned = (version, key)
+        with self._lock:
+            entry = self._entries.get(versioned)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[versioned]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(versioned)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, probability: float, version: Hashable):
+        """Store ``probability`` for ``key`` computed by model ``version``."""
+        versioned = (version, key)
+        with self._lock:
+            self._entries[versioned] = (probability, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(versioned)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters reported on ``/metrics``."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
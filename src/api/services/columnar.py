@@ -0,0 +1,229 @@
+"""
+Columnar payloads for high-volume batch scoring.
+
+Customers are sent as one array per field instead of one object per
+customer, in one of three encodings:
+
+    application/json                     {"credit_score": [...], "country": [...], ...}
+    application/vnd.apache.arrow.stream  Arrow IPC stream (requires pyarrow)
+    application/x-npz                    ``np.savez`` archive, one array per field
+
+The arrays are validated with vectorized checks and handed to
+``FeatureEncoder.encode_columns`` as they are, and the probabilities are
+returned in the same encoding.
+"""
+import io
+from typing import Optional
+
+import numpy as np
+
+from ..schemas.customer import CustomerBase
+from .encoder import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+from .serialization import dumps, loads
+
+FORMATS = {
+    "application/json": "json",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/x-npz": "npz"
+}
+MEDIA_TYPES = {fmt: media_type for media_type, fmt in FORMATS.items()}
+
+# Fields declared as int in CustomerBase must hold whole numbers
+INTEGER_FIELDS = tuple(
+    name for name, field in CustomerBase.model_fields.items()
+    if field.annotation is int
+)
+# Request body documented in the OpenAPI schema (the route reads the raw body)
+OPENAPI_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": {
+            "type": "object",
+            "properties": {
+                field: {
+                    "type": "array",
+                    "items": {"type": "integer" if field in INTEGER_FIELDS else "number"}
+                }
+                for field in NUMERIC_FIELDS
+            } | {
+                field: {"type": "array", "items": {"type": "string"}}
+                for field in CATEGORICAL_FIELDS
+            },
+            "required": list(NUMERIC_FIELDS + CATEGORICAL_FIELDS)
+        }},
+        "application/vnd.apache.arrow.stream": {"schema": {"type": "string", "format": "binary"}},
+        "application/x-npz": {"schema": {"type": "string", "format": "binary"}}
+    }
+}
+# Passed through to the response when present
+ID_FIELD = "customer_id"
+# Row indices listed per invalid column
+MAX_REPORTED_ROWS = 10
+
+
+class ColumnarValidationError(ValueError):
+    """Invalid columnar payload; ``errors`` lists the problems per column."""
+
+    def __init__(self, errors: list):
+        super().__init__("; ".join(f"{e['column']}: {e['error']}" for e in errors))
+        self.errors = errors
+
+
+def columnar_format(content_type: Optional[str]) -> Optional[str]:
+    """Payload format for a Content-Type header, or None if unsupported."""
+    media_type = (content_type or "application/json").split(";")[0].strip().lower()
+    return FORMATS.get(media_type)
+
+
+def _read_arrow(body: bytes) -> dict:
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(body).read_all()
+    columns = {}
+    for name in table.column_names:
+        column = table.column(name)
+        if column.null_count:
+            raise ColumnarValidationError([{"column": name, "error": f"{column.null_count} null values"}])
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        # Numeric columns without nulls are exposed without copying
+        columns[name] = column.to_numpy()
+    return columns
+
+
+def _read_npz(body: bytes) -> dict:
+    # allow_pickle=False: object arrays cannot be sent, strings must be "<U"
+    with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def read_columns(body: bytes, fmt: str) -> dict:
+    """
+    Decode a columnar payload into one NumPy array per field.
+
+    Args:
+        body (bytes): Request body
+        fmt (str): "json", "arrow" or "npz"
+
+    Returns:
+        dict: Field name to array
+
+    Raises:
+        ColumnarValidationError: The payload cannot be decoded
+        ImportError: The format needs a package that is not installed
+    """
+    try:
+        if fmt == "arrow":
+            return _read_arrow(body)
+        if fmt == "npz":
+            return _read_npz(body)
+        content = loads(body)
+    except (ColumnarValidationError, ImportError):
+        # A missing pyarrow is the server's limitation, not a bad payload
+        raise
+    except Exception as e:
+        raise ColumnarValidationError([{"column": None, "error": f"Invalid {fmt} payload: {str(e)}"}])
+    if not isinstance(content, dict):
+        raise ColumnarValidationError([{"column": None, "error": "Expected an object with one array per field"}])
+    return content
+
+
+def _rows(mask: np.ndarray) -> list:
+    return np.flatnonzero(mask)[:MAX_REPORTED_ROWS].tolist()
+
+
+def validate_columns(columns: dict) -> dict:
+    """
+    Check every field at once and convert the columns to arrays.
+
+    Numeric fields must be finite numbers (whole numbers for the fields
+    declared as int in ``CustomerBase``), categorical fields strings, and
+    all columns the same length.
+
+    Args:
+        columns (dict): Field name to array or list
+
+    Returns:
+        dict: Field name to validated array, plus ``customer_id`` if sent
+
+    Raises:
+        ColumnarValidationError: With every problem found, per column
+    """
+    errors = []
+    validated = {}
+    for field in NUMERIC_FIELDS:
+        if field not in columns:
+            errors.append({"column": field, "error": "missing"})
+            continue
+        try:
+            values = np.asarray(columns[field], dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            errors.append({"column": field, "error": f"not numeric: {str(e)}"})
+            continue
+        if values.ndim != 1:
+            errors.append({"column": field, "error": "expected a one-dimensional array"})
+            continue
+        invalid = ~np.isfinite(values)
+        if field in INTEGER_FIELDS:
+            invalid |= np.mod(values, 1, where=~invalid, out=np.zeros_like(values)) != 0
+        if invalid.any():
+            errors.append({"column": field, "error": "invalid values", "rows": _rows(invalid)})
+            continue
+        validated[field] = values
+
+    for field in CATEGORICAL_FIELDS:
+        if field not in columns:
+            errors.append({"column": field, "error": "missing"})
+            continue
+        values = columns[field]
+        # Lists (JSON) are checked item by item so numbers are not turned into strings
+        values = values if isinstance(values, np.ndarray) else np.asarray(values, dtype=object)
+        if values.dtype.kind == "O":
+            invalid = np.fromiter((not isinstance(v, str) for v in values), dtype=bool, count=len(values))
+            if invalid.any():
+                errors.append({"column": field, "error": "expected strings", "rows": _rows(invalid)})
+                continue
+        elif values.dtype.kind != "U":
+            errors.append({"column": field, "error": "expected strings"})
+            continue
+        validated[field] = values
+
+    if ID_FIELD in columns:
+        ids = columns[ID_FIELD]
+        # JSON ids keep their Python types (numbers or strings)
+        validated[ID_FIELD] = ids if isinstance(ids, np.ndarray) else np.asarray(ids, dtype=object)
+
+    lengths = {field: len(values) for field, values in validated.items()}
+    if len(set(lengths.values())) > 1:
+        errors.append({"column": None, "error": f"columns have different lengths: {lengths}"})
+    elif not errors and not next(iter(lengths.values())):
+        errors.append({"column": None, "error": "no rows"})
+    if errors:
+        raise ColumnarValidationError(errors)
+    return validated
+
+
+def write_columns(result: dict, fmt: str) -> bytes:
+    """
+    Encode the result arrays in the payload format of the request.
+
+    Args:
+        result (dict): Field name to array
+        fmt (str): "json", "arrow" or "npz"
+
+    Returns:
+        bytes: Response body
+    """
+    if fmt == "arrow":
+        import pyarrow as pa
+
+        table = pa.table(result)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    if fmt == "npz":
+        sink = io.BytesIO()
+        np.savez(sink, **result)
+        return sink.getvalue()
+    return dumps({name: values.tolist() for name, values in result.items()})
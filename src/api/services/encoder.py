@@ -0,0 +1,133 @@
+"""
+Feature encoder for the prediction service.
+
+Builds, once per model, the mapping between the fields of ``CustomerBase``
+and the column offsets of the training matrix, so that requests can be
+encoded straight into a preallocated NumPy array without going through
+``pd.get_dummies``.
+"""
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+
+NUMERIC_FIELDS = (
+    'credit_score',
+    'age',
+    'tenure',
+    'balance',
+    'products_number',
+    'credit_card',
+    'active_member',
+    'estimated_salary'
+)
+
+CATEGORICAL_FIELDS = ('country', 'gender')
+
+
+class FeatureEncoder:
+    """
+    Encode customer records into the feature matrix expected by the model.
+
+    The column layout is derived from ``feature_names`` (the list saved by
+    ``save_model.py``), which is the output of
+    ``pd.get_dummies(..., columns=['country', 'gender'], drop_first=True)``.
+    Numeric fields are copied to a fixed offset and each categorical value
+    present in the training columns sets a single offset to 1. Values that
+    have no column (the dropped baseline category or an unknown value)
+    leave all of the field's columns at 0, exactly like the reindex done by
+    the previous pandas implementation.
+    """
+
+    def __init__(self, feature_names: Sequence[str], dtype=np.float32):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        # sklearn trees evaluate thresholds in float32, so encoding straight
+        # to float32 avoids an extra conversion copy inside predict_proba
+        self.dtype = np.dtype(dtype)
+
+        offsets = {name: i for i, name in enumerate(self.feature_names)}
+        self.numeric_offsets = {
+            field: offsets[field] for field in NUMERIC_FIELDS if field in offsets
+        }
+        self.categorical_offsets = {field: {} for field in CATEGORICAL_FIELDS}
+        for name, offset in offsets.items():
+            for field in CATEGORICAL_FIELDS:
+                prefix = f"{field}_"
+                if name.startswith(prefix):
+                    self.categorical_offsets[field][name[len(prefix):]] = offset
+
+        known = set(self.numeric_offsets.values())
+        for mapping in self.categorical_offsets.values():
+            known.update(mapping.values())
+        unknown = [name for i, name in enumerate(self.feature_names) if i not in known]
+        if unknown:
+            raise ValueError(f"Unsupported feature columns: {unknown}")
+
+    def allocate(self, n_rows: int) -> np.ndarray:
+        """Return a zeroed, C-contiguous matrix for ``n_rows`` customers."""
+        return np.zeros((n_rows, self.n_features), dtype=self.dtype)
+
+    def encode(self, customer_data: Mapping) -> np.ndarray:
+        """
+        Encode a single customer.
+
+        Args:
+            customer_data (Mapping): Customer fields as in ``CustomerBase``
+
+        Returns:
+            np.ndarray: Matrix of shape (1, n_features)
+        """
+        X = self.allocate(1)
+        row = X[0]
+        for field, offset in self.numeric_offsets.items():
+            row[offset] = customer_data[field]
+        for field, mapping in self.categorical_offsets.items():
+            offset = mapping.get(customer_data[field])
+            if offset is not None:
+                row[offset] = 1
+        return X
+
+    def encode_many(self, customers: Sequence[Mapping], out: np.ndarray = None) -> np.ndarray:
+        """
+        Encode N customers into one matrix.
+
+        Args:
+            customers (Sequence[Mapping]): Customer records
+            out (np.ndarray, optional): Preallocated zeroed matrix to fill
+
+        Returns:
+            np.ndarray: Matrix of shape (N, n_features)
+        """
+        n_rows = len(customers)
+        X = self.allocate(n_rows) if out is None else out
+        if X.shape != (n_rows, self.n_features):
+            raise ValueError(f"Output matrix must have shape {(n_rows, self.n_features)}")
+
+        for field, offset in self.numeric_offsets.items():
+            X[:, offset] = [customer[field] for customer in customers]
+        for field, mapping in self.categorical_offsets.items():
+            for i, customer in enumerate(customers):
+                offset = mapping.get(customer[field])
+                if offset is not None:
+                    X[i, offset] = 1
+        return X
+
+    def encode_columns(self, columns: Mapping[str, Iterable]) -> np.ndarray:
+        """
+        Encode customers given as one array per field (e.g. a DataFrame).
+
+        Args:
+            columns (Mapping[str, Iterable]): Field name to column values
+
+        Returns:
+            np.ndarray: Matrix of shape (N, n_features)
+        """
+        first = next(iter(self.numeric_offsets))
+        X = self.allocate(len(columns[first]))
+        for field, offset in self.numeric_offsets.items():
+            X[:, offset] = np.asarray(columns[field], dtype=self.dtype)
+        for field, mapping in self.categorical_offsets.items():
+            values = np.asarray(columns[field], dtype=object)
+            for category, offset in mapping.items():
+                X[:, offset] = values == category
+        return X
@@ -0,0 +1,102 @@
+"""
+Bounded thread pool for CPU-bound inference.
+
+Model calls are handed to a fixed number of worker threads so that the
+asyncio event loop keeps serving health checks and other requests while
+predictions run. sklearn releases the GIL while walking the trees, so the
+workers also score in parallel.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class InferenceExecutor:
+    """
+    Run inference functions on a bounded pool of worker threads.
+
+    Args:
+        max_workers (int): Number of threads running inference
+        metrics (dict, optional): Instruments from ``setup_monitoring``; the
+            queue depth and the time (ms) each call waited for a free worker
+            are recorded
+    """
+
+    def __init__(self, max_workers: int, metrics: Optional[dict] = None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.metrics = metrics
+        self._pool = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls submitted and still waiting for a worker."""
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        """Calls currently executing on a worker."""
+        return self._running
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Created on first use, and again after a shutdown (e.g. app restart)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+            return self._pool
+
+    def _dequeue(self):
+        with self._lock:
+            self._queued -= 1
+        if self.metrics is not None:
+            self.metrics["inference_queue_depth"].add(-1)
+
+    def _discard_cancelled(self, future: Future):
+        # A call cancelled before reaching a worker never runs _execute
+        if future.cancelled():
+            self._dequeue()
+
+    def _execute(self, submitted_at: float, fn: Callable, args: tuple):
+        wait_ms = (time.perf_counter() - submitted_at) * 1000
+        self._dequeue()
+        with self._lock:
+            self._running += 1
+        if self.metrics is not None:
+            self.metrics["inference_queue_wait"].record(wait_ms)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run ``fn(*args)`` on a worker thread and wait for its result.
+
+        Args:
+            fn (Callable): Blocking function, e.g. ``ChurnPredictor.predict``
+            *args: Positional arguments for ``fn``
+
+        Returns:
+            Whatever ``fn`` returns; exceptions are re-raised in the caller
+        """
+        with self._lock:
+            self._queued += 1
+        if self.metrics is not None:
+            self.metrics["inference_queue_depth"].add(1)
+        future = self._get_pool().submit(self._execute, time.perf_counter(), fn, args)
+        future.add_done_callback(self._discard_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True):
+        """Release the worker threads; a later ``run`` starts a new pool."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
@@ -0,0 +1,259 @@
+"""
+SHAP explanations of churn predictions.
+
+A ``shap.TreeExplainer`` is built once per model version, by the first
+request that needs it or, as a registry listener, when the version is
+activated. It loads the sklearn forest, so with the compiled engine it
+costs every worker a private copy of the model. The attributions of every
+customer in a request are computed in one vectorized call. Exact TreeSHAP on the 100-tree forest
+costs tens of milliseconds per row, so each request has a time budget:
+rows are explained in chunks sized from the measured cost per row, and the
+rows left when the budget runs out get an importance-based explanation
+instead, which splits the prediction's distance from the base value across
+the fields in proportion to the model's feature importances. Exact attributions are cached by canonical
+features and model version.
+
+Attributions of the one-hot columns are summed back into their request
+field, so explanations are given in the fields of ``CustomerBase``.
+Gradient boosting models are explained in log-odds by TreeSHAP; their
+attributions are rescaled per row to add up to the distance of the
+probability from the base value, as the forest's do.
+"""
+import logging
+import threading
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .cache import PredictionCache
+from .encoder import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+from .forest import CompiledForest
+
+logger = logging.getLogger(__name__)
+
+FIELDS = NUMERIC_FIELDS + CATEGORICAL_FIELDS
+METHOD_SHAP = "shap"
+METHOD_IMPORTANCE = "importance"
+# Weight of the latest chunk in the estimated cost per row
+COST_SMOOTHING = 0.3
+
+
+def field_matrix(encoder) -> np.ndarray:
+    """
+    Matrix summing model columns into request fields.
+
+    Args:
+        encoder (FeatureEncoder): Encoder of the model
+
+    Returns:
+        np.ndarray: Shape (n_features, len(FIELDS)); ``values @ matrix``
+            gives one value per field
+    """
+    matrix = np.zeros((encoder.n_features, len(FIELDS)))
+    for j, field in enumerate(FIELDS):
+        if field in encoder.numeric_offsets:
+            matrix[encoder.numeric_offsets[field], j] = 1
+        for offset in encoder.categorical_offsets.get(field, {}).values():
+            matrix[offset, j] = 1
+    return matrix
+
+
+class _ModelExplainer:
+    """TreeExplainer and feature importances of one model version."""
+
+    def __init__(self, predictor):
+        start = time.perf_counter()
+        self.version = predictor.model_version
+        self.fields = field_matrix(predictor.encoder)
+        # Uses the sklearn forest, which the compiled engine loads on demand
+        model = predictor.model
+        importances = model.feature_importances_ @ self.fields
+        self.importances = importances / importances.sum()
+        # Forests are explained in probabilities, boosting models in log-odds
+        self.log_odds = not CompiledForest.supports(model)
+        self.base_value = None
+        if not self.log_odds:
+            # Mean churn probability at the tree roots: the expected value TreeSHAP
+            # attributions start from, also used by the importance-based fallback
+            roots = np.array([estimator.tree_.value[0, 0] for estimator in model.estimators_])
+            self.base_value = float(np.mean(roots[:, -1] / roots.sum(axis=1)))
+        self.explainer = None
+        self.seconds_per_row = None
+        try:
+            import shap
+        except ImportError:
+            if self.log_odds:
+                raise RuntimeError(f"Explicações de {type(model).__name__} exigem o pacote shap")
+            logger.warning("shap não está instalado: explicações usarão a importância das features")
+        else:
+            self.explainer = shap.TreeExplainer(model)
+            if self.log_odds:
+                self.expected_margin = float(np.ravel(self.explainer.expected_value)[-1])
+                self.base_value = float(1 / (1 + np.exp(-self.expected_margin)))
+            # One row measures the starting cost per row
+            row_start = time.perf_counter()
+            self.shap_values(predictor.encoder.allocate(1))
+            self.seconds_per_row = time.perf_counter() - row_start
+        logger.info(
+            f"Explicador do modelo {self.version} criado em "
+            f"{(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+
+    def shap_values(self, X: np.ndarray, probabilities: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Exact attributions of the churn class, one column per field.
+
+        Log-odds attributions are rescaled to ``probabilities`` (the model's
+        predictions for ``X``), or to the probabilities they add up to.
+        """
+        values = self.explainer.shap_values(X, check_additivity=False)
+        # shap returns a list per class in older versions, a 3D array in newer
+        if isinstance(values, list):
+            values = values[-1]
+        elif values.ndim == 3:
+            values = values[..., -1]
+        if self.log_odds:
+            margin = values.sum(axis=1)
+            if probabilities is None:
+                probabilities = 1 / (1 + np.exp(-(self.expected_margin + margin)))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = np.where(margin != 0, (probabilities - self.base_value) / margin, 0.0)
+            values = values * scale[:, None]
+        return values @ self.fields
+
+
+class ExplanationService:
+    """
+    Explain predictions within a time budget.
+
+    Args:
+        budget_ms (float): Time per request spent on exact attributions
+        cache (PredictionCache, optional): Cache of exact attributions
+    """
+
+    def __init__(self, budget_ms: float = 250, cache: Optional[PredictionCache] = None):
+        self.budget_ms = budget_ms
+        self.cache = cache
+        self._explainer = None
+        self._lock = threading.Lock()
+        self.exact_rows = 0
+        self.fallback_rows = 0
+
+    def explainer_for(self, predictor) -> _ModelExplainer:
+        """Explainer of the predictor's model version, built if missing."""
+        explainer = self._explainer
+        if explainer is None or explainer.version != predictor.model_version:
+            with self._lock:
+                explainer = self._explainer
+                if explainer is None or explainer.version != predictor.model_version:
+                    explainer = _ModelExplainer(predictor)
+                    self._explainer = explainer
+        return explainer
+
+    def on_model_activated(self, loaded):
+        """``ModelRegistry`` listener: build the new version's explainer before requests need it."""
+        try:
+            self.explainer_for(loaded.predictor)
+        except Exception as e:
+            logger.error(f"Erro ao criar o explicador SHAP: {str(e)}")
+
+    def explain(self, predictor, customers: Sequence[dict], top_k: Optional[int] = None) -> list:
+        """
+        Explain the churn probability of each customer.
+
+        Args:
+            predictor (ChurnPredictor): Model to explain
+            customers (Sequence[dict]): Validated customer records
+            top_k (int, optional): Keep only the k fields with the largest
+                absolute contribution
+
+        Returns:
+            list[dict]: Per customer: churn_probability, is_likely_to_churn,
+                base_value, method and contributions (largest first)
+        """
+        explainer = self.explainer_for(predictor)
+        # The budget covers explaining, not building a missing explainer
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        X = predictor.encoder.encode_many(customers)
+        probabilities = predictor.predict_proba(X)
+        n_rows = len(customers)
+        contributions = np.zeros((n_rows, len(FIELDS)))
+        exact = np.zeros(n_rows, dtype=bool)
+
+        missing = list(range(n_rows))
+        if explainer.explainer is not None:
+            if self.cache is not None:
+                keys = [self.cache.key(customer) for customer in customers]
+                missing = []
+                for i, key in enumerate(keys):
+                    cached = self.cache.get(key, explainer.version)
+                    if cached is None:
+                        missing.append(i)
+                    else:
+                        contributions[i] = cached
+                        exact[i] = True
+            left = self._explain_exact(explainer, X, probabilities, missing, contributions, exact, deadline)
+            if self.cache is not None:
+                for i in missing[:len(missing) - len(left)]:
+                    self.cache.put(keys[i], contributions[i].copy(), explainer.version)
+            missing = left
+
+        if missing:
+            distance = probabilities[missing] - explainer.base_value
+            contributions[missing] = distance[:, None] * explainer.importances[None, :]
+        self.exact_rows += n_rows - len(missing)
+        self.fallback_rows += len(missing)
+        return self._format(customers, probabilities >= predictor.threshold, probabilities,
+                            explainer.base_value, contributions, exact, top_k)
+
+    def _explain_exact(self, explainer, X, probabilities, rows, contributions, exact, deadline) -> list:
+        """Exact attributions for ``rows`` until ``deadline``; returns the rows left."""
+        position = 0
+        while position < len(rows):
+            remaining = deadline - time.perf_counter()
+            fit = int(remaining / explainer.seconds_per_row)
+            if fit < 1:
+                break
+            chunk = rows[position:position + fit]
+            start = time.perf_counter()
+            contributions[chunk] = explainer.shap_values(X[chunk], probabilities[chunk])
+            exact[chunk] = True
+            per_row = (time.perf_counter() - start) / len(chunk)
+            explainer.seconds_per_row += COST_SMOOTHING * (per_row - explainer.seconds_per_row)
+            position += len(chunk)
+        return rows[position:]
+
+    @staticmethod
+    def _format(customers, labels, probabilities, base_value, contributions, exact, top_k) -> list:
+        order = np.argsort(-np.abs(contributions), axis=1, kind="stable")
+        if top_k is not None:
+            order = order[:, :top_k]
+        results = []
+        for i, customer in enumerate(customers):
+            row = contributions[i].tolist()
+            results.append({
+                "churn_probability": float(probabilities[i]),
+                "is_likely_to_churn": bool(labels[i]),
+                "base_value": base_value,
+                "method": METHOD_SHAP if exact[i] else METHOD_IMPORTANCE,
+                "contributions": [
+                    {"feature": FIELDS[j], "value": customer[FIELDS[j]], "contribution": row[j]}
+                    for j in order[i].tolist()
+                ]
+            })
+        return results
+
+    def stats(self) -> dict:
+        """Counters reported on ``/metrics``."""
+        explainer = self._explainer
+        return {
+            "model_version": explainer.version if explainer is not None else None,
+            "exact_rows": self.exact_rows,
+            "fallback_rows": self.fallback_rows,
+            "estimated_ms_per_row": (
+                explainer.seconds_per_row * 1000
+                if explainer is not None and explainer.seconds_per_row is not None else None
+            ),
+            "cache": self.cache.stats() if self.cache is not None else None
+        }
@@ -0,0 +1,266 @@
+"""
+Array-backed inference engine for fitted sklearn tree ensembles.
+
+The trees of a fitted forest are flattened into contiguous node arrays
+(feature, threshold, children and leaf probability) and traversed with
+numba-compiled loops. When numba is not installed the traversal falls back
+to a vectorized NumPy walk over all rows and trees at once.
+"""
+import hashlib
+import threading
+
+import joblib
+import numpy as np
+
+try:
+    from numba import get_num_threads, njit, prange
+except ImportError:  # pragma: no cover - depends on the environment
+    njit = None
+
+# Above this many rows the compiled traversal splits rows across threads
+PARALLEL_MIN_ROWS = 1000
+
+# Whether numba's threading layer was started on the main thread. Until
+# then the traversal stays serial on other threads: the TBB layer hangs at
+# exit when a pool thread starts it.
+_threads_started = False
+# Set by set_inference_threads(1): every traversal is serial and the
+# threading layer is never started, as a process that forks afterwards
+# (the gunicorn master) requires
+_serial = False
+
+
+if njit is not None:
+    @njit(cache=True, nogil=True)
+    def _accumulate(X, first_tree, last_tree, roots, feature, threshold, left, right, value, out):
+        # Trees in the outer loop keep one tree's nodes hot in cache while
+        # every row walks it
+        for t in range(first_tree, last_tree):
+            root = roots[t]
+            for i in range(X.shape[0]):
+                node = root
+                while left[node] != -1:
+                    if X[i, feature[node]] <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                out[i] += value[node]
+
+    @njit(cache=True, nogil=True)
+    def _predict_serial(X, roots, feature, threshold, left, right, value):
+        out = np.zeros(X.shape[0])
+        _accumulate(X, 0, roots.shape[0], roots, feature, threshold, left, right, value, out)
+        return out / roots.shape[0]
+
+    @njit(cache=True, nogil=True, parallel=True)
+    def _predict_parallel(X, roots, feature, threshold, left, right, value, n_chunks):
+        # Each thread walks its own share of the trees into a private row
+        n_trees = roots.shape[0]
+        partial = np.zeros((n_chunks, X.shape[0]))
+        for c in prange(n_chunks):
+            first_tree = c * n_trees // n_chunks
+            last_tree = (c + 1) * n_trees // n_chunks
+            _accumulate(X, first_tree, last_tree, roots, feature, threshold, left, right, value, partial[c])
+        return partial.sum(axis=0) / n_trees
+
+
+def set_inference_threads(n_threads: int):
+    """
+    Cap the threads of the parallel traversal (no-op without numba).
+
+    One thread keeps the traversal serial. More start numba's threading
+    layer, so call it from the main thread.
+    """
+    global _threads_started, _serial
+    _serial = n_threads <= 1
+    if njit is not None and not _serial:
+        from numba import config, set_num_threads
+        set_num_threads(max(1, min(n_threads, config.NUMBA_NUM_THREADS)))
+        _threads_started = True
+
+
+def start_inference_threads():
+    """
+    Start numba's threading layer, so that the parallel traversal may run
+    on other threads (no-op without numba or off the main thread).
+    """
+    global _threads_started
+    if njit is not None and not _serial and threading.current_thread() is threading.main_thread():
+        get_num_threads()
+        _threads_started = True
+
+
+def _parallel_enabled() -> bool:
+    if _serial:
+        return False
+    # On the main thread numba starts the threading layer itself
+    return _threads_started or threading.current_thread() is threading.main_thread()
+
+
+def artifact_digest(path) -> str:
+    """Short content hash identifying a model artifact."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _predict_numpy(X, roots, feature, threshold, left, right, value):
+    n_rows = X.shape[0]
+    # One cursor per (row, tree); every step moves all non-leaf cursors down
+    nodes = np.tile(roots, (n_rows, 1))
+    rows = np.repeat(np.arange(n_rows), roots.shape[0]).reshape(n_rows, -1)
+    active = left[nodes] != -1
+    while active.any():
+        current = nodes[active]
+        goes_left = X[rows[active], feature[current]] <= threshold[current]
+        nodes[active] = np.where(goes_left, left[current], right[current])
+        active = left[nodes] != -1
+    return value[nodes].mean(axis=1)
+
+
+class CompiledForest:
+    """
+    Flat, array-backed copy of a fitted binary ``RandomForestClassifier``.
+
+    ``predict_proba`` follows sklearn exactly: rows are cast to float32,
+    a sample goes left when ``x[feature] <= threshold`` and the forest
+    probability is the mean of the per-tree leaf probabilities.
+    """
+
+    def __init__(self, roots, feature, threshold, left, right, value):
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value)
+        self.n_trees = len(self.roots)
+        self.n_nodes = len(self.feature)
+
+    @staticmethod
+    def supports(model) -> bool:
+        """Whether ``from_sklearn`` can flatten ``model`` (binary sklearn forests)."""
+        from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+        return isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)) and len(model.classes_) == 2
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """
+        Flatten the trees of a fitted sklearn forest.
+
+        Args:
+            model: Fitted binary ``RandomForestClassifier``
+
+        Returns:
+            CompiledForest: Engine producing the same probabilities
+        """
+        if len(model.classes_) != 2:
+            raise ValueError("Only binary classifiers are supported")
+
+        roots, feature, threshold, left, right, value = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            # value holds class counts (or fractions in newer sklearn)
+            counts = tree.value[:, 0, :]
+            proba = counts[:, 1] / counts.sum(axis=1)
+
+            roots.append(offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            value.append(proba)
+            offset += tree.node_count
+
+        return cls(
+            np.array(roots),
+            np.concatenate(feature),
+            np.concatenate(threshold),
+            np.concatenate(left),
+            np.concatenate(right),
+            np.concatenate(value)
+        )
+
+    def to_float32(self) -> "CompiledForest":
+        """
+        Copy with float32 thresholds and node values, halving their memory.
+
+        Rows are compared as float32, so each threshold is rounded down to
+        the largest float32 not above it: ``x <= t`` then takes the same
+        branch as with the float64 threshold, and only the leaf values lose
+        precision (below 1e-7).
+
+        Returns:
+            CompiledForest: Engine with float32 node arrays
+        """
+        threshold = self.threshold.astype(np.float32)
+        rounded_up = threshold.astype(np.float64) > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+        return CompiledForest(
+            self.roots, self.feature, threshold,
+            self.left, self.right, self.value.astype(np.float32)
+        )
+
+    def save(self, path, **metadata):
+        """
+        Write the node arrays uncompressed so they can be memory-mapped.
+
+        Args:
+            path: Destination file
+            **metadata: Extra values stored next to the arrays
+        """
+        joblib.dump({
+            "roots": self.roots,
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "metadata": metadata
+        }, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode: str = "r") -> tuple["CompiledForest", dict]:
+        """
+        Load node arrays written by ``save``.
+
+        With the default read-only ``mmap_mode`` the arrays are backed by the
+        OS page cache, so every process loading the same file shares a single
+        copy of the forest.
+
+        Args:
+            path: File written by ``save``
+            mmap_mode (str): Passed to ``joblib.load``; None reads into memory
+
+        Returns:
+            tuple[CompiledForest, dict]: Engine and the saved metadata
+        """
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        forest = cls(
+            data["roots"], data["feature"], data["threshold"],
+            data["left"], data["right"], data["value"]
+        )
+        return forest, data["metadata"]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Churn probability (class 1) for every row of ``X``.
+
+        Args:
+            X (np.ndarray): Feature matrix in training column order
+
+        Returns:
+            np.ndarray: Probability of class 1 for each row
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        arrays = (self.roots, self.feature, self.threshold, self.left, self.right, self.value)
+        if njit is None:
+            return _predict_numpy(X, *arrays)
+        if X.shape[0] >= PARALLEL_MIN_ROWS and _parallel_enabled():
+            return _predict_parallel(X, *arrays, min(get_num_threads(), self.n_trees))
+        return _predict_serial(X, *arrays)
@@ -1,73 +1,194 @@
 import joblib
-import pandas as pd
 import numpy as np
 from pathlib import Path
+from typing import Optional, Sequence
 import logging
 
+from .cache import PredictionCache
+from .encoder import FeatureEncoder
+from .forest import CompiledForest, artifact_digest
+from .timing import StageTimer
+from ...utils.config import MODEL_ENGINE
+from ...utils.structured_logging import StructuredLogger
+
+ENGINES = ("sklearn", "compiled")
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+events = StructuredLogger(__name__)
 
 class ChurnPredictor:
-    def __init__(self):
-        # Ajustando o caminho para considerar a raiz do projeto
-        base_path = Path(__file__).parent.parent.parent.parent
-        model_path = base_path / "models" / "random_forest_model.joblib"
-        feature_names_path = base_path / "models" / "feature_names.joblib"
+    def __init__(
+        self,
+        engine: str = MODEL_ENGINE,
+        cache: Optional[PredictionCache] = None,
+        model_dir: Optional[Path] = None
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}', expected one of {ENGINES}")
+
+        if model_dir is None:
+            # Ajustando o caminho para considerar a raiz do projeto
+            model_dir = Path(__file__).parent.parent.parent.parent / "models"
+        model_path = model_dir / "random_forest_model.joblib"
+        feature_names_path = model_dir / "feature_names.joblib"
+        nodes_path = model_dir / "random_forest_nodes.joblib"
         
         if not model_path.exists():
             raise FileNotFoundError(f"Model file not found at {model_path}")
         if not feature_names_path.exists():
             raise FileNotFoundError(f"Feature names file not found at {feature_names_path}")
             
-        self.model = joblib.load(model_path)
+        self.model_path = model_path
+        self.model_version = artifact_digest(model_path)
         self.feature_names = joblib.load(feature_names_path)
-        logger.info(f"Modelo carregado com {len(self.feature_names)} features")
+        self.encoder = FeatureEncoder(self.feature_names)
+        self.engine = engine
+        self._model = None
+        self.compiled = None
+        if engine == "compiled":
+            self.compiled = self._load_compiled(nodes_path)
+        else:
+            self._load_model()
+        self.cache = cache
+        # Define threshold for churn prediction (can be adjusted based on business needs)
+        self.threshold = 0.5
+        logger.info(f"Modelo carregado com {len(self.feature_names)} features (engine: {self.engine})")
+
+    @property
+    def model(self):
+        """The sklearn forest, loaded on first use with the compiled engine."""
+        if self._model is None:
+            self._load_model()
+        return self._model
+
+    def _load_model(self):
+        self._model = joblib.load(self.model_path)
+        self._drop_fitted_feature_names()
+
+    def _load_compiled(self, nodes_path: Path) -> CompiledForest:
+        """
+        Memory-map the node arrays written by save_model.py, so every worker
+        process shares one copy of the forest. Falls back to flattening the
+        sklearn model when the file is missing or was built from another model,
+        and to the sklearn engine for models that are not forests.
+        """
+        if nodes_path.exists():
+            compiled, metadata = CompiledForest.load(nodes_path)
+            if metadata.get("model_version") == self.model_version:
+                return compiled
+            logger.warning(f"Ignorando {nodes_path}: gerado a partir de outra versão do modelo")
+        if not CompiledForest.supports(self.model):
+            # Gradient boosting models (e.g. from tune_model.py) run on sklearn
+            logger.warning(f"{type(self.model).__name__} não é suportado pelo engine compilado, usando sklearn")
+            self.engine = "sklearn"
+            return None
+        return CompiledForest.from_sklearn(self.model)
+
+    def _drop_fitted_feature_names(self):
+        """
+        The model is fitted on a DataFrame, so sklearn warns on every call
+        that receives a plain array. The encoder guarantees the column order,
+        which is checked here once instead of on every request.
+        """
+        fitted_names = getattr(self._model, "feature_names_in_", None)
+        if fitted_names is None:
+            return
+        if list(fitted_names) != self.feature_names:
+            raise ValueError("Feature names do not match the columns the model was fitted on")
+        del self._model.feature_names_in_
 
-    def prepare_features(self, customer_data: dict) -> pd.DataFrame:
+    def prepare_features(self, customer_data: dict) -> np.ndarray:
         """
         Prepara os dados do cliente para predição, aplicando o mesmo
         pré-processamento usado no treinamento.
         """
-        # Criar DataFrame com uma linha
-        df = pd.DataFrame([customer_data])
-        logger.info(f"Dados recebidos: {customer_data}")
-        
-        # Aplicar one-hot encoding
-        df_encoded = pd.get_dummies(df, columns=['country', 'gender'])
-        logger.info(f"Colunas após encoding: {df_encoded.columns.tolist()}")
-        
-        # Garantir que todas as colunas necessárias estão presentes
-        for feature in self.feature_names:
-            if feature not in df_encoded.columns:
-                df_encoded[feature] = 0
-                logger.info(f"Adicionada coluna ausente: {feature}")
-                
-        # Reordenar as colunas para match com o treinamento
-        df_final = df_encoded[self.feature_names]
-        logger.info(f"Shape final dos dados: {df_final.shape}")
-        return df_final
-
-    def predict(self, customer_data: dict) -> tuple[float, bool]:
+        X = self.encoder.encode(customer_data)
+        events.debug("features_prepared", lambda: {"customer": customer_data, "shape": X.shape})
+        return X
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Churn probability for every row of an encoded feature matrix.
+
+        Args:
+            X (np.ndarray): Matrix built by ``self.encoder``
+
+        Returns:
+            np.ndarray: Probability of class 1 (churn) for each row
+        """
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)
+        return self.model.predict_proba(X)[:, 1]
+
+    def predict(self, customer_data: dict, timer: Optional[StageTimer] = None) -> tuple[float, bool]:
         """
         Predict the probability of churn for a customer.
         
         Args:
             customer_data (dict): Customer information
+            timer (StageTimer, optional): Charged with the "encode" and
+                "predict_proba" stages
             
         Returns:
             tuple[float, bool]: (churn probability, is likely to churn)
         """
+        if self.cache is not None:
+            key = self.cache.key(customer_data)
+            churn_probability = self.cache.get(key, self.model_version)
+            if churn_probability is not None:
+                return churn_probability, churn_probability >= self.threshold
+
         # Preparar os dados
-        df = self.prepare_features(customer_data)
+        X = self.prepare_features(customer_data)
+        if timer is not None:
+            timer.lap("encode")
         
         # Get probability predictions
-        proba = self.model.predict_proba(df)[0]
-        churn_probability = proba[1]  # Probability of class 1 (churn)
-        logger.info(f"Probabilidade calculada: {churn_probability}")
+        churn_probability = self.predict_proba(X)[0]
+        if timer is not None:
+            timer.lap("predict_proba")
+        events.debug("probability_computed", lambda: {"churn_probability": float(churn_probability)})
+        if self.cache is not None:
+            self.cache.put(key, float(churn_probability), self.model_version)
         
-        # Define threshold for churn prediction (can be adjusted based on business needs)
-        threshold = 0.5
-        is_likely_to_churn = churn_probability >= threshold
+        is_likely_to_churn = churn_probability >= self.threshold
         
-        return churn_probability, is_likely_to_churn 
\ No newline at end of file
+        return churn_probability, is_likely_to_churn
+
+    def predict_batch(
+        self, customers: Sequence[dict], use_cache: bool = True
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predict the probability of churn for many customers at once.
+        
+        Args:
+            customers (Sequence[dict]): Customer records
+            use_cache (bool): Set to False for bulk scoring, so one-off
+                rows do not evict the customers that are re-scored often
+            
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (churn probabilities, is likely to churn)
+        """
+        if self.cache is None or not use_cache:
+            churn_probability = self.predict_proba(self.encoder.encode_many(customers))
+            return churn_probability, churn_probability >= self.threshold
+
+        # Only the customers missing from the cache go through the model
+        keys = [self.cache.key(customer) for customer in customers]
+        churn_probability = np.empty(len(customers))
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key, self.model_version)
+            if cached is None:
+                missing.append(i)
+            else:
+                churn_probability[i] = cached
+        if missing:
+            X = self.encoder.encode_many([customers[i] for i in missing])
+            computed = self.predict_proba(X)
+            churn_probability[missing] = computed
+            for i, probability in zip(missing, computed.tolist()):
+                self.cache.put(keys[i], probability, self.model_version)
+        return churn_probability, churn_probability >= self.threshold
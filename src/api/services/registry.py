@@ -0,0 +1,296 @@
+"""
+Versioned model registry with zero-downtime reloads.
+
+Every directory under ``models/`` holding a ``random_forest_model.joblib``
+is a model version named after the directory; artifacts saved directly in
+``models/`` form the ``default`` version. A new version is loaded and warmed
+up in the background and then swapped in with a single reference
+assignment, so requests already running keep using the predictor they
+started with and no request ever sees a half-loaded model.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from .cache import PredictionCache
+from .prediction import ChurnPredictor
+from .warmup import warm_up
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "random_forest_model.joblib"
+METADATA_FILE = "metadata.json"
+DEFAULT_VERSION = "default"
+
+
+class LoadedModel:
+    """A predictor together with how and when it was loaded."""
+
+    def __init__(self, version: str, path: Path, modified_at: float, predictor: ChurnPredictor,
+                 load_ms: float, warmup: dict, metadata: dict):
+        self.version = version
+        self.path = path
+        self.modified_at = modified_at
+        self.predictor = predictor
+        self.load_ms = load_ms
+        self.warmup = warmup
+        self.metadata = metadata
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+
+    def info(self) -> dict:
+        return {
+            "model_version": self.version,
+            "model_digest": self.predictor.model_version,
+            "engine": self.predictor.engine,
+            "path": str(self.path),
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms,
+            "warmup": self.warmup,
+            "last_trained": self.metadata.get("trained_at"),
+            "performance_metrics": self.metadata.get("performance_metrics", {})
+        }
+
+
+class ModelRegistry:
+    """
+    Track the model versions in ``models_path`` and serve the active one.
+
+    Args:
+        models_path (Path): Directory holding the model versions
+        cache (PredictionCache, optional): Shared by every loaded predictor;
+            its entries are keyed by model digest
+        warmup_requests (int): Synthetic predictions per warm-up round
+        latency_target_ms (float): Warm-up p99 latency target
+        warmup_max_rounds (int): Warm-up rounds before giving up
+    """
+
+    def __init__(
+        self,
+        models_path: Path,
+        cache: Optional[PredictionCache] = None,
+        warmup_requests: int = 200,
+        latency_target_ms: float = 50,
+        warmup_max_rounds: int = 5
+    ):
+        self.models_path = Path(models_path)
+        self.cache = cache
+        self.warmup_requests = warmup_requests
+        self.latency_target_ms = latency_target_ms
+        self.warmup_max_rounds = warmup_max_rounds
+        self._active = None
+        self._load_lock = threading.Lock()
+        self._first_load_lock = threading.Lock()
+        self.loading_version = None
+        self.last_error = None
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._listeners = []
+        self._notified = None
+        self._reload_lock = threading.Lock()
+        self._reloading = False
+        # Newest version ever activated and versions that failed to load, by
+        # (modified_at, version): the watcher only promotes newer versions
+        # that have not failed, so it neither undoes a manual rollback nor
+        # retries a broken version on every poll
+        self._newest_loaded = None
+        self._failed = set()
+
+    def add_listener(self, callback):
+        """
+        Call ``callback(loaded_model)`` after each activation.
+
+        Listeners run on the thread that loaded the model, after the new
+        version is already serving, and outside the load lock.
+        """
+        self._listeners.append(callback)
+
+    @property
+    def active(self) -> Optional[LoadedModel]:
+        """The model currently serving requests, if any."""
+        return self._active
+
+    def versions(self) -> list[dict]:
+        """Available versions, oldest first by artifact modification time."""
+        found = []
+        candidates = [(DEFAULT_VERSION, self.models_path)]
+        if self.models_path.exists():
+            # Hidden directories are versions still being written
+            candidates += [
+                (p.name, p) for p in self.models_path.iterdir()
+                if p.is_dir() and not p.name.startswith(".")
+            ]
+        for version, path in candidates:
+            model_file = path / MODEL_FILE
+            if model_file.exists():
+                found.append({
+                    "version": version,
+                    "path": path,
+                    "modified_at": model_file.stat().st_mtime
+                })
+        return sorted(found, key=lambda v: (v["modified_at"], v["version"]))
+
+    @staticmethod
+    def _key(candidate: dict) -> tuple:
+        """Order of a version in ``versions()``."""
+        return candidate["modified_at"], candidate["version"]
+
+    def resolve(self, version: Optional[str] = None) -> dict:
+        """
+        Find a version in ``versions()``.
+
+        Args:
+            version (str, optional): Version name; the latest when None
+
+        Returns:
+            dict: version, path and modified_at of the version
+        """
+        available = self.versions()
+        if not available:
+            raise FileNotFoundError(f"No model found in {self.models_path}")
+        if version is None:
+            return available[-1]
+        for candidate in available:
+            if candidate["version"] == version:
+                return candidate
+        raise ValueError(f"Unknown model version '{version}'")
+
+    def load(self, version: Optional[str] = None, notify: bool = True) -> LoadedModel:
+        """
+        Load, warm up and activate a version (the latest when None).
+
+        Only one load runs at a time. The active model keeps serving until
+        the new one is fully warmed up.
+
+        Args:
+            version (str, optional): Version name from ``versions()``
+            notify (bool): Call the listeners. A process that forks workers
+                afterwards loads without them, and each worker calls
+                ``notify_listeners()``
+
+        Returns:
+            LoadedModel: The newly active model
+        """
+        with self._load_lock:
+            target = self.resolve(version)
+            self.loading_version = target["version"]
+            try:
+                start = time.perf_counter()
+                predictor = ChurnPredictor(cache=self.cache, model_dir=target["path"])
+                load_ms = (time.perf_counter() - start) * 1000
+                report = warm_up(
+                    predictor,
+                    self.warmup_requests,
+                    self.latency_target_ms,
+                    self.warmup_max_rounds
+                )
+                metadata_path = target["path"] / METADATA_FILE
+                metadata = json.loads(metadata_path.read_text()) if metadata_path.exists() else {}
+            except Exception as e:
+                self.last_error = f"{target['version']}: {str(e)}"
+                self._failed.add(self._key(target))
+                raise
+            finally:
+                self.loading_version = None
+
+            loaded = LoadedModel(
+                target["version"], target["path"], target["modified_at"],
+                predictor, load_ms, report, metadata
+            )
+            # Single reference assignment: in-flight requests keep the old predictor
+            self._active = loaded
+            self.last_error = None
+            self._failed.discard(self._key(target))
+            if self._newest_loaded is None or self._key(target) > self._newest_loaded:
+                self._newest_loaded = self._key(target)
+            logger.info(f"Modelo {loaded.version} ativo ({predictor.model_version}), aquecimento: {report}")
+        if notify:
+            self.notify_listeners()
+        return loaded
+
+    def notify_listeners(self):
+        """Call the listeners for the active model, unless they already ran for it."""
+        loaded = self._active
+        if loaded is None or loaded is self._notified:
+            return
+        self._notified = loaded
+        for listener in self._listeners:
+            listener(loaded)
+
+    def get_predictor(self) -> ChurnPredictor:
+        """Active predictor, loading the latest version on first use."""
+        active = self._active
+        if active is None:
+            with self._first_load_lock:
+                if self._active is None:
+                    self.load()
+            active = self._active
+        return active.predictor
+
+    def reload_in_background(self, version: Optional[str] = None) -> bool:
+        """
+        Start loading a version on a background thread.
+
+        Returns:
+            bool: False if another load is already in progress
+        """
+        with self._reload_lock:
+            if self._reloading or self.loading_version is not None:
+                return False
+            self._reloading = True
+
+            def run():
+                try:
+                    self.load(version)
+                except Exception as e:
+                    logger.error(f"Erro ao carregar a versão {version or 'mais recente'}: {str(e)}")
+                finally:
+                    self._reloading = False
+
+            threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True
+
+    def start_watching(self, interval_seconds: float):
+        """
+        Poll ``models_path`` and activate newer versions as they appear.
+
+        Only versions newer than any activated so far are promoted, so a
+        rollback through ``load()`` stays in place, and a version that failed
+        to load or warm up is not retried until its artifact changes.
+        """
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval_seconds):
+                try:
+                    latest = self.resolve(None)
+                except Exception:
+                    continue
+                key = self._key(latest)
+                if key in self._failed or (self._newest_loaded is not None and key <= self._newest_loaded):
+                    continue
+                self.reload_in_background(latest["version"])
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        self._watcher = None
+
+    def status(self) -> dict:
+        active = self._active
+        return {
+            "model_loaded": active is not None,
+            "model_version": active.version if active is not None else None,
+            "model_digest": active.predictor.model_version if active is not None else None,
+            "engine": active.predictor.engine if active is not None else None,
+            "warmup": active.warmup if active is not None else None,
+            "loading_version": self.loading_version,
+            "error": self.last_error
+        }
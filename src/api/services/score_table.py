@@ -0,0 +1,244 @@
+"""
+Precomputed churn scores of the existing customer base.
+
+Every customer in the dataset is scored once per model version, in
+vectorized chunks, and the scores are written to an on-disk table with an
+open-addressing hash index on ``customer_id``. The table is memory-mapped
+when loaded, so a lookup reads a couple of pages, whatever the number of
+customers, and every worker process shares one copy.
+
+``ScoreTableService`` keeps the table of the active model version: it is
+registered as a listener of the ``ModelRegistry`` and builds (or loads) the
+table whenever a new version is activated. Tables are keyed by the model
+and by the customer file, so a changed file is scored again.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from ...data.data_loader import iter_data_chunks
+from ...data.indexes import HashIndex
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ID_FIELD = "customer_id"
+# Rows encoded and scored at a time while building
+BUILD_CHUNK_ROWS = 500_000
+
+
+def data_digest(path: Path) -> str:
+    """
+    Short hash of a customer file's path, size and modification time.
+
+    Stands in for a content hash, which would mean reading the whole file
+    at every activation.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+class ScoreTable:
+    """
+    Scores of every known customer under one model version.
+
+    Args:
+        customer_ids, churn_probability, is_likely_to_churn (np.ndarray):
+            One value per customer
+        slots (np.ndarray): Hash index of ``customer_ids``, built when omitted
+        model_version (str): Digest of the model that produced the scores
+        built_at (str): ISO timestamp of the build
+        data_version (str, optional): ``data_digest`` of the scored file
+    """
+
+    def __init__(self, customer_ids: np.ndarray, churn_probability: np.ndarray,
+                 is_likely_to_churn: np.ndarray, model_version: str, built_at: str,
+                 slots: Optional[np.ndarray] = None, data_version: Optional[str] = None):
+        self.customer_ids = customer_ids
+        self.churn_probability = churn_probability
+        self.is_likely_to_churn = is_likely_to_churn
+        self.index = HashIndex(customer_ids, slots)
+        self.model_version = model_version
+        self.built_at = built_at
+        self.data_version = data_version
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    @classmethod
+    def build(cls, predictor, data_path: Path, chunk_rows: int = BUILD_CHUNK_ROWS) -> "ScoreTable":
+        """
+        Score every customer of ``data_path`` with ``predictor``.
+
+        When a customer id appears more than once, its last row is kept.
+
+        Args:
+            predictor (ChurnPredictor): Model to score with
+            data_path (Path): CSV or Parquet file in the schema of the dataset
+            chunk_rows (int): Rows encoded and scored at a time
+        """
+        ids, probabilities = [], []
+        for chunk in iter_data_chunks(data_path, chunk_rows):
+            ids.append(chunk[ID_FIELD].to_numpy(dtype=np.int64))
+            probabilities.append(predictor.predict_proba(predictor.encoder.encode_columns(chunk)))
+        customer_ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+        churn_probability = np.concatenate(probabilities) if probabilities else np.empty(0)
+
+        # Index of the last occurrence of each id
+        _, last_reversed = np.unique(customer_ids[::-1], return_index=True)
+        if len(last_reversed) < len(customer_ids):
+            keep = np.sort(len(customer_ids) - 1 - last_reversed)
+            customer_ids, churn_probability = customer_ids[keep], churn_probability[keep]
+
+        return cls(
+            customer_ids,
+            churn_probability,
+            churn_probability >= predictor.threshold,
+            predictor.model_version,
+            datetime.now(timezone.utc).isoformat(),
+            data_version=data_digest(data_path)
+        )
+
+    def save(self, path: Path):
+        """Write the table uncompressed (to be memory-mapped), atomically."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        joblib.dump({
+            "customer_ids": self.customer_ids,
+            "churn_probability": self.churn_probability,
+            "is_likely_to_churn": self.is_likely_to_churn,
+            "slots": self.index.slots,
+            "model_version": self.model_version,
+            "built_at": self.built_at,
+            "data_version": self.data_version
+        }, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: Optional[str] = "r") -> "ScoreTable":
+        """Load a table written by ``save``, memory-mapped by default."""
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        return cls(
+            data["customer_ids"], data["churn_probability"], data["is_likely_to_churn"],
+            data["model_version"], data["built_at"], data["slots"], data.get("data_version")
+        )
+
+    def lookup(self, customer_id: int) -> Optional[tuple[float, bool]]:
+        """
+        Score of one customer.
+
+        Returns:
+            tuple[float, bool]: (churn probability, is likely to churn), or
+                None for an unknown id
+        """
+        row = self.index.find(customer_id)
+        if row < 0:
+            return None
+        return float(self.churn_probability[row]), bool(self.is_likely_to_churn[row])
+
+
+class ScoreTableService:
+    """
+    Keep the score table of the active model version.
+
+    Tables are stored in ``directory`` as
+    ``scores-<model digest>-<data digest>.joblib``, so each version is scored
+    once per customer file and reused by every process and every later
+    activation. A lock file makes concurrent processes build a
+    version's table only once.
+
+    Args:
+        directory (Path): Where the tables are written
+        data_path (Path): Customer base to score
+    """
+
+    def __init__(self, directory: Path, data_path: Path):
+        self.directory = Path(directory)
+        self.data_path = Path(data_path)
+        self._table = None
+        self._lock = threading.Lock()
+        self.building_version = None
+        self.last_error = None
+        self.build_seconds = None
+
+    def path_for(self, model_version: str, data_version: Optional[str] = None) -> Path:
+        """Table file of a model version and customer file (the current ``data_path`` when None)."""
+        if data_version is None:
+            data_version = data_digest(self.data_path)
+        return self.directory / f"scores-{model_version}-{data_version}.joblib"
+
+    def table_for(self, model_version: str) -> Optional[ScoreTable]:
+        """The loaded table, if it was built by ``model_version``."""
+        table = self._table
+        if table is not None and table.model_version == model_version:
+            return table
+        return None
+
+    def refresh(self, predictor) -> ScoreTable:
+        """
+        Load the table of ``predictor``'s version, building it if needed.
+
+        Blocks while the table is built; ``on_model_activated`` calls it on
+        the thread that loaded the model.
+        """
+        with self._lock:
+            data_version = data_digest(self.data_path)
+            table = self.table_for(predictor.model_version)
+            if table is not None and table.data_version == data_version:
+                return table
+            path = self.path_for(predictor.model_version, data_version)
+            self.building_version = predictor.model_version
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with open(path.with_suffix(".lock"), "w") as lock_file:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    if not path.exists():
+                        start = time.perf_counter()
+                        ScoreTable.build(predictor, self.data_path).save(path)
+                        self.build_seconds = time.perf_counter() - start
+                        logger.info(
+                            f"Tabela de scores do modelo {predictor.model_version} criada "
+                            f"em {self.build_seconds:.2f} s"
+                        )
+                table = ScoreTable.load(path)
+            except Exception as e:
+                self.last_error = f"{predictor.model_version}: {str(e)}"
+                raise
+            finally:
+                self.building_version = None
+            self._table = table
+            self.last_error = None
+            return table
+
+    def on_model_activated(self, loaded):
+        """``ModelRegistry`` listener: switch to the new version's table."""
+        try:
+            self.refresh(loaded.predictor)
+        except Exception as e:
+            logger.error(f"Erro ao criar a tabela de scores: {str(e)}")
+
+    def status(self) -> dict:
+        table = self._table
+        return {
+            "model_version": table.model_version if table is not None else None,
+            "customers": len(table) if table is not None else 0,
+            "built_at": table.built_at if table is not None else None,
+            "building_version": self.building_version,
+            "build_seconds": self.build_seconds,
+            "error": self.last_error
+        }
@@ -0,0 +1,88 @@
+"""
+Fast JSON responses for the prediction routes.
+
+The routes still declare their Pydantic ``response_model`` (so the OpenAPI
+schema is unchanged) but return a ``FastJSONResponse`` built straight from
+the model output, which FastAPI sends as is instead of validating the
+result against the model again and running it through
+``jsonable_encoder``. orjson is used when installed; the standard library
+encoder is the fallback.
+"""
+import json
+from typing import Mapping, Sequence
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(body: bytes):
+    """Decode a JSON request body."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with ``dumps``; content must already be plain JSON types."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def prediction_response(churn_probability: float, is_likely_to_churn: bool) -> FastJSONResponse:
+    """Body of ``CustomerResponse`` for one prediction."""
+    return FastJSONResponse({
+        "churn_probability": float(churn_probability),
+        "is_likely_to_churn": bool(is_likely_to_churn)
+    })
+
+
+def batch_response(
+    n_items: int,
+    valid_indices: Sequence[int],
+    probabilities: np.ndarray,
+    labels: np.ndarray,
+    errors: Mapping[int, str]
+) -> FastJSONResponse:
+    """
+    Body of ``BatchResponse`` in input order.
+
+    Args:
+        n_items (int): Number of items in the request
+        valid_indices (Sequence[int]): Item index of each scored row
+        probabilities (np.ndarray): Churn probability of each scored row
+        labels (np.ndarray): Is likely to churn, for each scored row
+        errors (Mapping[int, str]): Validation error of each rejected item
+
+    Returns:
+        FastJSONResponse: ``{"predictions": [...]}``
+    """
+    predictions = [None] * n_items
+    # tolist() converts the whole array to Python floats/bools at C speed
+    for i, probability, label in zip(valid_indices, probabilities.tolist(), labels.tolist()):
+        predictions[i] = {
+            "customer_index": i,
+            "churn_probability": probability,
+            "is_likely_to_churn": label,
+            "error": None
+        }
+    for i, error in errors.items():
+        predictions[i] = {
+            "customer_index": i,
+            "churn_probability": None,
+            "is_likely_to_churn": None,
+            "error": error
+        }
+    return FastJSONResponse({"predictions": predictions})
@@ -0,0 +1,76 @@
+"""
+Coalescing of identical concurrent predictions (single-flight).
+
+When several requests for the same customer arrive while its prediction
+is still running, only the first one (the leader) runs it; the others wait
+on the leader's result instead of queueing their own inference. Calls are
+grouped by a key, e.g. the canonical features plus the model version, and
+the key is forgotten as soon as the computation finishes, so nothing is
+reused afterwards: that is the prediction cache's job, and both can be
+enabled independently.
+"""
+import asyncio
+from typing import Awaitable, Callable, Hashable, Optional
+
+from .timing import StageTimer
+
+
+class SingleFlight:
+    """
+    Share one in-flight computation between concurrent calls with the same key.
+
+    Runs on the event loop of its caller, so it needs no locks.
+
+    Args:
+        counter (Counter, optional): Metrics counter incremented for each
+            coalesced call
+    """
+
+    def __init__(self, counter=None):
+        self.counter = counter
+        self.coalesced = 0
+        self._in_flight = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Distinct computations currently running."""
+        return len(self._in_flight)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved when every caller has gone
+        if not task.cancelled():
+            task.exception()
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable], timer: Optional[StageTimer] = None):
+        """
+        Result of ``fn()``, shared with concurrent calls for ``key``.
+
+        The computation runs in its own task, so a leader whose client
+        disconnects does not cancel it for the others. Exceptions reach
+        every caller.
+
+        Args:
+            key (Hashable): Calls with equal keys share one computation
+            fn (Callable[[], Awaitable]): Starts the computation
+            timer (StageTimer, optional): Stage timer of the request; a
+                coalesced call charges its wait to the ``queue`` stage
+
+        Returns:
+            Whatever ``fn()`` returns
+        """
+        task = self._in_flight.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            return await asyncio.shield(task)
+
+        self.coalesced += 1
+        if self.counter is not None:
+            self.counter.add(1)
+        result = await asyncio.shield(task)
+        if timer is not None:
+            timer.lap("queue")
+        return result
@@ -0,0 +1,221 @@
+"""
+Streaming bulk scoring.
+
+Reads CSV (in the schema of "Bank Customer Churn Prediction.csv") or
+NDJSON from an async byte stream, scores fixed-size chunks with a single
+vectorized model call each and yields the scored rows in the same format
+as soon as each chunk is done. Only one chunk is held in memory at a time,
+whatever the size of the input, and lines longer than ``max_line_length``
+are dropped as they arrive and reported as row errors.
+"""
+import codecs
+import csv
+import io
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import numpy as np
+from starlette.responses import StreamingResponse
+
+from .encoder import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+
+FORMATS = ("csv", "ndjson")
+OUTPUT_FIELDS = ("customer_id", "churn_probability", "is_likely_to_churn", "error")
+
+ScoreFn = Callable[[list], Awaitable[tuple[np.ndarray, np.ndarray]]]
+
+
+async def _lines(chunks: AsyncIterator[bytes], max_length: int) -> AsyncIterator[Optional[str]]:
+    """
+    Split an async byte stream into text lines without buffering it all.
+
+    A line longer than ``max_length`` characters is yielded as None, and its
+    text is discarded as it arrives, up to the next newline.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    # Inside an overlong line already reported
+    skipping = False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            if skipping:
+                skipping = False
+            elif len(line) > max_length:
+                yield None
+            else:
+                yield line.rstrip("\r")
+        if len(pending) > max_length:
+            if not skipping:
+                yield None
+                skipping = True
+            pending = ""
+    pending += decoder.decode(b"", final=True)
+    if skipping:
+        return
+    if len(pending) > max_length:
+        yield None
+    elif pending:
+        yield pending.rstrip("\r")
+
+
+def _parse_row(record: dict) -> dict:
+    """Convert one input record to the fields expected by the encoder."""
+    customer = {field: float(record[field]) for field in NUMERIC_FIELDS}
+    for field in CATEGORICAL_FIELDS:
+        customer[field] = str(record[field])
+    return customer
+
+
+class StreamScorer:
+    """
+    Score a CSV or NDJSON stream chunk by chunk.
+
+    Args:
+        score (Callable): Awaitable scoring a list of customers, returning
+            (probabilities, labels) like ``ChurnPredictor.predict_batch``
+        fmt (str): "csv" or "ndjson", used for both input and output
+        chunk_size (int): Rows scored per model call
+        max_line_length (int): Longest input line, in characters; longer
+            lines are row errors
+    """
+
+    def __init__(self, score: ScoreFn, fmt: str = "ndjson", chunk_size: int = 5000,
+                 max_line_length: int = 65536):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}', expected one of {FORMATS}")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.score = score
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.max_line_length = max_line_length
+        self.rows = 0
+        self.errors = 0
+        self.summary = None
+
+    async def _records(self, lines: AsyncIterator[Optional[str]]) -> AsyncIterator[dict]:
+        header = None
+        async for line in lines:
+            if line is None:
+                yield {"__error__": f"Line longer than {self.max_line_length} characters"}
+                continue
+            if not line.strip():
+                continue
+            if self.fmt == "ndjson":
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {"__error__": f"Invalid JSON: {str(e)}"}
+                    continue
+                if isinstance(record, dict):
+                    yield record
+                else:
+                    yield {"__error__": f"Expected a JSON object, got {type(record).__name__}"}
+            elif header is None:
+                header = next(csv.reader([line]))
+            else:
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    yield {"__error__": f"Expected {len(header)} columns, got {len(values)}"}
+                else:
+                    yield dict(zip(header, values))
+
+    async def _score_chunk(self, records: list) -> list:
+        results = [None] * len(records)
+        valid_indices, customers = [], []
+        for i, record in enumerate(records):
+            error = record.get("__error__")
+            if error is None:
+                try:
+                    customers.append(_parse_row(record))
+                    valid_indices.append(i)
+                    continue
+                except (KeyError, TypeError, ValueError) as e:
+                    error = f"Invalid row: {e!r}"
+            results[i] = (record.get("customer_id"), None, None, error)
+
+        if customers:
+            probabilities, labels = await self.score(customers)
+            for i, probability, label in zip(valid_indices, probabilities.tolist(), labels.tolist()):
+                results[i] = (records[i].get("customer_id"), probability, label, None)
+
+        self.rows += len(records)
+        self.errors += len(records) - len(customers)
+        return results
+
+    def _format(self, results: list) -> str:
+        if self.fmt == "ndjson":
+            return "".join(json.dumps(dict(zip(OUTPUT_FIELDS, row))) + "\n" for row in results)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        for customer_id, probability, label, error in results:
+            writer.writerow([
+                customer_id,
+                "" if probability is None else probability,
+                "" if label is None else int(label),
+                error or ""
+            ])
+        return buffer.getvalue()
+
+    def _summary(self, seconds: float) -> dict:
+        return {
+            "rows": self.rows,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds, 1) if seconds > 0 else None
+        }
+
+    async def stream(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """
+        Yield scored rows chunk by chunk, then (NDJSON only) a throughput summary.
+
+        CSV has no syntax for a trailing summary that readers would skip, so
+        CSV output holds only the scored rows; the summary of either format
+        is left in ``self.summary``.
+
+        Args:
+            chunks (AsyncIterator[bytes]): Request body, e.g. ``request.stream()``
+
+        Yields:
+            str: Output text in the input format
+        """
+        start = time.perf_counter()
+        if self.fmt == "csv":
+            yield ",".join(OUTPUT_FIELDS) + "\n"
+
+        batch = []
+        async for record in self._records(_lines(chunks, self.max_line_length)):
+            batch.append(record)
+            if len(batch) >= self.chunk_size:
+                yield self._format(await self._score_chunk(batch))
+                batch = []
+        if batch:
+            yield self._format(await self._score_chunk(batch))
+
+        self.summary = self._summary(time.perf_counter() - start)
+        if self.fmt == "ndjson":
+            yield json.dumps({"summary": self.summary}) + "\n"
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request body itself.
+
+    ``StreamingResponse`` normally listens for client disconnects on
+    ``receive`` while it streams, which would swallow the request body
+    chunks. Here the iterator is the only reader, and a disconnect surfaces
+    as ``ClientDisconnect`` from ``request.stream()``.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def detect_format(content_type: Optional[str]) -> str:
+    """Stream format from a Content-Type header (NDJSON unless it is CSV)."""
+    return "csv" if content_type and "csv" in content_type.lower() else "ndjson"
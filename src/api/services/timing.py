@@ -0,0 +1,111 @@
+"""
+Per-stage latency of the prediction path.
+
+A ``StageTimer`` is attached to each timed request by ``timed_route``. Code
+along the path calls ``timer.lap(stage)`` to charge the time since the
+previous lap to a stage, and the route records every stage in its own
+histogram once the response is built:
+
+    parse          reading the body and decoding the JSON
+    validate       Pydantic validation, up to the endpoint being called
+    queue          waiting for an inference thread or a micro-batch
+    encode         building the feature row
+    predict_proba  the model call (the whole micro-batch when batching)
+    serialize      building and encoding the response
+
+When timing is disabled the route is a plain ``APIRoute`` and callers see
+``timer is None``, so the cost is a ``None`` check.
+"""
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+STAGES = ("parse", "validate", "queue", "encode", "predict_proba", "serialize")
+
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Accumulates the time spent in each stage of one request."""
+
+    __slots__ = ("durations", "_last")
+
+    def __init__(self):
+        self.durations = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        """Charge the time since the previous lap to ``stage``."""
+        now = time.perf_counter()
+        self.durations[stage] = self.durations.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def server_timing(self) -> str:
+        """Durations as a ``Server-Timing`` header value (milliseconds)."""
+        return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.durations.items())
+
+
+def current_timer() -> Optional[StageTimer]:
+    """Timer of the request being handled, or None when it is not timed."""
+    return _current_timer.get()
+
+
+def stage_histograms(registry) -> dict:
+    """Create one latency histogram per stage in a ``MetricsRegistry``."""
+    return {
+        stage: registry.histogram(
+            f"stage_{stage}",
+            name=f"predict_stage_{stage}",
+            description=f"Latência da etapa {stage} de /predict",
+            unit="ms"
+        )
+        for stage in STAGES
+    }
+
+
+def timed_route(histograms: dict, server_timing: bool = False) -> type:
+    """
+    Route class timing the stages of its endpoints.
+
+    Args:
+        histograms (dict): Stage name to histogram, from ``stage_histograms``
+        server_timing (bool): Add a ``Server-Timing`` header to responses
+
+    Returns:
+        type: ``APIRoute`` subclass for ``APIRouter(route_class=...)``
+    """
+
+    class TimedRoute(APIRoute):
+        def get_route_handler(self) -> Callable:
+            handler = super().get_route_handler()
+
+            async def timed_handler(request: Request) -> Response:
+                timer = StageTimer()
+                token = _current_timer.set(timer)
+                try:
+                    # The decoded body is cached on the request, so FastAPI
+                    # does not parse it again; errors are left for it to report
+                    try:
+                        await request.json()
+                    except Exception:
+                        pass
+                    timer.lap("parse")
+                    response = await handler(request)
+                    timer.lap("serialize")
+                finally:
+                    _current_timer.reset(token)
+
+                for stage, seconds in timer.durations.items():
+                    histogram = histograms.get(stage)
+                    if histogram is not None:
+                        histogram.record(seconds * 1000)
+                if server_timing:
+                    response.headers["Server-Timing"] = timer.server_timing()
+                return response
+
+            return timed_handler
+
+    return TimedRoute
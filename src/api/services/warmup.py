@@ -0,0 +1,98 @@
+"""
+Model warm-up.
+
+Runs synthetic predictions through a freshly loaded ChurnPredictor so that
+lazy initialization (numba cache loading, sklearn thread pools, page
+faults on memory-mapped arrays) is paid before the pod takes traffic, and
+measures the resulting single-row latency.
+"""
+import time
+
+import numpy as np
+
+from .encoder import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+
+# Value ranges found in "Bank Customer Churn Prediction.csv"
+FIELD_RANGES = {
+    'credit_score': (350, 850),
+    'age': (18, 92),
+    'tenure': (0, 10),
+    'balance': (0.0, 250000.0),
+    'products_number': (1, 4),
+    'credit_card': (0, 1),
+    'active_member': (0, 1),
+    'estimated_salary': (11.58, 199992.48)
+}
+
+FIELD_CHOICES = {
+    'country': ('France', 'Germany', 'Spain'),
+    'gender': ('Female', 'Male')
+}
+
+
+def synthetic_customers(n: int, seed: int = 42) -> list[dict]:
+    """
+    Random customers covering the ranges seen in training.
+
+    Args:
+        n (int): Number of customers
+        seed (int): Random seed
+
+    Returns:
+        list[dict]: Records shaped like ``CustomerBase``
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for field in NUMERIC_FIELDS:
+        low, high = FIELD_RANGES[field]
+        if isinstance(low, int):
+            columns[field] = rng.integers(low, high + 1, size=n).tolist()
+        else:
+            columns[field] = np.round(rng.uniform(low, high, size=n), 2).tolist()
+    for field in CATEGORICAL_FIELDS:
+        columns[field] = rng.choice(FIELD_CHOICES[field], size=n).tolist()
+    return [{field: values[i] for field, values in columns.items()} for i in range(n)]
+
+
+def warm_up(predictor, n_requests: int, latency_target_ms: float, max_rounds: int = 5) -> dict:
+    """
+    Run warm-up rounds until single-row latency meets the target.
+
+    Each round encodes and scores ``n_requests`` synthetic customers one by
+    one (the ``/predict`` path, bypassing the prediction cache) and one
+    batch of the same customers (the ``/predict/batch`` path).
+
+    Args:
+        predictor (ChurnPredictor): Freshly loaded predictor
+        n_requests (int): Single-row predictions per round
+        latency_target_ms (float): p99 single-row latency to reach
+        max_rounds (int): Rounds to try before giving up
+
+    Returns:
+        dict: Warm-up report with the latency of the last round
+    """
+    customers = synthetic_customers(max(n_requests, 1))
+    start = time.perf_counter()
+    rounds = 0
+    latencies = []
+    while rounds < max_rounds:
+        rounds += 1
+        latencies = []
+        for customer in customers:
+            request_start = time.perf_counter()
+            predictor.predict_proba(predictor.encoder.encode(customer))
+            latencies.append((time.perf_counter() - request_start) * 1000)
+        predictor.predict_proba(predictor.encoder.encode_many(customers))
+        if np.percentile(latencies, 99) <= latency_target_ms:
+            break
+
+    p50, p99 = np.percentile(latencies, [50, 99]).tolist()
+    return {
+        "requests": len(customers) * rounds,
+        "rounds": rounds,
+        "duration_ms": (time.perf_counter() - start) * 1000,
+        "p50_latency_ms": p50,
+        "p99_latency_ms": p99,
+        "latency_target_ms": latency_target_ms,
+        "meets_target": p99 <= latency_target_ms
+    }
@@ -0,0 +1,211 @@
+"""
+Offline batch scoring of large customer files.
+
+Reads a CSV or Parquet file in chunks, scores the chunks on a process pool
+(the model is loaded once per worker) and writes one Parquet part file per
+chunk to the output directory. Parts are written atomically and recorded
+in a manifest, so an interrupted run picks up where it stopped.
+
+Usage:
+    python -m src.batch_score "Bank Customer Churn Prediction.csv" scores/ --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from src.api.services.forest import artifact_digest, set_inference_threads
+from src.api.services.prediction import ChurnPredictor
+from src.data.data_loader import iter_data_chunks
+from src.utils.config import MODEL_ENGINE, MODELS_PATH
+
+MANIFEST_FILE = "_manifest.json"
+MODEL_FILE = "random_forest_model.joblib"
+
+# Predictor of the current worker process, set by _init_worker
+_predictor = None
+
+
+def _part_path(output_dir: Path, chunk_index: int) -> Path:
+    return output_dir / f"part-{chunk_index:06d}.parquet"
+
+
+def _init_worker(model_dir: str, engine: str):
+    global _predictor
+    # Parallelism comes from the processes; one numba thread each avoids
+    # oversubscribing the cores
+    set_inference_threads(1)
+    _predictor = ChurnPredictor(engine=engine, model_dir=Path(model_dir))
+
+
+def _score_chunk(chunk_index: int, chunk: pd.DataFrame, first_row: int, output_dir: str) -> dict:
+    """Score one chunk and write it as a Parquet part file."""
+    start = time.perf_counter()
+    probabilities = _predictor.predict_proba(_predictor.encoder.encode_columns(chunk))
+    if "customer_id" in chunk.columns:
+        customer_ids = chunk["customer_id"].to_numpy()
+    else:
+        customer_ids = pd.RangeIndex(first_row, first_row + len(chunk)).to_numpy()
+
+    scores = pd.DataFrame({
+        "customer_id": customer_ids,
+        "churn_probability": probabilities,
+        "is_likely_to_churn": probabilities >= _predictor.threshold
+    })
+    # Escreve em um arquivo temporário e renomeia, para que uma parte
+    # incompleta nunca seja tomada como pronta ao retomar
+    part = _part_path(Path(output_dir), chunk_index)
+    tmp = part.with_name(f".{part.name}.tmp")
+    scores.to_parquet(tmp, index=False)
+    os.replace(tmp, part)
+
+    return {
+        "chunk": chunk_index,
+        "worker": os.getpid(),
+        "rows": len(chunk),
+        "seconds": time.perf_counter() - start
+    }
+
+
+def _check_manifest(output_dir: Path, manifest: dict, overwrite: bool):
+    manifest_path = output_dir / MANIFEST_FILE
+    if manifest_path.exists() and not overwrite:
+        previous = json.loads(manifest_path.read_text())
+        if previous != manifest:
+            raise ValueError(
+                f"{output_dir} holds scores from a different run ({previous}); "
+                "use --overwrite to start over"
+            )
+    else:
+        for part in output_dir.glob("part-*.parquet"):
+            part.unlink()
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+
+
+def score_file(
+    input_path: Path,
+    output_dir: Path,
+    chunk_size: int = 50000,
+    workers: Optional[int] = None,
+    model_dir: Path = MODELS_PATH,
+    engine: str = MODEL_ENGINE,
+    overwrite: bool = False
+) -> dict:
+    """
+    Score every row of a customer file into a directory of Parquet parts.
+
+    Chunks whose part file already exists are skipped, so running the same
+    command again after an interruption only scores what is missing.
+
+    Args:
+        input_path (Path): CSV or Parquet file in the schema of the dataset
+        output_dir (Path): Directory for the part files and the manifest
+        chunk_size (int): Rows per chunk and per part file
+        workers (int, optional): Worker processes (default: CPU count)
+        model_dir (Path): Directory holding the model artifacts
+        engine (str): ChurnPredictor inference engine
+        overwrite (bool): Discard scores left by a different run
+
+    Returns:
+        dict: Run report with per-worker rows and rows per second
+    """
+    input_path, output_dir, model_dir = Path(input_path), Path(output_dir), Path(model_dir)
+    workers = workers or os.cpu_count() or 1
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    stat = input_path.stat()
+    _check_manifest(output_dir, {
+        "input": str(input_path.resolve()),
+        "input_size": stat.st_size,
+        "input_modified_at": stat.st_mtime,
+        "chunk_size": chunk_size,
+        "model_version": artifact_digest(model_dir / MODEL_FILE),
+        "engine": engine
+    }, overwrite)
+
+    start = time.perf_counter()
+    per_worker = defaultdict(lambda: {"chunks": 0, "rows": 0, "seconds": 0.0})
+    skipped = 0
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            result = future.result()
+            stats = per_worker[result["worker"]]
+            stats["chunks"] += 1
+            stats["rows"] += result["rows"]
+            stats["seconds"] += result["seconds"]
+
+    # Workers are spawned, not forked: a fork after the caller started numba's
+    # threading layer (TBB, GNU OpenMP) is not safe
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(str(model_dir), engine)
+    ) as pool:
+        first_row = 0
+        for chunk_index, chunk in enumerate(iter_data_chunks(input_path, chunk_size)):
+            if _part_path(output_dir, chunk_index).exists():
+                skipped += 1
+            else:
+                # Limita os blocos em espera para manter a memória constante
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(pool.submit(_score_chunk, chunk_index, chunk, first_row, str(output_dir)))
+            first_row += len(chunk)
+        collect(wait(pending).done)
+
+    seconds = time.perf_counter() - start
+    rows = sum(stats["rows"] for stats in per_worker.values())
+    return {
+        "output": str(output_dir),
+        "rows_scored": rows,
+        "chunks_scored": sum(stats["chunks"] for stats in per_worker.values()),
+        "chunks_skipped": skipped,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else None,
+        "workers": {
+            pid: dict(stats, rows_per_second=stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else None)
+            for pid, stats in per_worker.items()
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontua um arquivo de clientes em lote")
+    parser.add_argument("input", type=Path, help="Arquivo CSV ou Parquet com os clientes")
+    parser.add_argument("output", type=Path, help="Diretório de saída (partes Parquet)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Linhas por bloco")
+    parser.add_argument("--workers", type=int, default=None, help="Processos (padrão: número de CPUs)")
+    parser.add_argument("--model-dir", type=Path, default=MODELS_PATH, help="Diretório do modelo")
+    parser.add_argument("--engine", default=MODEL_ENGINE, help="Engine de inferência (sklearn ou compiled)")
+    parser.add_argument("--overwrite", action="store_true", help="Descarta partes de uma execução diferente")
+    args = parser.parse_args()
+
+    report = score_file(
+        args.input, args.output, args.chunk_size, args.workers,
+        args.model_dir, args.engine, args.overwrite
+    )
+
+    print(f"Partes salvas em: {report['output']}")
+    print(f"Blocos pontuados: {report['chunks_scored']}, retomados (já existentes): {report['chunks_skipped']}")
+    for pid, stats in sorted(report["workers"].items()):
+        print(
+            f"Worker {pid}: {stats['chunks']} blocos, {stats['rows']} linhas, "
+            f"{stats['seconds']:.2f} s, {stats['rows_per_second']:.0f} linhas/s"
+        )
+    if report["rows_scored"]:
+        print(f"Total: {report['rows_scored']} linhas em {report['seconds']:.2f} s ({report['rows_per_second']:.0f} linhas/s)")
+
+
+if __name__ == "__main__":
+    main()
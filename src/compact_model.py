@@ -0,0 +1,330 @@
+"""
+Compaction of the serving forest for lower memory and latency.
+
+Builds smaller candidates from the forest in ``models/`` and reports, for
+each one, the artifact sizes, resident memory of the node arrays, single-row
+and batch latency and AUC against the baseline:
+
+    baseline       the forest's hyperparameters, float64 node arrays
+    baseline-f32   the same trees with float32 thresholds and values
+    trees-<N>      the N trees that contribute most to validation AUC
+    depth-<D>      refit with max_depth=D
+    leaf-<L>       refit with min_samples_leaf=L
+
+Every candidate but ``baseline`` uses float32 node arrays. The shipped
+forest was trained on a different split than ``data_loader.split_data``,
+so the baseline is refit with the same hyperparameters on the split's
+training rows (minus a validation slice used to rank the trees), and
+every candidate is scored on the split's test rows, which none of them
+has seen.
+
+Usage:
+    python -m src.compact_model --trees 10,25,50 --max-depth 8,12 --min-samples-leaf 5,20
+    python -m src.compact_model --save trees-25 --version compact-v1
+"""
+import argparse
+import copy
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Sequence
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from src.api.services.encoder import FeatureEncoder
+from src.api.services.forest import CompiledForest, artifact_digest
+from src.data.data_loader import load_data, split_data
+from src.utils.config import MODELS_PATH, RANDOM_STATE
+
+MODEL_FILE = "random_forest_model.joblib"
+FEATURE_NAMES_FILE = "feature_names.joblib"
+NODES_FILE = "random_forest_nodes.joblib"
+METADATA_FILE = "metadata.json"
+# Share of the training rows held out to rank the trees
+VALIDATION_SIZE = 0.2
+
+
+def encoded_splits(feature_names: Sequence[str]) -> tuple:
+    """
+    Training, validation and test rows encoded for the model.
+
+    The test rows are those of ``data_loader.split_data``; a stratified
+    ``VALIDATION_SIZE`` share of its training rows is held out for
+    validation.
+
+    Returns:
+        tuple: X_fit, X_val, X_test, y_fit, y_val, y_test as arrays
+    """
+    encoder = FeatureEncoder(feature_names)
+    X_train, X_test, y_train, y_test = split_data(load_data())
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=VALIDATION_SIZE, random_state=RANDOM_STATE, stratify=y_train
+    )
+    X_fit, X_val, X_test = (encoder.encode_columns(X) for X in (X_fit, X_val, X_test))
+    y_fit, y_val, y_test = (np.asarray(y) for y in (y_fit, y_val, y_test))
+    return X_fit, X_val, X_test, y_fit, y_val, y_test
+
+
+def select_trees(tree_probabilities: np.ndarray, y: np.ndarray, n_trees: int) -> list:
+    """
+    Greedy forward selection of the trees that maximize validation AUC.
+
+    Starts from the best single tree and repeatedly adds the tree whose
+    addition gives the averaged ensemble the highest AUC.
+
+    Args:
+        tree_probabilities (np.ndarray): Shape (n_trees, n_rows), churn
+            probability of each tree on the validation rows
+        y (np.ndarray): Validation labels
+        n_trees (int): Trees to keep
+
+    Returns:
+        list: Indices of the selected trees, in order of selection
+    """
+    selected = []
+    remaining = list(range(len(tree_probabilities)))
+    total = np.zeros(tree_probabilities.shape[1])
+    for _ in range(min(n_trees, len(remaining))):
+        scores = [roc_auc_score(y, total + tree_probabilities[t]) for t in remaining]
+        best = remaining.pop(int(np.argmax(scores)))
+        selected.append(best)
+        total += tree_probabilities[best]
+    return selected
+
+
+def subset_forest(model: RandomForestClassifier, indices: Sequence[int]) -> RandomForestClassifier:
+    """Copy of ``model`` keeping only the trees at ``indices``."""
+    subset = copy.copy(model)
+    subset.estimators_ = [model.estimators_[i] for i in indices]
+    subset.n_estimators = len(subset.estimators_)
+    return subset
+
+
+def build_candidates(
+    params: dict,
+    X_fit: np.ndarray,
+    y_fit: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    tree_counts: Sequence[int] = (),
+    max_depths: Sequence[int] = (),
+    min_leaf_sizes: Sequence[int] = ()
+) -> dict:
+    """
+    Fit the baseline and derive the smaller candidates.
+
+    Args:
+        params (dict): Hyperparameters of the forest being compacted
+        X_fit, y_fit: Training rows
+        X_val, y_val: Validation rows used to rank the trees
+        tree_counts (Sequence[int]): Sizes of the tree subsets
+        max_depths (Sequence[int]): max_depth values to refit with
+        min_leaf_sizes (Sequence[int]): min_samples_leaf values to refit with
+
+    Returns:
+        dict: Candidate name to ``(model, float32, parameters)``
+    """
+    baseline = RandomForestClassifier(**params).fit(X_fit, y_fit)
+    candidates = {
+        "baseline": (baseline, False, {}),
+        "baseline-f32": (baseline, True, {})
+    }
+    if tree_counts:
+        tree_probabilities = np.stack([
+            tree.predict_proba(X_val)[:, 1] for tree in baseline.estimators_
+        ])
+        ranking = select_trees(tree_probabilities, y_val, max(tree_counts))
+        for n in sorted(tree_counts):
+            candidates[f"trees-{n}"] = (subset_forest(baseline, ranking[:n]), True, {"n_estimators": n})
+    for depth in sorted(max_depths):
+        model = RandomForestClassifier(**dict(params, max_depth=depth)).fit(X_fit, y_fit)
+        candidates[f"depth-{depth}"] = (model, True, {"max_depth": depth})
+    for leaf in sorted(min_leaf_sizes):
+        model = RandomForestClassifier(**dict(params, min_samples_leaf=leaf)).fit(X_fit, y_fit)
+        candidates[f"leaf-{leaf}"] = (model, True, {"min_samples_leaf": leaf})
+    return candidates
+
+
+def median_ms(fn, repeats: int) -> float:
+    """Median wall time of ``fn`` in milliseconds, after one warm-up call."""
+    fn()  # warm-up (numba compilation for the array dtypes)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def measure_candidate(model, float32: bool, X_test: np.ndarray, y_test: np.ndarray, workdir: Path) -> dict:
+    """
+    Size, memory, latency and AUC of one candidate with the compiled engine.
+
+    ``memory_mb`` is the size of the node arrays, which is what stays
+    resident once every node has been visited.
+
+    Returns:
+        dict: Report row
+    """
+    forest = CompiledForest.from_sklearn(model)
+    if float32:
+        forest = forest.to_float32()
+    model_path = workdir / MODEL_FILE
+    nodes_path = workdir / NODES_FILE
+    joblib.dump(model, model_path)
+    forest.save(nodes_path)
+    forest, _ = CompiledForest.load(nodes_path)
+    arrays = (forest.roots, forest.feature, forest.threshold, forest.left, forest.right, forest.value)
+
+    return {
+        "trees": forest.n_trees,
+        "nodes": forest.n_nodes,
+        "model_mb": model_path.stat().st_size / 2 ** 20,
+        "nodes_mb": nodes_path.stat().st_size / 2 ** 20,
+        "memory_mb": sum(a.nbytes for a in arrays) / 2 ** 20,
+        "single_row_ms": median_ms(lambda: forest.predict_proba(X_test[:1]), repeats=200),
+        "batch_ms": median_ms(lambda: forest.predict_proba(X_test), repeats=10),
+        "batch_rows": len(X_test),
+        "auc": float(roc_auc_score(y_test, forest.predict_proba(X_test)))
+    }
+
+
+def save_candidate(model, float32: bool, feature_names: list, version: str, metadata: dict,
+                   models_path: Path = MODELS_PATH, extra_files: Optional[dict] = None) -> Path:
+    """
+    Write a candidate as a model version the API can activate.
+
+    Uses the layout of ``save_model.py``, written to a hidden directory and
+    renamed at once so the API never sees an incomplete version. Models the
+    compiled engine does not support are saved without node arrays and
+    served by the sklearn engine.
+
+    Args:
+        extra_files (dict, optional): File name to JSON content written
+            next to the model
+
+    Returns:
+        Path: Directory of the new version
+    """
+    target = models_path / version
+    if target.exists():
+        raise FileExistsError(f"Model version {version} already exists")
+    staging = models_path / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    joblib.dump(model, staging / MODEL_FILE)
+    joblib.dump(feature_names, staging / FEATURE_NAMES_FILE)
+    if CompiledForest.supports(model):
+        forest = CompiledForest.from_sklearn(model)
+        if float32:
+            forest = forest.to_float32()
+        forest.save(
+            staging / NODES_FILE,
+            model_version=artifact_digest(staging / MODEL_FILE),
+            feature_names=list(feature_names)
+        )
+    for name, content in (extra_files or {}).items():
+        (staging / name).write_text(json.dumps(content, indent=2))
+    (staging / METADATA_FILE).write_text(json.dumps(dict(
+        metadata,
+        version=version,
+        trained_at=datetime.now(timezone.utc).isoformat()
+    ), indent=2))
+    staging.rename(target)
+    return target
+
+
+def compact(
+    model_dir: Path = MODELS_PATH,
+    tree_counts: Sequence[int] = (10, 25, 50),
+    max_depths: Sequence[int] = (8, 12),
+    min_leaf_sizes: Sequence[int] = (5, 20),
+    params: Optional[dict] = None,
+    save: Optional[str] = None,
+    version: Optional[str] = None
+) -> list:
+    """
+    Build, measure and optionally save compacted candidates.
+
+    Args:
+        model_dir (Path): Directory of the forest to compact
+        tree_counts, max_depths, min_leaf_sizes: Candidate grid
+        params (dict, optional): Hyperparameters overriding the forest's
+        save (str, optional): Candidate to save as ``version``
+        version (str, optional): Model version written under ``models/``
+
+    Returns:
+        list[dict]: One report row per candidate
+    """
+    model_dir = Path(model_dir)
+    fitted = joblib.load(model_dir / MODEL_FILE)
+    feature_names = joblib.load(model_dir / FEATURE_NAMES_FILE)
+    params = dict(fitted.get_params(), **(params or {}))
+    X_fit, X_val, X_test, y_fit, y_val, y_test = encoded_splits(feature_names)
+
+    candidates = build_candidates(params, X_fit, y_fit, X_val, y_val, tree_counts, max_depths, min_leaf_sizes)
+    if save is not None and save not in candidates:
+        raise ValueError(f"Unknown candidate '{save}', expected one of {list(candidates)}")
+
+    report = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, (model, float32, changes) in candidates.items():
+            row = {"candidate": name, "float32": float32, **measure_candidate(model, float32, X_test, y_test, Path(workdir))}
+            row["parameters"] = changes
+            report.append(row)
+    baseline = report[0]
+    for row in report:
+        row["auc_change"] = row["auc"] - baseline["auc"]
+        row["single_row_speedup"] = baseline["single_row_ms"] / row["single_row_ms"]
+        row["batch_speedup"] = baseline["batch_ms"] / row["batch_ms"]
+
+    print(f"{'candidate':<14}{'trees':>6}{'nodes':>9}{'model MB':>10}{'nodes MB':>10}{'memory MB':>11}"
+          f"{'1 row ms':>10}{'batch ms':>10}{'AUC':>8}{'ΔAUC':>9}")
+    for row in report:
+        print(f"{row['candidate']:<14}{row['trees']:>6}{row['nodes']:>9}{row['model_mb']:>10.2f}"
+              f"{row['nodes_mb']:>10.2f}{row['memory_mb']:>11.2f}{row['single_row_ms']:>10.3f}"
+              f"{row['batch_ms']:>10.2f}{row['auc']:>8.4f}{row['auc_change']:>+9.4f}")
+    print(f"batch = {baseline['batch_rows']} test rows; AUC on the test rows of data_loader.split_data")
+
+    if save is not None:
+        model, float32, changes = candidates[save]
+        row = next(r for r in report if r["candidate"] == save)
+        path = save_candidate(model, float32, feature_names, version or save, {
+            "performance_metrics": {"roc_auc": row["auc"]},
+            "compaction": {"candidate": save, "float32": float32, "parameters": changes}
+        }, models_path=model_dir)
+        print(f"Candidato {save} salvo em: {path}")
+    return report
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and compare compacted versions of the churn forest")
+    parser.add_argument("--model-dir", type=Path, default=MODELS_PATH)
+    parser.add_argument("--trees", type=_int_list, default=[10, 25, 50],
+                        help="Tree counts kept by validation contribution (comma separated)")
+    parser.add_argument("--max-depth", type=_int_list, default=[8, 12],
+                        help="max_depth values to refit with (comma separated)")
+    parser.add_argument("--min-samples-leaf", type=_int_list, default=[5, 20],
+                        help="min_samples_leaf values to refit with (comma separated)")
+    parser.add_argument("--save", help="Candidate to save as a new model version")
+    parser.add_argument("--version", help="Version name for --save (default: the candidate name)")
+    args = parser.parse_args()
+
+    compact(args.model_dir, args.trees, args.max_depth, args.min_samples_leaf,
+            save=args.save, version=args.version)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Indexed in-memory store of the customer base.
+
+The dataset is loaded once and indexed so that lookups and filters never
+scan its rows:
+
+    customer_id                              hash index, constant time
+    country, gender, active_member,
+    credit_card                              one bitmap per value
+    every other numeric column               sorted index, value ranges
+
+A compound query starts from its most selective range (or, without ranges,
+from the AND of the bitmaps) and checks the remaining conditions only on
+those candidate rows.
+"""
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .indexes import BitmapIndex, HashIndex, SortedIndex, bitmap_contains, bitmap_rows
+
+ID_COLUMN = "customer_id"
+BITMAP_COLUMNS = ("country", "gender", "active_member", "credit_card")
+
+
+class CustomerStore:
+    """
+    Customer records indexed by id, numeric range and category.
+
+    When an id appears more than once, its last row is kept.
+
+    Args:
+        frame (pd.DataFrame): Customer records, with a ``customer_id`` column
+        bitmap_columns (tuple): Low-cardinality columns indexed by bitmaps;
+            the other numeric columns get sorted indexes
+        exclude (tuple): Columns left out of the store (neither returned
+            nor filterable), e.g. the churn label
+    """
+
+    def __init__(self, frame: pd.DataFrame, bitmap_columns: tuple = BITMAP_COLUMNS, exclude: tuple = ()):
+        frame = frame.drop(columns=list(exclude), errors="ignore")
+        self.frame = frame.drop_duplicates(ID_COLUMN, keep="last").reset_index(drop=True)
+        self.ids = HashIndex(self.frame[ID_COLUMN].to_numpy(dtype=np.int64))
+        self.bitmaps = {column: BitmapIndex(self.frame[column].to_numpy()) for column in bitmap_columns}
+        self.sorted = {
+            column: SortedIndex(self.frame[column].to_numpy())
+            for column in self.frame.columns
+            if column != ID_COLUMN and column not in self.bitmaps
+            and pd.api.types.is_numeric_dtype(self.frame[column])
+        }
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "CustomerStore":
+        """Load a CSV or Parquet (``.parquet``/``.pq``) customer file."""
+        path = Path(path)
+        if path.suffix.lower() in (".parquet", ".pq"):
+            return cls(pd.read_parquet(path), **kwargs)
+        return cls(pd.read_csv(path), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __contains__(self, customer_id) -> bool:
+        return customer_id in self.ids
+
+    def row_of(self, customer_id: int) -> Optional[int]:
+        """Row number of a customer, or None for an unknown id."""
+        row = self.ids.find(customer_id)
+        return row if row >= 0 else None
+
+    def get(self, customer_id: int) -> Optional[dict]:
+        """Record of a customer, or None for an unknown id."""
+        row = self.row_of(customer_id)
+        return self.frame.iloc[[row]].to_dict("records")[0] if row is not None else None
+
+    def categories(self, column: str) -> list:
+        """Distinct values of a bitmap-indexed column."""
+        return self.bitmaps[column].categories
+
+    def bounds(self, column: str) -> tuple:
+        """Smallest and largest value of a range-indexed column."""
+        index = self.sorted[column]
+        return index.min, index.max
+
+    def query(self, **conditions) -> np.ndarray:
+        """
+        Rows matching every condition, ascending.
+
+        Each keyword is a column and its condition:
+
+            (low, high)        range, inclusive; None leaves a side open
+            [a, b, ...]        any of these values (bitmap columns)
+            value              this value
+
+        Example:
+            store.query(country=["France", "Spain"], active_member=0, credit_score=(600, None))
+
+        Raises:
+            ValueError: A column has no index
+        """
+        ranges, bitmaps = [], []
+        for column, condition in conditions.items():
+            if column in self.bitmaps:
+                values = condition if isinstance(condition, (list, set, frozenset)) else [condition]
+                bitmaps.append(self.bitmaps[column].bitmap(*values))
+            elif column in self.sorted:
+                low, high = condition if isinstance(condition, tuple) else (condition, condition)
+                ranges.append((column, low, high))
+            else:
+                raise ValueError(f"Column '{column}' is not indexed")
+
+        if not ranges:
+            if not bitmaps:
+                return np.arange(len(self))
+            combined = bitmaps[0].copy()
+            for bitmap in bitmaps[1:]:
+                combined &= bitmap
+            return bitmap_rows(combined, len(self))
+
+        # The narrowest range gives the candidates; the other conditions
+        # are checked on them only
+        ranges.sort(key=lambda item: self.sorted[item[0]].count(item[1], item[2]))
+        column, low, high = ranges[0]
+        rows = np.sort(self.sorted[column].range(low, high)).astype(np.int64)
+        for column, low, high in ranges[1:]:
+            values = self.frame[column].to_numpy()[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+            rows = rows[keep]
+        for bitmap in bitmaps:
+            rows = rows[bitmap_contains(bitmap, rows)]
+        return rows
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        """Records of ``rows``."""
+        return self.frame.iloc[rows]
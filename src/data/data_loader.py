@@ -1,7 +1,8 @@
 """
 Module for loading and validating the dataset.
 """
-from typing import Tuple
+from pathlib import Path
+from typing import Iterator, Tuple
 
 import pandas as pd
 from sklearn.model_selection import train_test_split
@@ -26,6 +27,31 @@ def load_data() -> pd.DataFrame:
     return pd.read_csv(DATA_PATH)
 
 
+def iter_data_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Read a dataset in chunks of at most ``chunk_size`` rows.
+    
+    CSV files are read with ``pd.read_csv(chunksize=...)``; Parquet files
+    (``.parquet``/``.pq``, requires pyarrow) are read batch by batch, so
+    only one chunk is held in memory at a time.
+    
+    Args:
+        path (Path): CSV or Parquet file
+        chunk_size (int): Maximum rows per chunk
+        
+    Yields:
+        pd.DataFrame: Consecutive chunks of the dataset
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
 def validate_data(df: pd.DataFrame) -> bool:
     """
     Validate the dataset structure and contents.
@@ -0,0 +1,195 @@
+"""
+In-memory indexes over NumPy columns.
+
+    HashIndex     unique integer keys -> row, open addressing (constant time)
+    SortedIndex   value ranges -> rows, binary search over a sorted copy
+    BitmapIndex   category -> packed bitmap of its rows
+
+Lookups return row numbers; bitmaps are ``np.packbits`` arrays, one bit per
+row, so they are combined with bitwise operators without touching the
+columns. Only NumPy and pandas are used, so the Streamlit app can import
+this module without the API.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Fibonacci hashing multiplier (2**64 / golden ratio)
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_EMPTY = -1
+
+
+def _slot_bits(n_rows: int) -> int:
+    # At most half full, so probe sequences stay short
+    return max(4, int(2 * max(n_rows, 1) - 1).bit_length())
+
+
+def _hash_slots(keys: np.ndarray, bits: int) -> np.ndarray:
+    # uint64 multiplication wraps around, as the hash needs
+    hashed = keys.astype(np.uint64) * np.uint64(_HASH_MULTIPLIER)
+    return (hashed >> np.uint64(64 - bits)).astype(np.int64)
+
+
+def build_hash_index(keys: np.ndarray) -> np.ndarray:
+    """
+    Open-addressing (linear probing) hash index of unique integer keys.
+
+    Keys are inserted in vectorized rounds: in each round every key not
+    yet placed claims its current slot, the lowest row wins each free
+    slot and the others move to the next one.
+
+    Args:
+        keys (np.ndarray): Unique keys, one per row
+
+    Returns:
+        np.ndarray: Slot array holding a row number or -1 (empty); its
+            length is a power of two
+    """
+    bits = _slot_bits(len(keys))
+    mask = (1 << bits) - 1
+    slots = np.full(1 << bits, _EMPTY, dtype=np.int64)
+    pending = np.arange(len(keys))
+    position = _hash_slots(keys, bits)
+    while len(pending):
+        free = slots[position] == _EMPTY
+        candidates, first = np.unique(position[free], return_index=True)
+        winners = pending[free][first]
+        slots[candidates] = winners
+        placed = np.zeros(len(pending), dtype=bool)
+        placed[np.flatnonzero(free)[first]] = True
+        pending, position = pending[~placed], (position[~placed] + 1) & mask
+    return slots
+
+
+class HashIndex:
+    """
+    Row of each key, in constant time.
+
+    Args:
+        keys (np.ndarray): Unique integer keys, one per row (callers drop
+            duplicates; only one row of a duplicated key would be found)
+        slots (np.ndarray, optional): Index built by ``build_hash_index``
+            for these keys (e.g. loaded from disk); built when omitted
+    """
+
+    def __init__(self, keys: np.ndarray, slots: Optional[np.ndarray] = None):
+        self.keys = keys
+        self.slots = build_hash_index(keys) if slots is None else slots
+        self._bits = len(self.slots).bit_length() - 1
+        self._mask = len(self.slots) - 1
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return self.find(key) != _EMPTY
+
+    def find(self, key: int) -> int:
+        """Row of ``key``, or -1 when it is not indexed."""
+        key = int(key)
+        slot = ((key * _HASH_MULTIPLIER) & _MASK64) >> (64 - self._bits)
+        while True:
+            row = int(self.slots[slot])
+            if row == _EMPTY or self.keys[row] == key:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def find_many(self, keys: Iterable[int]) -> np.ndarray:
+        """Rows of ``keys`` (-1 for missing ones), probing all keys at once."""
+        keys = np.asarray(keys, dtype=np.int64)
+        rows = np.full(len(keys), _EMPTY, dtype=np.int64)
+        pending = np.arange(len(keys))
+        position = _hash_slots(keys, self._bits)
+        while len(pending):
+            candidate = self.slots[position]
+            done = candidate == _EMPTY
+            found = ~done
+            found[found] = self.keys[candidate[found]] == keys[pending[found]]
+            rows[pending[found]] = candidate[found]
+            probing = ~(done | found)
+            pending, position = pending[probing], (position[probing] + 1) & self._mask
+        return rows
+
+
+class SortedIndex:
+    """
+    Rows of a numeric column by value range.
+
+    Args:
+        values (np.ndarray): One value per row
+    """
+
+    def __init__(self, values: np.ndarray):
+        order = np.argsort(values, kind="stable")
+        self.order = order.astype(np.int32) if len(values) < 2**31 else order
+        self.sorted_values = values[order]
+
+    @property
+    def min(self):
+        return self.sorted_values[0].item() if len(self.sorted_values) else None
+
+    @property
+    def max(self):
+        return self.sorted_values[-1].item() if len(self.sorted_values) else None
+
+    def _bounds(self, low, high) -> tuple[int, int]:
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, side="left")
+        stop = len(self.sorted_values) if high is None else np.searchsorted(self.sorted_values, high, side="right")
+        return int(start), int(max(start, stop))
+
+    def range(self, low=None, high=None) -> np.ndarray:
+        """Rows with ``low <= value <= high`` (None = unbounded), in value order."""
+        start, stop = self._bounds(low, high)
+        return self.order[start:stop]
+
+    def count(self, low=None, high=None) -> int:
+        """Number of rows ``range`` would return, without building them."""
+        start, stop = self._bounds(low, high)
+        return stop - start
+
+
+def bitmap_rows(bitmap: np.ndarray, n_rows: int) -> np.ndarray:
+    """Rows set in ``bitmap``, ascending."""
+    return np.flatnonzero(np.unpackbits(bitmap, count=n_rows))
+
+
+def bitmap_contains(bitmap: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Whether each of ``rows`` is set in ``bitmap``."""
+    rows = np.asarray(rows, dtype=np.int64)
+    return ((bitmap[rows >> 3] >> (7 - (rows & 7)).astype(np.uint8)) & 1).astype(bool)
+
+
+class BitmapIndex:
+    """
+    One packed bitmap per distinct value of a low-cardinality column.
+
+    Args:
+        values (np.ndarray): One value per row
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.n_rows = len(values)
+        # Hash-based, much faster than np.unique on strings
+        codes, categories = pd.factorize(values, sort=True)
+        self.bitmaps = {
+            category.item() if hasattr(category, "item") else category: np.packbits(codes == i)
+            for i, category in enumerate(categories)
+        }
+
+    @property
+    def categories(self) -> list:
+        return list(self.bitmaps)
+
+    def empty(self) -> np.ndarray:
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def bitmap(self, *categories) -> np.ndarray:
+        """Rows holding any of ``categories`` (unknown ones match nothing)."""
+        result = self.empty()
+        for category in categories:
+            bitmap = self.bitmaps.get(category)
+            if bitmap is not None:
+                result |= bitmap
+        return result
@@ -1,66 +1,588 @@
-from opentelemetry import metrics
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-from opentelemetry.exporter.cloud_monitoring import CloudMonitoringMetricsExporter
-from opentelemetry.sdk.resources import Resource
-import time
-
-def setup_monitoring(service_name):
-    """Configura o monitoramento básico para o serviço."""
-    
+import fcntl
+import json
+import logging
+import math
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from .utils.config import METRICS_EXPORTER
+
+logger = logging.getLogger(__name__)
+
+# Quantis reportados pelos histogramas (p50, p90, p99, p999)
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class Counter:
+    """Contador monotônico, seguro para várias threads."""
+
+    kind = "counter"
+
+    def __init__(self, name, description="", unit="1"):
+        self.name = name
+        self.description = description
+        self.unit = unit
+        self.value = 0
+        self._lock = threading.Lock()
+        self._mirrors = []
+
+    def add(self, amount=1, attributes=None):
+        if amount < 0:
+            raise ValueError(f"Counter {self.name} cannot decrease")
+        with self._lock:
+            self.value += amount
+        for mirror in self._mirrors:
+            mirror.add(amount, attributes)
+
+    def get_value(self):
+        return self.value
+
+    def blank(self):
+        """Instrumento igual, zerado e sem espelhos."""
+        return type(self)(self.name, self.description, self.unit)
+
+    def snapshot(self):
+        return {"value": self.value}
+
+    def merge(self, snapshot):
+        with self._lock:
+            self.value += snapshot["value"]
+
+
+class UpDownCounter(Counter):
+    """Contador que pode diminuir (por exemplo, profundidade de fila)."""
+
+    kind = "gauge"
+
+    def add(self, amount=1, attributes=None):
+        with self._lock:
+            self.value += amount
+        for mirror in self._mirrors:
+            mirror.add(amount, attributes)
+
+
+class Histogram:
+    """
+    Histograma com buckets logarítmicos e erro relativo limitado.
+
+    Cada valor positivo cai no bucket ``ceil(log(v) / log(gamma))``, com
+    ``gamma = (1 + accuracy) / (1 - accuracy)``, então qualquer quantil é
+    estimado com erro relativo de no máximo ``accuracy``. Valores até
+    ``min_value`` (inclusive zero) ficam em um bucket próprio. Como os
+    buckets não dependem dos dados, histogramas de workers diferentes podem
+    ser somados com ``merge``.
+    """
+
+    kind = "summary"
+
+    def __init__(self, name, description="", unit="1", accuracy=0.01, min_value=1e-9):
+        self.name = name
+        self.description = description
+        self.unit = unit
+        self.accuracy = accuracy
+        self.min_value = min_value
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._lock = threading.Lock()
+        self._mirrors = []
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value, attributes=None):
+        value = float(value)
+        index = math.ceil(math.log(value) / self._log_gamma) if value > self.min_value else None
+        with self._lock:
+            if index is None:
+                self.zero_count += 1
+            else:
+                self.buckets[index] = self.buckets.get(index, 0) + 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+        for mirror in self._mirrors:
+            mirror.record(value, attributes)
+
+    def record_many(self, values, attributes=None):
+        """Registra um array de valores de uma vez (por exemplo, as probabilidades de um lote)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        positive = values[values > self.min_value]
+        indices, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        with self._lock:
+            for index, count in zip(indices.tolist(), counts.tolist()):
+                self.buckets[index] = self.buckets.get(index, 0) + count
+            self.zero_count += values.size - positive.size
+            self.count += values.size
+            self.sum += float(values.sum())
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+        for mirror in self._mirrors:
+            for value in values.tolist():
+                mirror.record(value, attributes)
+
+    def quantile(self, q):
+        """Valor estimado do quantil ``q`` (entre 0 e 1), ou None se vazio."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = q * (self.count - 1)
+            seen = self.zero_count
+            if rank < seen:
+                return max(self.min, 0.0)
+            for index in sorted(self.buckets):
+                seen += self.buckets[index]
+                if rank < seen:
+                    estimate = 2 * self._gamma ** index / (self._gamma + 1)
+                    return min(max(estimate, self.min), self.max)
+            return self.max
+
+    def get_average(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def summary(self):
+        result = {"count": self.count, "sum": self.sum, "average": self.get_average()}
+        for q in QUANTILES:
+            result[_quantile_key(q)] = self.quantile(q)
+        return result
+
+    def blank(self):
+        """Histograma igual, vazio e sem espelhos."""
+        return Histogram(self.name, self.description, self.unit, self.accuracy, self.min_value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "accuracy": self.accuracy,
+                "buckets": dict(self.buckets),
+                "zero_count": self.zero_count,
+                "count": self.count,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max
+            }
+
+    def merge(self, snapshot):
+        """Soma o ``snapshot()`` de outro histograma (por exemplo, de outro worker)."""
+        if snapshot["accuracy"] != self.accuracy:
+            raise ValueError("Cannot merge histograms with different accuracy")
+        with self._lock:
+            for index, count in snapshot["buckets"].items():
+                index = int(index)
+                self.buckets[index] = self.buckets.get(index, 0) + count
+            self.zero_count += snapshot["zero_count"]
+            self.count += snapshot["count"]
+            self.sum += snapshot["sum"]
+            self.min = min(self.min, snapshot["min"])
+            self.max = max(self.max, snapshot["max"])
+
+
+def _quantile_key(q):
+    return "p" + f"{q * 100:g}".replace(".", "")
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Registro local das métricas do processo.
+
+    Os instrumentos são atualizados em memória, sem rede; sinks opcionais
+    (como o Google Cloud Monitoring) recebem uma cópia de cada medição.
+
+    Args:
+        prefix (str): Prefixo dos nomes no formato Prometheus
+    """
+
+    def __init__(self, prefix="churn_prediction_"):
+        self.prefix = prefix
+        self._instruments = {}
+        self._sinks = []
+
+    def add_sink(self, sink):
+        """
+        Espelha as medições em um sink, que deve expor
+        ``create(kind, name, description, unit)`` e devolver um objeto com
+        ``add``/``record``. Vale também para instrumentos já criados.
+        """
+        self._sinks.append(sink)
+        for instrument in self._instruments.values():
+            instrument._mirrors.append(sink.create(instrument.kind, instrument.name, instrument.description, instrument.unit))
+
+    def _register(self, key, instrument):
+        for sink in self._sinks:
+            instrument._mirrors.append(sink.create(instrument.kind, instrument.name, instrument.description, instrument.unit))
+        self._instruments[key] = instrument
+        return instrument
+
+    def counter(self, key, name, description="", unit="1"):
+        return self._register(key, Counter(name, description, unit))
+
+    def up_down_counter(self, key, name, description="", unit="1"):
+        return self._register(key, UpDownCounter(name, description, unit))
+
+    def histogram(self, key, name, description="", unit="1"):
+        return self._register(key, Histogram(name, description, unit))
+
+    def __getitem__(self, key):
+        return self._instruments[key]
+
+    def __contains__(self, key):
+        return key in self._instruments
+
+    def keys(self):
+        return self._instruments.keys()
+
+    def empty_copy(self):
+        """Registro com os mesmos instrumentos, zerados e sem sinks."""
+        copy = MetricsRegistry(self.prefix)
+        for key, instrument in self._instruments.items():
+            copy._instruments[key] = instrument.blank()
+        return copy
+
+    def snapshot(self):
+        """Estado de todos os instrumentos, para somar com ``merge`` em outro processo."""
+        return {key: instrument.snapshot() for key, instrument in self._instruments.items()}
+
+    def merge(self, snapshot):
+        for key, values in snapshot.items():
+            if key in self._instruments:
+                self._instruments[key].merge(values)
+
+    def prometheus_text(self):
+        """Todas as métricas no formato de exposição de texto do Prometheus."""
+        lines = []
+        for instrument in self._instruments.values():
+            name = self.prefix + instrument.name
+            if instrument.unit not in ("1", "") and not name.endswith("_" + instrument.unit):
+                name += "_" + instrument.unit
+            lines.append(f"# HELP {name} {_escape(instrument.description)}")
+            lines.append(f"# TYPE {name} {instrument.kind}")
+            if instrument.kind == "summary":
+                for q in QUANTILES:
+                    value = instrument.quantile(q)
+                    lines.append(f'{name}{{quantile="{q}"}} {"NaN" if value is None else repr(float(value))}')
+                lines.append(f"{name}_sum {repr(float(instrument.sum))}")
+                lines.append(f"{name}_count {instrument.count}")
+            else:
+                lines.append(f"{name} {instrument.value}")
+        return "\n".join(lines) + "\n"
+
+
+# Contadores e histogramas somados dos workers que já terminaram
+RETIRED_FILE = "retired.json"
+RETIRED_LOCK = ".retired.lock"
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SnapshotWriter:
+    """
+    Compartilha as métricas entre os workers de um servidor multiprocesso.
+
+    Cada worker grava periodicamente o ``snapshot()`` do seu registro em
+    ``<directory>/<pid>-<id>.json``, e ``aggregate()`` soma o registro local
+    com os arquivos dos outros workers. Quando um worker termina, seus
+    contadores e histogramas são somados a um único ``retired.json`` e o
+    arquivo dele é apagado (o total nunca diminui, como o Prometheus espera,
+    e o diretório não cresce com a reciclagem de workers); os gauges dele
+    são descartados.
+
+    Args:
+        registry (MetricsRegistry): Métricas deste processo
+        directory (str | Path): Diretório compartilhado pelos workers
+        interval_seconds (float): Intervalo entre gravações
+    """
+
+    def __init__(self, registry, directory, interval_seconds=5.0):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval_seconds = interval_seconds
+        self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        """Grava o snapshot atual de uma vez (os leitores nunca veem um arquivo parcial)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = self.path.with_suffix(".tmp")
+        staging.write_text(json.dumps(self.registry.snapshot()))
+        os.replace(staging, self.path)
+
+    def start(self):
+        def run():
+            while not self._stop.wait(self.interval_seconds):
+                try:
+                    self.write()
+                except OSError as e:
+                    logger.warning(f"Erro ao gravar o snapshot de métricas: {str(e)}")
+
+        self.write()
+        self._thread = threading.Thread(target=run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Para a gravação periódica e aposenta as métricas deste processo."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.write()
+            self._retire(self.path)
+        except OSError as e:
+            logger.warning(f"Erro ao aposentar o snapshot de métricas: {str(e)}")
+
+    def _retire(self, path):
+        """Soma contadores e histogramas de ``path`` em ``retired.json`` e apaga o arquivo."""
+        # Vários workers podem encontrar o mesmo arquivo ao mesmo tempo
+        with self._locked(fcntl.LOCK_EX):
+            try:
+                snapshot = json.loads(path.read_text())
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError):
+                snapshot = {}
+            retired = self.registry.empty_copy()
+            retired.merge(self._read(self.directory / RETIRED_FILE))
+            retired.merge(self._without_gauges(snapshot))
+            staging = self.directory / (RETIRED_FILE + ".tmp")
+            staging.write_text(json.dumps(self._without_gauges(retired.snapshot())))
+            os.replace(staging, self.directory / RETIRED_FILE)
+            path.unlink()
+
+    @contextmanager
+    def _locked(self, operation):
+        """Trava ``retired.json`` entre processos (exclusiva para aposentar, compartilhada para ler)."""
+        with open(self.directory / RETIRED_LOCK, "w") as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def _without_gauges(self, snapshot):
+        return {
+            key: values for key, values in snapshot.items()
+            if key in self.registry and self.registry[key].kind != "gauge"
+        }
+
+    @staticmethod
+    def _read(path):
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def aggregate(self):
+        """
+        Soma das métricas de todos os workers.
+
+        Returns:
+            MetricsRegistry: Cópia do registro local somada aos snapshots
+            dos outros workers
+        """
+        merged = self.registry.empty_copy()
+        merged.merge(self.registry.snapshot())
+        # Arquivos de workers que terminaram sem aposentar as próprias métricas
+        dead = set()
+        for path in self.directory.glob("*-*.json"):
+            if path == self.path:
+                continue
+            try:
+                pid = int(path.name.split("-")[0])
+            except ValueError:
+                continue
+            if not _process_alive(pid):
+                dead.add(path)
+                try:
+                    self._retire(path)
+                except OSError as e:
+                    logger.warning(f"Erro ao aposentar o snapshot de métricas {path.name}: {str(e)}")
+        # Sem aposentadorias durante a leitura: um worker nunca é contado
+        # duas vezes nem deixa de ser contado
+        with self._locked(fcntl.LOCK_SH):
+            merged.merge(self._read(self.directory / RETIRED_FILE))
+            for path in self.directory.glob("*-*.json"):
+                if path in dead:
+                    merged.merge(self._without_gauges(self._read(path)))
+                elif path != self.path:
+                    merged.merge(self._read(path))
+        return merged
+
+
+class OpenTelemetrySink:
+    """Sink que repassa as medições para instrumentos do OpenTelemetry."""
+
+    def __init__(self, meter):
+        self.meter = meter
+
+    def create(self, kind, name, description, unit):
+        if kind == "counter":
+            return self.meter.create_counter(name=name, description=description, unit=unit)
+        if kind == "gauge":
+            return self.meter.create_up_down_counter(name=name, description=description, unit=unit)
+        return self.meter.create_histogram(name=name, description=description, unit=unit)
+
+
+def cloud_monitoring_sink(service_name):
+    """Sink que exporta para o Google Cloud Monitoring a cada 60 segundos."""
+    from opentelemetry import metrics
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.exporter.cloud_monitoring import CloudMonitoringMetricsExporter
+    from opentelemetry.sdk.resources import Resource
+
     # Criar o exportador para o Google Cloud Monitoring
     exporter = CloudMonitoringMetricsExporter(
         project_id="bankchurnpredict",
         prefix="churn_prediction_"
     )
-    
+
     # Configurar o leitor de métricas
     reader = PeriodicExportingMetricReader(
         exporter,
         export_interval_millis=60000  # Exportar métricas a cada 60 segundos
     )
-    
+
     # Configurar o provedor de métricas com recurso personalizado
     resource = Resource.create({
         "service.name": service_name,
         "service.namespace": "churn_prediction",
         "service.instance.id": "instance-001"
     })
-    
+
     provider = MeterProvider(metric_readers=[reader], resource=resource)
     metrics.set_meter_provider(provider)
-    
-    # Criar medidor para métricas personalizadas
-    meter = metrics.get_meter(__name__)
-    
+    return OpenTelemetrySink(metrics.get_meter(__name__))
+
+
+def setup_monitoring(service_name, exporter=METRICS_EXPORTER):
+    """
+    Configura o monitoramento básico para o serviço.
+
+    As métricas ficam sempre disponíveis localmente; com ``exporter="cloud"``
+    também são exportadas para o Google Cloud Monitoring. Se o exportador
+    não puder ser criado (sem rede ou credenciais), o serviço segue apenas
+    com as métricas locais.
+    """
+    registry = MetricsRegistry()
+    if exporter == "cloud":
+        try:
+            registry.add_sink(cloud_monitoring_sink(service_name))
+        except Exception as e:
+            logger.warning(f"Exportação para o Cloud Monitoring desativada: {str(e)}")
+    elif exporter not in ("none", ""):
+        logger.warning(f"Exportador de métricas desconhecido '{exporter}', usando apenas métricas locais")
+
     # Criar contadores e medidores
-    request_counter = meter.create_counter(
+    registry.counter(
+        "request_counter",
         name="requests_total",
         description="Número total de requisições",
         unit="1"
     )
-    
-    latency_histogram = meter.create_histogram(
+
+    registry.histogram(
+        "latency_histogram",
         name="request_latency",
         description="Latência das requisições",
         unit="ms"
     )
-    
-    prediction_histogram = meter.create_histogram(
+
+    registry.histogram(
+        "prediction_histogram",
         name="churn_probability",
         description="Distribuição das probabilidades de churn",
         unit="1"
     )
-    
-    error_counter = meter.create_counter(
+
+    registry.histogram(
+        "batch_size_histogram",
+        name="micro_batch_size",
+        description="Número de predições por micro-lote",
+        unit="1"
+    )
+
+    registry.histogram(
+        "queue_wait_histogram",
+        name="micro_batch_queue_wait",
+        description="Tempo de espera na fila do micro-lote",
+        unit="ms"
+    )
+
+    registry.up_down_counter(
+        "inference_queue_depth",
+        name="inference_queue_depth",
+        description="Predições aguardando uma thread de inferência",
+        unit="1"
+    )
+
+    registry.histogram(
+        "inference_queue_wait",
+        name="inference_queue_wait",
+        description="Tempo de espera por uma thread de inferência",
+        unit="ms"
+    )
+
+    registry.counter(
+        "coalesced_counter",
+        name="predictions_coalesced_total",
+        description="Predições que aproveitaram uma inferência idêntica em andamento",
+        unit="1"
+    )
+
+    registry.up_down_counter(
+        "admission_in_flight",
+        name="admission_in_flight",
+        description="Requisições em execução nas rotas com controle de admissão",
+        unit="1"
+    )
+
+    registry.up_down_counter(
+        "admission_queue_depth",
+        name="admission_queue_depth",
+        description="Requisições aguardando uma vaga nas rotas com controle de admissão",
+        unit="1"
+    )
+
+    registry.histogram(
+        "admission_queue_wait",
+        name="admission_queue_wait",
+        description="Tempo de espera por uma vaga",
+        unit="ms"
+    )
+
+    registry.counter(
+        "admission_rejected",
+        name="requests_shed_total",
+        description="Requisições rejeitadas com 503 por sobrecarga",
+        unit="1"
+    )
+
+    registry.counter(
+        "error_counter",
         name="errors_total",
         description="Número total de erros",
         unit="1"
     )
-    
-    return {
-        "request_counter": request_counter,
-        "latency_histogram": latency_histogram,
-        "prediction_histogram": prediction_histogram,
-        "error_counter": error_counter
-    } 
\ No newline at end of file
+
+    return registry
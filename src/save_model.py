@@ -1,10 +1,17 @@
+import argparse
+import json
+import shutil
 import pandas as pd
 import numpy as np
+from datetime import datetime, timezone
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
 import joblib
 from pathlib import Path
 
+from src.api.services.forest import CompiledForest, artifact_digest
+
 def load_and_prepare_data():
     # Carrega os dados
     df = pd.read_csv("Bank Customer Churn Prediction.csv")
@@ -40,29 +47,87 @@ def train_model(X, y):
     rf_model.fit(X_train, y_train)
     return rf_model
 
-def save_model(model, feature_names):
-    # Criar diretório models se não existir
-    Path("models").mkdir(exist_ok=True)
+def evaluate_model(model, X, y):
+    # Avalia no mesmo conjunto de teste separado em train_model
+    _, X_test, _, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+    proba = model.predict_proba(X_test)[:, 1]
+    pred = (proba >= 0.5).astype(int)
+    return {
+        "accuracy": float(accuracy_score(y_test, pred)),
+        "precision": float(precision_score(y_test, pred)),
+        "recall": float(recall_score(y_test, pred)),
+        "roc_auc": float(roc_auc_score(y_test, proba))
+    }
+
+def save_model(model, feature_names, version=None, performance_metrics=None):
+    # Sem versão, os artefatos ficam direto em models/ (versão "default" da API).
+    # Com versão, são escritos em um diretório temporário e renomeados para
+    # models/<versão> de uma vez, para que a API nunca veja uma versão incompleta
+    models_dir = Path("models")
+    models_dir.mkdir(exist_ok=True)
+    target_dir = models_dir if version is None else models_dir / f".{version}.tmp"
+    if version is not None:
+        if (models_dir / version).exists():
+            raise FileExistsError(f"Model version {version} already exists")
+        shutil.rmtree(target_dir, ignore_errors=True)
+        target_dir.mkdir()
     
     # Salvar o modelo
-    model_path = "models/random_forest_model.joblib"
+    model_path = target_dir / "random_forest_model.joblib"
     joblib.dump(model, model_path)
     
     # Salvar os nomes das features
-    feature_names_path = "models/feature_names.joblib"
+    feature_names_path = target_dir / "feature_names.joblib"
     joblib.dump(feature_names, feature_names_path)
     
+    # Salvar os nós das árvores em arrays planos, sem compressão, para que os
+    # workers da API possam mapeá-los em memória e compartilhar uma única cópia
+    nodes_path = target_dir / "random_forest_nodes.joblib"
+    CompiledForest.from_sklearn(model).save(
+        nodes_path,
+        model_version=artifact_digest(model_path),
+        feature_names=list(feature_names)
+    )
+    
+    # Metadados exibidos em /model/info
+    metadata_path = target_dir / "metadata.json"
+    metadata_path.write_text(json.dumps({
+        "version": version or "default",
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "performance_metrics": performance_metrics or {}
+    }, indent=2))
+    
+    if version is not None:
+        target_dir.rename(models_dir / version)
+        model_path = models_dir / version / model_path.name
+        feature_names_path = models_dir / version / feature_names_path.name
+        nodes_path = models_dir / version / nodes_path.name
+    
     print(f"Modelo salvo em: {model_path}")
     print(f"Nomes das features salvos em: {feature_names_path}")
+    print(f"Nós das árvores salvos em: {nodes_path}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina e salva o modelo de churn")
+    parser.add_argument(
+        "--version",
+        help="Salva em models/<versão> para ser ativado pela API sem reiniciar"
+    )
+    args = parser.parse_args()
+    
     print("Carregando e preparando os dados...")
     X, y = load_and_prepare_data()
     
     print("Treinando o modelo Random Forest...")
     model = train_model(X, y)
     
+    print("Avaliando o modelo...")
+    performance_metrics = evaluate_model(model, X, y)
+    print(performance_metrics)
+    
     print("Salvando o modelo e os nomes das features...")
-    save_model(model, list(X.columns))
+    save_model(model, list(X.columns), args.version, performance_metrics)
     
     print("Processo concluído com sucesso!") 
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Precompute the churn scores of every known customer for a model version.
+
+The API builds the table of each version itself when the version is
+activated; running this job beforehand (e.g. right after a new version is
+copied to ``models/``) means the API only has to load it.
+
+Usage:
+    python -m src.score_customers
+    python -m src.score_customers --version tuned-20260101T000000Z --data customers.parquet
+"""
+import argparse
+import time
+from pathlib import Path
+
+from .api.services.prediction import ChurnPredictor
+from .api.services.registry import ModelRegistry
+from .api.services.score_table import ScoreTableService
+from .utils.config import CUSTOMER_SCORES_PATH, DATA_PATH, MODELS_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the churn scores of every known customer")
+    parser.add_argument("--model-dir", type=Path, default=MODELS_PATH)
+    parser.add_argument("--version", help="Model version to score with (default: the latest)")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="CSV or Parquet customer base")
+    parser.add_argument("--output", type=Path, default=CUSTOMER_SCORES_PATH, help="Score table directory")
+    args = parser.parse_args()
+
+    target = ModelRegistry(args.model_dir).resolve(args.version)
+    predictor = ChurnPredictor(model_dir=target["path"])
+    service = ScoreTableService(args.output, args.data)
+
+    start = time.perf_counter()
+    table = service.refresh(predictor)
+    print(
+        f"{len(table)} customers scored by {target['version']} ({table.model_version}) "
+        f"in {time.perf_counter() - start:.2f} s -> {service.path_for(table.model_version, table.data_version)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Production server for the API.
+
+Runs the API under gunicorn with one uvicorn worker process per CPU. The
+app is imported and the active model loaded and warmed up once in the
+master process, before the workers are forked, so every worker starts
+with the model already in memory and shares its pages copy-on-write
+instead of loading its own copy. Workers are recycled after
+``API_MAX_REQUESTS`` requests (each finishes its in-flight requests first)
+and every worker logs its memory usage once it has booted.
+
+Usage:
+    python -m src.serve
+    API_WORKERS=4 API_CPU_PINNING=true python -m src.serve --port 8001
+"""
+import argparse
+import gc
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+from typing import Iterable, Optional
+
+from gunicorn.app.base import BaseApplication
+
+from src.api.services.forest import set_inference_threads
+from src.utils.config import (
+    API_BACKLOG,
+    API_CPU_PINNING,
+    API_GRACEFUL_TIMEOUT,
+    API_HOST,
+    API_KEEPALIVE_SECONDS,
+    API_MAX_REQUESTS,
+    API_MAX_REQUESTS_JITTER,
+    API_PORT,
+    API_WORKER_TIMEOUT,
+    API_WORKERS,
+    AVAILABLE_CPUS
+)
+
+logger = logging.getLogger(__name__)
+
+# Worker class provided by the uvicorn-worker package, or by uvicorn itself
+# in the versions that still ship it
+WORKER_CLASS = (
+    "uvicorn_worker.UvicornWorker" if importlib.util.find_spec("uvicorn_worker")
+    else "uvicorn.workers.UvicornWorker"
+)
+
+
+def available_cpus() -> list:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def assign_cpu(cpus: list, taken: Iterable[int]) -> int:
+    """
+    CPU for a new worker: the one running the fewest workers.
+
+    Args:
+        cpus (list): CPUs available to the server
+        taken (Iterable[int]): CPU of each live worker
+
+    Returns:
+        int: The least used CPU (the lowest on ties)
+    """
+    load = {cpu: 0 for cpu in cpus}
+    for cpu in taken:
+        if cpu in load:
+            load[cpu] += 1
+    return min(cpus, key=lambda cpu: (load[cpu], cpu))
+
+
+def process_memory(pid="self") -> dict:
+    """
+    Memory of a process from ``/proc/<pid>/smaps_rollup``, in kB.
+
+    ``pss`` splits shared pages between the processes mapping them and
+    ``uss`` counts the pages only this process holds, so with preloading
+    ``uss`` is what each extra worker really costs.
+
+    Returns:
+        dict: rss, pss, uss and shared, or {} where /proc is not available
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                parts = rest.split()
+                if parts and parts[-1] == "kB":
+                    fields[key] = int(parts[0])
+    except OSError:
+        return {}
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    }
+
+
+def format_memory(usage: dict) -> str:
+    if not usage:
+        return "memória indisponível"
+    return ", ".join(f"{key.upper()} {value / 1024:.1f} MiB" for key, value in usage.items())
+
+
+def when_ready(server):
+    from src.api.main import registry
+
+    status = registry.status()
+    logger.info(
+        f"Master {os.getpid()} pronto com o modelo {status['model_version']} "
+        f"({status['engine']}): {format_memory(process_memory())}; "
+        f"iniciando {server.num_workers} workers"
+    )
+
+
+def pre_fork(server, worker):
+    # Runs in the master, which knows the CPUs of the live workers
+    worker.cpu = None
+    if server.app.cpu_pinning:
+        taken = [getattr(w, "cpu", None) for w in server.WORKERS.values()]
+        worker.cpu = assign_cpu(available_cpus(), taken)
+
+
+def post_fork(server, worker):
+    cpus = available_cpus()
+    if worker.cpu is not None:
+        os.sched_setaffinity(0, {worker.cpu})
+        threads = 1
+    else:
+        # Batch traversal threads split the CPUs between the workers
+        threads = max(1, min(len(cpus), AVAILABLE_CPUS) // server.num_workers)
+    set_inference_threads(threads)
+
+
+def post_worker_init(worker):
+    cpu = f"CPU {worker.cpu}" if worker.cpu is not None else "sem CPU fixa"
+    logger.info(f"Worker {worker.pid} iniciado ({cpu}): {format_memory(process_memory())}")
+
+
+def worker_exit(server, worker):
+    logger.info(f"Worker {worker.pid} encerrado")
+
+
+def on_exit(server):
+    if server.app.metrics_dir is not None:
+        shutil.rmtree(server.app.metrics_dir, ignore_errors=True)
+
+
+class ChurnAPIServer(BaseApplication):
+    """
+    gunicorn application serving ``src.api.main:app``.
+
+    Args:
+        options (dict): gunicorn settings, see ``server_options``
+        preload_model (bool): Load and warm up the model in the master
+        cpu_pinning (bool): Pin each worker to the least used CPU
+    """
+
+    def __init__(self, options: dict, preload_model: bool = True, cpu_pinning: bool = False):
+        self.options = options
+        self.preload_model = preload_model
+        self.cpu_pinning = cpu_pinning
+        # Temporary metrics directory created by load(), removed on exit
+        self.metrics_dir = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from src.api import main
+        from src.api.main import app, registry
+
+        # Workers write their metrics here, so whichever answers
+        # /metrics/prometheus reports the totals of all of them
+        if main.metrics_dir is None:
+            self.metrics_dir = main.metrics_dir = tempfile.mkdtemp(prefix="churn-metrics-")
+
+        # The master must not start numba's threading layer before forking
+        # (GNU OpenMP breaks in the children, TBB hangs): it loads and warms
+        # up the model serially, and post_fork sets each worker's threads
+        set_inference_threads(1)
+        if self.preload_model:
+            try:
+                # Listeners (e.g. the customer score table) run in the workers
+                registry.load(notify=False)
+            except Exception as e:
+                # Workers retry on startup, as with a single process
+                logger.error(f"Erro ao pré-carregar o modelo: {str(e)}")
+        # Move everything allocated so far out of the collector's reach:
+        # collections in the workers would otherwise touch (and copy) the
+        # shared pages
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+def server_options(
+    host: str = API_HOST,
+    port: int = API_PORT,
+    workers: int = API_WORKERS,
+    max_requests: int = API_MAX_REQUESTS,
+    max_requests_jitter: int = API_MAX_REQUESTS_JITTER
+) -> dict:
+    """
+    gunicorn settings for the API, from ``config`` unless overridden.
+
+    Returns:
+        dict: Settings for ``ChurnAPIServer``
+    """
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": WORKER_CLASS,
+        # The app (and model) are loaded once, before forking
+        "preload_app": True,
+        "backlog": API_BACKLOG,
+        "keepalive": API_KEEPALIVE_SECONDS,
+        "max_requests": max_requests,
+        "max_requests_jitter": max_requests_jitter if max_requests else 0,
+        "graceful_timeout": API_GRACEFUL_TIMEOUT,
+        "timeout": API_WORKER_TIMEOUT,
+        "when_ready": when_ready,
+        "pre_fork": pre_fork,
+        "post_fork": post_fork,
+        "post_worker_init": post_worker_init,
+        "worker_exit": worker_exit,
+        "on_exit": on_exit
+    }
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Run the churn prediction API with several worker processes")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS)
+    parser.add_argument("--cpu-pinning", action=argparse.BooleanOptionalAction, default=API_CPU_PINNING,
+                        help="Pin each worker to one CPU (Linux only)")
+    parser.add_argument("--max-requests", type=int, default=API_MAX_REQUESTS,
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Let each worker load the model itself")
+    args = parser.parse_args(argv)
+
+    if args.cpu_pinning and not hasattr(os, "sched_setaffinity"):
+        parser.error("--cpu-pinning requires Linux")
+    options = server_options(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests
+    )
+    ChurnAPIServer(options, preload_model=not args.no_preload, cpu_pinning=args.cpu_pinning).run()
+
+
+if __name__ == "__main__":
+    main()
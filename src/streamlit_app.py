@@ -1,27 +1,35 @@
 import streamlit as st
 import requests
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import logging
 import time
 from datetime import datetime
 
-# Configurar logging com mais detalhes
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+from data.customer_store import CustomerStore
+from utils.api_client import APIClient
+from utils.structured_logging import StructuredLogger, configure_async_logging
+
+# Configurar logging: uma thread em segundo plano grava em logs/predictions.log
+# (linhas JSON), sem bloquear a interface. Só é configurado na primeira execução
+# do script; as seguintes (a cada interação) reutilizam o mesmo escritor
+configure_async_logging(
+    logging.INFO,
     handlers=[
         logging.FileHandler('logs/predictions.log'),
         logging.StreamHandler()
     ]
 )
-logger = logging.getLogger(__name__)
+# Cada predição aqui é uma ação do usuário, então nenhum evento é amostrado
+logger = StructuredLogger(__name__, sample_rates={})
 
-# URLs da API (produção e local)
-API_URLS = {
-    'local': 'http://localhost:8000',
-    'prod': 'http://34.69.103.18'
-}
+# Cliente da API compartilhado por todas as sessões: conexões keep-alive,
+# endpoints (API_CLIENT_URLS) em ordem de preferência, e os que falharam
+# ficam de fora por um tempo em vez de serem testados a cada clique
+@st.cache_resource
+def get_api_client():
+    return APIClient()
 
 # Função para fazer predição
 def make_prediction(customer_data):
@@ -29,49 +37,95 @@ def make_prediction(customer_data):
         start_time = time.time()
         request_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        logger.info(f"Request {request_id} - Starting prediction for customer data: {customer_data}")
+        logger.info("prediction_started", {"request_id": request_id, "customer": customer_data})
         
-        # Tentar primeiro a API local
-        try:
-            response = requests.post(f"{API_URLS['local']}/predict", json=customer_data, timeout=5)
-            api_used = 'local'
-        except requests.exceptions.ConnectionError:
-            logger.warning(f"Request {request_id} - Local API não disponível, tentando API em produção")
-            response = requests.post(f"{API_URLS['prod']}/predict", json=customer_data, timeout=5)
-            api_used = 'prod'
+        # Primeiro endpoint disponível, reaproveitando a conexão
+        api_used, response = get_api_client().predict(customer_data)
         
         response_time = time.time() - start_time
         
         if response.status_code == 200:
             result = response.json()
-            logger.info(
-                f"Request {request_id} - Prediction successful using {api_used} API: {result} - "
-                f"Response time: {response_time:.2f}s - "
-                f"Customer risk level: {'High' if result['churn_probability'] > 0.7 else 'Medium' if result['churn_probability'] > 0.3 else 'Low'}"
-            )
+            logger.info("prediction_succeeded", lambda: {
+                "request_id": request_id,
+                "api": api_used,
+                "result": result,
+                "response_time_s": response_time,
+                "risk_level": 'High' if result['churn_probability'] > 0.7 else 'Medium' if result['churn_probability'] > 0.3 else 'Low'
+            })
             return result
         else:
-            logger.error(
-                f"Request {request_id} - API Error ({api_used}): Status {response.status_code}, "
-                f"Response: {response.text} - Response time: {response_time:.2f}s"
-            )
+            logger.error("prediction_failed", lambda: {
+                "request_id": request_id,
+                "api": api_used,
+                "status_code": response.status_code,
+                "response": response.text,
+                "response_time_s": response_time
+            })
             st.error(f"Error making prediction. Status code: {response.status_code}")
             return None
     except requests.exceptions.ConnectionError:
-        logger.error(
-            f"Request {request_id} - Connection error with both APIs - "
-            f"Time elapsed: {time.time() - start_time:.2f}s"
-        )
-        st.error("Connection error with API. Please check if the local API is running.")
+        logger.error("connection_failed", {
+            "request_id": request_id,
+            "elapsed_s": time.time() - start_time
+        })
+        st.error(f"Connection error with API. Please check if one of {get_api_client().urls} is running.")
         return None
     except Exception as e:
-        logger.error(
-            f"Request {request_id} - Unexpected error: {str(e)} - "
-            f"Time elapsed: {time.time() - start_time:.2f}s"
-        )
+        logger.error("prediction_error", {
+            "request_id": request_id,
+            "error": str(e),
+            "elapsed_s": time.time() - start_time
+        })
         st.error(f"Unexpected error making prediction: {str(e)}")
         return None
 
+# Score pré-calculado de um cliente existente (sem inferência na API); None
+# quando a tabela de scores não está disponível ou o cliente não está nela
+def get_customer_score(customer_id):
+    start_time = time.time()
+    try:
+        api_used, response = get_api_client().request("GET", f"/customers/{int(customer_id)}/score")
+    except requests.exceptions.ConnectionError:
+        return None
+    if response.status_code == 200:
+        result = response.json()
+        logger.info("score_lookup_succeeded", lambda: {
+            "api": api_used,
+            "result": result,
+            "response_time_s": time.time() - start_time
+        })
+        return result
+    logger.warning("score_lookup_failed", {
+        "api": api_used,
+        "customer_id": int(customer_id),
+        "status_code": response.status_code
+    })
+    return None
+
+# Scores de vários clientes em chamadas /predict/batch simultâneas, em vez de
+# uma predição por linha; devolve os dados com as colunas de score
+def score_customers(customers):
+    start_time = time.time()
+    records = customers.drop(columns=['customer_id', 'churn'], errors='ignore').to_dict('records')
+    try:
+        predictions = get_api_client().predict_many(records)
+    except requests.exceptions.RequestException as e:
+        logger.error("batch_scoring_failed", {"customers": len(records), "error": str(e)})
+        st.error(f"Error scoring customers: {str(e)}")
+        return customers
+    logger.info("batch_scoring_succeeded", {
+        "customers": len(records),
+        "response_time_s": time.time() - start_time
+    })
+    return customers.assign(
+        churn_probability=[p['churn_probability'] for p in predictions],
+        is_likely_to_churn=[p['is_likely_to_churn'] for p in predictions]
+    )
+
+# Resultados de busca pontuados na tabela (os demais só são listados)
+MAX_SCORED_CUSTOMERS = 10000
+
 # Configuração da página
 st.set_page_config(
     page_title="Customer Churn Prediction",
@@ -85,17 +139,19 @@ st.markdown("""
 This dashboard helps predict customer churn probability and provides actionable insights.
 """)
 
-# Carregar dados dos clientes
-@st.cache_data
-def load_customer_data():
+# Carregar dados dos clientes uma única vez, indexados por id, faixas
+# numéricas e categorias; os filtros abaixo usam os índices em vez de
+# percorrer o DataFrame a cada interação
+@st.cache_resource
+def load_customer_store():
     try:
-        df = pd.read_csv("Bank Customer Churn Prediction.csv")
-        return df
+        return CustomerStore.load("Bank Customer Churn Prediction.csv")
     except Exception as e:
         st.error(f"Error loading customer data: {str(e)}")
         return None
 
-df_customers = load_customer_data()
+customer_store = load_customer_store()
+df_customers = customer_store.frame if customer_store is not None else None
 
 # Tabs para diferentes modos
 tab1, tab2, tab3 = st.tabs(["📊 Overview", "📋 Existing Customer", "➕ New Customer"])
@@ -122,26 +178,28 @@ with tab1:
         st.subheader("Filters")
         col1, col2, col3 = st.columns(3)
         with col1:
-            country_filter = st.multiselect("Country", df_customers['country'].unique())
+            country_filter = st.multiselect("Country", customer_store.categories('country'))
         with col2:
+            min_credit_score, max_credit_score = customer_store.bounds('credit_score')
             credit_score_range = st.slider("Credit Score", 
-                                         int(df_customers['credit_score'].min()),
-                                         int(df_customers['credit_score'].max()),
+                                         int(min_credit_score),
+                                         int(max_credit_score),
                                          (300, 850))
         with col3:
+            min_balance, max_balance = customer_store.bounds('balance')
             balance_range = st.slider("Balance", 
-                                    float(df_customers['balance'].min()),
-                                    float(df_customers['balance'].max()),
+                                    float(min_balance),
+                                    float(max_balance),
                                     (0.0, 250000.0))
         
-        # Aplicar filtros
-        filtered_df = df_customers.copy()
+        # Aplicar filtros pelos índices
+        conditions = {
+            'credit_score': credit_score_range,
+            'balance': balance_range
+        }
         if country_filter:
-            filtered_df = filtered_df[filtered_df['country'].isin(country_filter)]
-        filtered_df = filtered_df[
-            (filtered_df['credit_score'].between(credit_score_range[0], credit_score_range[1])) &
-            (filtered_df['balance'].between(balance_range[0], balance_range[1]))
-        ]
+            conditions['country'] = country_filter
+        filtered_df = customer_store.take(customer_store.query(**conditions))
         
         # Visualizações
         col1, col2 = st.columns(2)
@@ -172,20 +230,20 @@ with tab2:
         search_method = st.radio("Search Method", ["Customer ID", "Advanced Filters"])
         
         if search_method == "Customer ID":
-            # Criar uma lista de todos os IDs disponíveis
-            available_ids = df_customers['customer_id'].unique().tolist()
-            max_id = int(df_customers['customer_id'].max())
-            min_id = int(df_customers['customer_id'].min())
+            # Os IDs são consultados pelo índice hash da base
+            available_ids = customer_store.ids.keys
+            max_id = int(available_ids.max())
+            min_id = int(available_ids.min())
             
             # Mostrar informação sobre a quantidade total de clientes
-            total_customers = len(available_ids)
+            total_customers = len(customer_store)
             st.info(f"Total customers in database: {total_customers}")
             
             # Opção para ver todos os IDs
             if st.checkbox("View all available IDs"):
                 st.write("Complete list of IDs:")
                 cols = st.columns(4)
-                for idx, customer_id in enumerate(sorted(available_ids)):
+                for idx, customer_id in enumerate(np.sort(available_ids)):
                     cols[idx % 4].write(f"• {customer_id}")
             
             # Input do ID com validação
@@ -197,14 +255,14 @@ with tab2:
                 help=f"Enter any ID between {min_id} and {max_id}"
             )
             
-            if search_id not in available_ids:
+            if search_id not in customer_store:
                 st.warning(f"ID {search_id} does not exist in the database. Please use one of the available IDs.")
             
             search_button = st.button("Search Customer")
             
             if search_button:
-                if search_id in available_ids:
-                    customer = df_customers[df_customers['customer_id'] == search_id]
+                if search_id in customer_store:
+                    customer = customer_store.take([customer_store.row_of(search_id)])
                     st.success(f"Customer found!")
                 else:
                     st.error("Customer not found. Please use one of the available IDs.")
@@ -213,7 +271,7 @@ with tab2:
             # Advanced filters
             col1, col2, col3 = st.columns(3)
             with col1:
-                country = st.selectbox("Country", df_customers['country'].unique())
+                country = st.selectbox("Country", customer_store.categories('country'))
             with col2:
                 credit_score = st.slider("Credit Score", 300, 850, 619)
             with col3:
@@ -222,27 +280,34 @@ with tab2:
             search_button = st.button("Search Customers")
             
             if search_button:
-                customer = df_customers[
-                    (df_customers['country'] == country) &
-                    (df_customers['credit_score'] >= credit_score) &
-                    (df_customers['balance'] >= balance)
-                ]
+                customer = customer_store.take(customer_store.query(
+                    country=country,
+                    credit_score=(credit_score, None),
+                    balance=(balance, None)
+                ))
         
         if 'search_button' in locals() and search_button:
             if not customer.empty:
                 st.success(f"Found {len(customer)} customer(s)!")
                 st.write("Customer(s) Data:")
-                st.dataframe(customer)
+                if len(customer) > 1:
+                    # Até MAX_SCORED_CUSTOMERS clientes são pontuados de uma vez
+                    st.dataframe(score_customers(customer.head(MAX_SCORED_CUSTOMERS)))
+                else:
+                    st.dataframe(customer)
                 
                 # Se for apenas um cliente, mostrar análise detalhada
                 if len(customer) == 1:
                     customer_data = customer.iloc[0].to_dict()
-                    if 'customer_id' in customer_data:
-                        del customer_data['customer_id']
+                    customer_id = customer_data.pop('customer_id', None)
                     if 'churn' in customer_data:
                         del customer_data['churn']
                     
-                    result = make_prediction(customer_data)
+                    # Clientes existentes já têm score pré-calculado pela
+                    # versão ativa do modelo; a predição só é feita se não
+                    result = get_customer_score(customer_id) if customer_id is not None else None
+                    if result is None:
+                        result = make_prediction(customer_data)
                     if result:
                         col1, col2 = st.columns(2)
                         
@@ -318,10 +383,8 @@ with tab3:
         }
         
         # Fazer a requisição para a API
-        try:
-            response = requests.post("http://localhost:8001/predict", json=data)
-            result = response.json()
-            
+        result = make_prediction(data)
+        if result:
             # Layout em colunas
             col1, col2 = st.columns(2)
             
@@ -367,9 +430,6 @@ with tab3:
                     st.success("✅ Low risk customer")
                     st.markdown("• Consider upselling opportunities")
                     st.markdown("• Maintain regular engagement")
-                
-        except Exception as e:
-            st.error(f"Error making prediction: {str(e)}")
 
 # Adicionar informações extras
 st.markdown("---")
@@ -390,4 +450,14 @@ st.markdown("""
 - High Risk (>70%): Immediate action required
 - Medium Risk (30-70%): Monitor closely
 - Low Risk (<30%): Regular engagement
-""") 
\ No newline at end of file
+""") 
+
+# Estado dos endpoints da API usados pelo dashboard
+with st.sidebar:
+    st.subheader("API Endpoints")
+    for endpoint in get_api_client().status():
+        if endpoint["available"]:
+            latency = f"{endpoint['latency_ms']:.0f} ms" if endpoint["latency_ms"] is not None else "not used yet"
+            st.success(f"{endpoint['url']} — {latency}")
+        else:
+            st.warning(f"{endpoint['url']} — retrying in {endpoint['retry_in_s']:.0f} s ({endpoint['last_error']})")
@@ -0,0 +1,390 @@
+"""
+Latency-budgeted hyperparameter search for the serving model.
+
+Searches random forests, LightGBM and XGBoost with optuna, one study per
+family so that pruning compares trials trained the same way. Trials run
+in parallel threads; each reports its validation AUC every
+``PRUNING_STEP`` trees or boosting rounds and is stopped early when it
+falls behind the median of its study.
+
+Every finished trial is timed as it would be served (forests through the
+compiled engine with float32 node arrays, boosting models through their
+sklearn ``predict_proba``) and scored by
+
+    validation AUC - LATENCY_WEIGHT * single-row ms
+                   - BATCH_WEIGHT * batch ms - SIZE_WEIGHT * artifact MB
+
+Trials whose median single-row or ``BATCH_ROWS``-row latency is above the
+SLO are rejected. Timings taken while other trials train are noisy, so the
+surviving trials are timed again one at a time once the search is over;
+the Pareto front of validation AUC against latency is built from those
+timings, and the best-scoring trial is chosen and scored on the test rows.
+The chosen model is saved as a new model version with the front in
+``pareto_front.json``.
+
+Usage:
+    python -m src.tune_model --trials 30 --jobs 4
+    python -m src.tune_model --families random_forest,lightgbm --slo-single-row-ms 0.5 --save
+"""
+import argparse
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Optional, Sequence
+
+import joblib
+import numpy as np
+import optuna
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+from src.api.services.forest import CompiledForest, start_inference_threads
+from src.compact_model import FEATURE_NAMES_FILE, encoded_splits, median_ms, save_candidate
+from src.utils.config import (
+    MODEL_PARAMS,
+    MODELS_PATH,
+    RANDOM_STATE,
+    TUNING_SLO_BATCH_MS,
+    TUNING_SLO_SINGLE_ROW_MS
+)
+
+FAMILIES = ("random_forest", "lightgbm", "xgboost")
+# Validation rows timed as one batch (the batch SLO is for this many rows)
+BATCH_ROWS = 1000
+# Trees (or boosting rounds) between two pruning checks
+PRUNING_STEP = 25
+# AUC given up per ms of single-row latency, per ms of batch latency and
+# per MB of served artifact
+LATENCY_WEIGHT = 0.005
+BATCH_WEIGHT = 0.0002
+SIZE_WEIGHT = 0.0005
+PARETO_FILE = "pareto_front.json"
+
+# Trials train in parallel, but are timed one at a time
+_timing_lock = threading.Lock()
+
+
+def suggest_params(trial: optuna.Trial, family: str) -> dict:
+    """Hyperparameters of one trial; every model trains on a single thread."""
+    if family == "random_forest":
+        return {
+            "n_estimators": trial.suggest_int("n_estimators", PRUNING_STEP, 300, step=PRUNING_STEP),
+            "max_depth": trial.suggest_int("max_depth", 4, 24),
+            "min_samples_leaf": trial.suggest_int("min_samples_leaf", 1, 50, log=True),
+            "max_features": trial.suggest_categorical("max_features", ["sqrt", "log2", 0.5]),
+            "random_state": RANDOM_STATE,
+            "n_jobs": 1
+        }
+    boosting = {
+        "n_estimators": trial.suggest_int("n_estimators", 50, 500, step=PRUNING_STEP),
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "subsample": trial.suggest_float("subsample", 0.5, 1.0),
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.5, 1.0),
+        "reg_lambda": trial.suggest_float("reg_lambda", 1e-3, 10.0, log=True),
+        "random_state": RANDOM_STATE,
+        "n_jobs": 1
+    }
+    if family == "lightgbm":
+        return dict(
+            MODEL_PARAMS["lightgbm"],
+            **boosting,
+            num_leaves=trial.suggest_int("num_leaves", 4, 128, log=True),
+            min_child_samples=trial.suggest_int("min_child_samples", 5, 100, log=True),
+            subsample_freq=1
+        )
+    if family == "xgboost":
+        return dict(
+            MODEL_PARAMS["xgboost"],
+            **boosting,
+            max_depth=trial.suggest_int("max_depth", 2, 10),
+            min_child_weight=trial.suggest_float("min_child_weight", 1.0, 20.0, log=True)
+        )
+    raise ValueError(f"Unknown model family '{family}', expected one of {FAMILIES}")
+
+
+def _report(trial: optuna.Trial, auc: float, step: int):
+    trial.report(auc, step)
+    if trial.should_prune():
+        raise optuna.TrialPruned(f"AUC {auc:.4f} after {step} rounds")
+
+
+def fit_with_pruning(trial: optuna.Trial, family: str, params: dict, X_fit, y_fit, X_val, y_val):
+    """
+    Fit one trial's model, reporting validation AUC every ``PRUNING_STEP``
+    trees or rounds.
+
+    Raises:
+        optuna.TrialPruned: When the trial falls behind its study
+    """
+    if family == "random_forest":
+        # Grow the forest in steps: warm_start keeps the trees already fitted
+        total = params["n_estimators"]
+        model = RandomForestClassifier(**dict(params, n_estimators=0, warm_start=True))
+        for n_trees in range(PRUNING_STEP, total + 1, PRUNING_STEP):
+            model.set_params(n_estimators=n_trees)
+            model.fit(X_fit, y_fit)
+            _report(trial, roc_auc_score(y_val, model.predict_proba(X_val)[:, 1]), n_trees)
+        return model.set_params(warm_start=False)
+
+    if family == "lightgbm":
+        import lightgbm
+
+        def callback(env):
+            if (env.iteration + 1) % PRUNING_STEP == 0:
+                auc = next(value for _, name, value, _ in env.evaluation_result_list if name == "auc")
+                _report(trial, auc, env.iteration + 1)
+
+        model = lightgbm.LGBMClassifier(**params)
+        return model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], callbacks=[callback])
+
+    import xgboost
+
+    class PruningCallback(xgboost.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            if (epoch + 1) % PRUNING_STEP == 0:
+                _report(trial, evals_log["validation_0"]["auc"][-1], epoch + 1)
+            return False
+
+    model = xgboost.XGBClassifier(**params, callbacks=[PruningCallback()])
+    model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    # The callback holds the trial, which must not be pickled with the model
+    return model.set_params(callbacks=None)
+
+
+def serving_profile(model, X_batch: np.ndarray, workdir: Path) -> dict:
+    """
+    Latency and size of ``model`` as the API would serve it.
+
+    Forests are timed through the compiled engine with float32 node arrays
+    and sized by their node file, other models through ``predict_proba``
+    and sized by their pickle.
+
+    Returns:
+        dict: single_row_ms, batch_ms (``len(X_batch)`` rows) and size_mb
+    """
+    path = workdir / f"profile-{uuid.uuid4().hex}.joblib"
+    if CompiledForest.supports(model):
+        CompiledForest.from_sklearn(model).to_float32().save(path)
+        forest, _ = CompiledForest.load(path)
+        predict = forest.predict_proba
+    else:
+        joblib.dump(model, path)
+        predict = lambda X: model.predict_proba(X)[:, 1]  # noqa: E731
+    size_mb = path.stat().st_size / 2 ** 20
+    with _timing_lock:
+        profile = {
+            "single_row_ms": median_ms(lambda: predict(X_batch[:1]), repeats=100),
+            "batch_ms": median_ms(lambda: predict(X_batch), repeats=5),
+            "size_mb": size_mb
+        }
+    path.unlink()
+    return profile
+
+
+def slo_violation(profile: dict, slo_single_row_ms: float, slo_batch_ms: float) -> Optional[str]:
+    """Why ``profile`` misses the latency SLO, or None when it meets it."""
+    if profile["single_row_ms"] > slo_single_row_ms:
+        return f"single row {profile['single_row_ms']:.3f} ms > {slo_single_row_ms} ms"
+    if profile["batch_ms"] > slo_batch_ms:
+        return f"batch {profile['batch_ms']:.2f} ms > {slo_batch_ms} ms"
+    return None
+
+
+def objective_score(auc: float, profile: dict, weights: dict) -> float:
+    """Validation AUC minus the weighted latency and size costs."""
+    return (
+        auc
+        - weights["latency"] * profile["single_row_ms"]
+        - weights["batch"] * profile["batch_ms"]
+        - weights["size"] * profile["size_mb"]
+    )
+
+
+def pareto_front(rows: Sequence[dict]) -> list:
+    """
+    Rows no other row beats on both validation AUC and single-row latency.
+
+    Returns:
+        list[dict]: The front, fastest first
+    """
+    front = []
+    best_auc = -np.inf
+    for row in sorted(rows, key=lambda r: (r["single_row_ms"], -r["val_auc"])):
+        if row["val_auc"] > best_auc:
+            front.append(row)
+            best_auc = row["val_auc"]
+    return front
+
+
+def _objective(trial, family, data, slo, weights, workdir):
+    X_fit, X_val, y_fit, y_val = data
+    params = suggest_params(trial, family)
+    model = fit_with_pruning(trial, family, params, X_fit, y_fit, X_val, y_val)
+    auc = float(roc_auc_score(y_val, model.predict_proba(X_val)[:, 1]))
+    profile = serving_profile(model, X_val[:BATCH_ROWS], workdir)
+    trial.set_user_attr("val_auc", auc)
+    for key, value in profile.items():
+        trial.set_user_attr(key, value)
+    violation = slo_violation(profile, *slo)
+    if violation is not None:
+        trial.set_user_attr("rejected", violation)
+        raise optuna.TrialPruned(violation)
+    joblib.dump(model, workdir / f"{family}-{trial.number}.joblib")
+    return objective_score(auc, profile, weights)
+
+
+def tune(
+    families: Sequence[str] = FAMILIES,
+    n_trials: int = 20,
+    n_jobs: int = 1,
+    slo_single_row_ms: float = TUNING_SLO_SINGLE_ROW_MS,
+    slo_batch_ms: float = TUNING_SLO_BATCH_MS,
+    weights: Optional[dict] = None,
+    model_dir: Path = MODELS_PATH,
+    save: bool = False,
+    version: Optional[str] = None
+) -> dict:
+    """
+    Search every family, build the Pareto front and choose the serving model.
+
+    Args:
+        families (Sequence[str]): Model families to search
+        n_trials (int): Trials per family
+        n_jobs (int): Trials run in parallel
+        slo_single_row_ms, slo_batch_ms: Latency SLO of the candidates
+        weights (dict, optional): Overrides of the "latency", "batch" and
+            "size" weights of the objective
+        model_dir (Path): Directory holding the serving feature names; new
+            versions are written under it
+        save (bool): Save the chosen model as ``version``
+        version (str, optional): Model version name (default: tuned-<time>)
+
+    Returns:
+        dict: The report saved as ``pareto_front.json``
+    """
+    unknown = set(families) - set(FAMILIES)
+    if unknown:
+        raise ValueError(f"Unknown model families {sorted(unknown)}, expected some of {FAMILIES}")
+    weights = dict({"latency": LATENCY_WEIGHT, "batch": BATCH_WEIGHT, "size": SIZE_WEIGHT}, **(weights or {}))
+    slo = (slo_single_row_ms, slo_batch_ms)
+    model_dir = Path(model_dir)
+    feature_names = joblib.load(model_dir / FEATURE_NAMES_FILE)
+    X_fit, X_val, X_test, y_fit, y_val, y_test = encoded_splits(feature_names)
+    X_batch = X_val[:BATCH_ROWS]
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    # Trial threads time the parallel traversal; its threading layer must
+    # start on this thread
+    start_inference_threads()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        trials = {}
+        candidates = []
+        for family in families:
+            study = optuna.create_study(
+                direction="maximize",
+                sampler=optuna.samplers.TPESampler(seed=RANDOM_STATE),
+                pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=PRUNING_STEP)
+            )
+            study.optimize(
+                partial(_objective, family=family, data=(X_fit, X_val, y_fit, y_val),
+                        slo=slo, weights=weights, workdir=workdir),
+                n_trials=n_trials,
+                n_jobs=n_jobs
+            )
+            finished = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+            rejected = [t for t in study.trials if "rejected" in t.user_attrs]
+            trials[family] = {
+                "completed": len(finished),
+                "rejected": len(rejected),
+                "pruned": len(study.trials) - len(finished) - len(rejected)
+            }
+            for trial in finished:
+                candidates.append({
+                    "family": family,
+                    "trial": trial.number,
+                    "params": trial.params,
+                    "val_auc": trial.user_attrs["val_auc"]
+                })
+
+        # Time the survivors again without training running alongside
+        models = {}
+        for row in candidates:
+            name = f"{row['family']}-{row['trial']}"
+            models[name] = joblib.load(workdir / f"{name}.joblib")
+            row.update(serving_profile(models[name], X_batch, workdir))
+            row["meets_slo"] = slo_violation(row, *slo) is None
+            row["score"] = objective_score(row["val_auc"], row, weights)
+        eligible = [row for row in candidates if row["meets_slo"]]
+        if not eligible:
+            raise RuntimeError("No candidate meets the latency SLO")
+        front = pareto_front(eligible)
+        chosen = max(eligible, key=lambda row: row["score"])
+        for row in front + [chosen]:
+            model = models[f"{row['family']}-{row['trial']}"]
+            row["test_auc"] = float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]))
+        for row in front:
+            row["chosen"] = row is chosen
+
+        report = {
+            "slo": {"single_row_ms": slo_single_row_ms, "batch_ms": slo_batch_ms, "batch_rows": len(X_batch)},
+            "weights": weights,
+            "trials": trials,
+            "chosen": chosen,
+            "front": front
+        }
+
+        print(f"{'family':<15}{'trial':>6}{'1 row ms':>10}{'batch ms':>10}{'size MB':>9}"
+              f"{'val AUC':>9}{'test AUC':>10}{'score':>9}")
+        for row in front + ([] if chosen in front else [chosen]):
+            marker = " *" if row is chosen else ""
+            print(f"{row['family']:<15}{row['trial']:>6}{row['single_row_ms']:>10.3f}{row['batch_ms']:>10.2f}"
+                  f"{row['size_mb']:>9.2f}{row['val_auc']:>9.4f}{row['test_auc']:>10.4f}{row['score']:>9.4f}{marker}")
+        print(f"batch = {len(X_batch)} validation rows; * = chosen; trials per family: {trials}")
+
+        if save:
+            version = version or f"tuned-{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+            path = save_candidate(
+                models[f"{chosen['family']}-{chosen['trial']}"], True, feature_names, version, {
+                    "performance_metrics": {"roc_auc": chosen["test_auc"]},
+                    "tuning": {"family": chosen["family"], "params": chosen["params"], "score": chosen["score"]}
+                },
+                models_path=model_dir,
+                extra_files={PARETO_FILE: report}
+            )
+            print(f"Modelo {chosen['family']} (trial {chosen['trial']}) salvo em: {path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the serving model under a latency SLO")
+    parser.add_argument("--families", type=lambda v: [f for f in v.split(",") if f.strip()],
+                        default=list(FAMILIES), help=f"Model families to search (comma separated, from {FAMILIES})")
+    parser.add_argument("--trials", type=int, default=20, help="Trials per family")
+    parser.add_argument("--jobs", type=int, default=1, help="Trials run in parallel")
+    parser.add_argument("--slo-single-row-ms", type=float, default=TUNING_SLO_SINGLE_ROW_MS)
+    parser.add_argument("--slo-batch-ms", type=float, default=TUNING_SLO_BATCH_MS,
+                        help=f"SLO for a batch of {BATCH_ROWS} rows")
+    parser.add_argument("--latency-weight", type=float, default=LATENCY_WEIGHT,
+                        help="AUC given up per ms of single-row latency")
+    parser.add_argument("--batch-weight", type=float, default=BATCH_WEIGHT,
+                        help="AUC given up per ms of batch latency")
+    parser.add_argument("--size-weight", type=float, default=SIZE_WEIGHT,
+                        help="AUC given up per MB of served artifact")
+    parser.add_argument("--model-dir", type=Path, default=MODELS_PATH)
+    parser.add_argument("--save", action="store_true", help="Save the chosen model as a new model version")
+    parser.add_argument("--version", help="Version name for --save (default: tuned-<UTC time>)")
+    args = parser.parse_args()
+
+    tune(
+        args.families, args.trials, args.jobs, args.slo_single_row_ms, args.slo_batch_ms,
+        weights={"latency": args.latency_weight, "batch": args.batch_weight, "size": args.size_weight},
+        model_dir=args.model_dir, save=args.save, version=args.version
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Pooled HTTP client for the prediction API.
+
+One ``APIClient`` is shared by every page of the Streamlit app:
+
+- Connections are kept alive in a pool per endpoint, so a prediction
+  costs one round trip instead of a new TCP (and TLS) connection.
+- Endpoints are tried in order of preference. One that fails to connect
+  or times out is skipped for a while instead of being probed again on
+  every click; a 503 (load shed, or data still loading) moves the request
+  on to the next endpoint without marking the endpoint down.
+- ``predict_many`` splits a list of customers into ``/predict/batch``
+  calls and sends several at once.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    API_CLIENT_BATCH_SIZE,
+    API_CLIENT_CONCURRENCY,
+    API_CLIENT_CONNECT_TIMEOUT_SECONDS,
+    API_CLIENT_POOL_SIZE,
+    API_CLIENT_RETRY_SECONDS,
+    API_CLIENT_TIMEOUT_SECONDS,
+    API_CLIENT_URLS,
+)
+
+# Weight of the latest call in the average latency of an endpoint
+LATENCY_SMOOTHING = 0.2
+
+
+class EndpointsUnavailable(requests.exceptions.ConnectionError):
+    """No endpoint could be reached."""
+
+
+class EndpointHealth:
+    """Recent outcome of the calls to one endpoint."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error = None
+        self.latency_ms = None
+
+    def is_up(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def succeeded(self, latency_ms: float):
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error = None
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += LATENCY_SMOOTHING * (latency_ms - self.latency_ms)
+
+    def failed(self, error: str, retry_seconds: float):
+        self.failures += 1
+        self.down_until = time.monotonic() + retry_seconds
+        self.last_error = error
+
+
+class APIClient:
+    """
+    Keep-alive client for a list of equivalent API endpoints.
+
+    Thread-safe: Streamlit sessions share one instance.
+
+    Args:
+        urls (Sequence[str]): Base URLs, in order of preference
+        connect_timeout (float): Seconds to wait for a connection
+        timeout (float): Seconds to wait for a response
+        pool_size (int): Connections kept alive per endpoint
+        retry_seconds (float): How long a failed endpoint is skipped
+        concurrency (int): ``/predict/batch`` calls in flight in ``predict_many``
+        batch_size (int): Customers per ``/predict/batch`` call
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str] = API_CLIENT_URLS,
+        connect_timeout: float = API_CLIENT_CONNECT_TIMEOUT_SECONDS,
+        timeout: float = API_CLIENT_TIMEOUT_SECONDS,
+        pool_size: int = API_CLIENT_POOL_SIZE,
+        retry_seconds: float = API_CLIENT_RETRY_SECONDS,
+        concurrency: int = API_CLIENT_CONCURRENCY,
+        batch_size: int = API_CLIENT_BATCH_SIZE
+    ):
+        if not urls:
+            raise ValueError("At least one API URL is required")
+        self.urls = [url.rstrip("/") for url in urls]
+        self.timeout = (connect_timeout, timeout)
+        self.retry_seconds = retry_seconds
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(self.urls),
+            pool_maxsize=max(pool_size, concurrency),
+            max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._health = {url: EndpointHealth(url) for url in self.urls}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="api-client")
+
+    def candidates(self) -> list:
+        """Endpoints to try: available ones in order of preference, then the
+        skipped ones, soonest available first, as a last resort."""
+        now = time.monotonic()
+        with self._lock:
+            health = [self._health[url] for url in self.urls]
+            up = [h.url for h in health if h.is_up(now)]
+            down = [h.url for h in sorted(health, key=lambda h: h.down_until) if not h.is_up(now)]
+        return up + down
+
+    def request(self, method: str, path: str, **kwargs) -> tuple:
+        """
+        Send a request to the first endpoint that answers.
+
+        A 503 moves on to the next endpoint, but is returned when every
+        endpoint answers with it.
+
+        Returns:
+            tuple[str, requests.Response]: Endpoint used and its response
+
+        Raises:
+            EndpointsUnavailable: No endpoint could be reached
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        errors = []
+        overloaded = None
+        for url in self.candidates():
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url + path, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                with self._lock:
+                    self._health[url].failed(f"{type(e).__name__}: {e}", self.retry_seconds)
+                errors.append(f"{url}: {type(e).__name__}")
+                continue
+            with self._lock:
+                self._health[url].succeeded((time.perf_counter() - start) * 1000)
+            if response.status_code == 503:
+                overloaded = (url, response)
+                continue
+            return url, response
+        if overloaded is not None:
+            return overloaded
+        raise EndpointsUnavailable(f"No API endpoint available ({', '.join(errors)})")
+
+    def predict(self, customer: dict) -> tuple:
+        """``POST /predict``; returns the endpoint used and the response."""
+        return self.request("POST", "/predict", json=customer)
+
+    def predict_many(self, customers: list) -> list:
+        """
+        Score many customers with concurrent ``/predict/batch`` calls.
+
+        Returns:
+            list[dict]: One ``/predict/batch`` item per customer, in input
+                order, ``customer_index`` counted over the whole list
+
+        Raises:
+            requests.HTTPError: A batch call failed
+        """
+        chunks = [customers[i:i + self.batch_size] for i in range(0, len(customers), self.batch_size)]
+        results = []
+        for offset, predictions in zip(
+            range(0, len(customers), self.batch_size),
+            self._executor.map(self._predict_chunk, chunks)
+        ):
+            for item in predictions:
+                item["customer_index"] += offset
+            results.extend(predictions)
+        return results
+
+    def _predict_chunk(self, chunk: list) -> list:
+        _, response = self.request("POST", "/predict/batch", json={"customers": chunk})
+        response.raise_for_status()
+        return response.json()["predictions"]
+
+    def status(self) -> list:
+        """Health of each endpoint, in order of preference."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": h.url,
+                    "available": h.is_up(now),
+                    "failures": h.failures,
+                    "retry_in_s": max(0.0, h.down_until - now),
+                    "last_error": h.last_error,
+                    "latency_ms": h.latency_ms
+                }
+                for h in (self._health[url] for url in self.urls)
+            ]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
@@ -2,6 +2,8 @@
 Configuration module for the project.
 Contains all the necessary settings and paths.
 """
+import math
+import os
 from pathlib import Path
 
 # Project structure
@@ -44,11 +46,176 @@ MODEL_PARAMS = {
     'xgboost': {
         'objective': 'binary:logistic',
         'eval_metric': 'auc',
-        'silent': 1
+        'verbosity': 0
     }
 }
 
+# Latency SLO of the serving model: candidates of src/tune_model.py whose
+# median single-row or 1000-row batch latency is above it are rejected
+TUNING_SLO_SINGLE_ROW_MS = float(os.getenv("TUNING_SLO_SINGLE_ROW_MS", "2.0"))
+TUNING_SLO_BATCH_MS = float(os.getenv("TUNING_SLO_BATCH_MS", "50"))
+
 # API settings
 API_TITLE = "Bank Customer Churn Prediction API"
 API_DESCRIPTION = "API for predicting customer churn probability"
-API_VERSION = "1.0.0" 
\ No newline at end of file
+API_VERSION = "1.0.0" 
+# Maximum number of customers accepted by /predict/batch
+API_MAX_BATCH_SIZE = int(os.getenv("API_MAX_BATCH_SIZE", "10000"))
+# Maximum number of rows accepted by /predict/columnar
+API_MAX_COLUMNAR_ROWS = int(os.getenv("API_MAX_COLUMNAR_ROWS", "1000000"))
+# Largest /predict/columnar body read, checked against Content-Length before
+# reading (default: 256 bytes per row, above what any encoding needs)
+API_MAX_COLUMNAR_BYTES = int(os.getenv("API_MAX_COLUMNAR_BYTES", str(API_MAX_COLUMNAR_ROWS * 256)))
+
+# Micro-batching of concurrent /predict calls (disabled by default)
+API_MICRO_BATCH_ENABLED = os.getenv("API_MICRO_BATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+API_MICRO_BATCH_MAX_SIZE = int(os.getenv("API_MICRO_BATCH_MAX_SIZE", "64"))
+API_MICRO_BATCH_WAIT_MS = float(os.getenv("API_MICRO_BATCH_WAIT_MS", "2"))
+
+# Threads running model inference off the event loop
+API_INFERENCE_WORKERS = int(os.getenv("API_INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Concurrent /predict calls for the same customer share one inference
+API_COALESCE_ENABLED = os.getenv("API_COALESCE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Admission control of the prediction and explanation routes (per process):
+# at most API_MAX_IN_FLIGHT requests run at once and API_MAX_QUEUED wait for
+# a slot, each for at most API_QUEUE_TIMEOUT_MS (clients may ask for less
+# with the X-Request-Timeout-Ms header); the rest get 503 with Retry-After
+API_ADMISSION_ENABLED = os.getenv("API_ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+API_MAX_IN_FLIGHT = int(os.getenv("API_MAX_IN_FLIGHT", "64"))
+API_MAX_QUEUED = int(os.getenv("API_MAX_QUEUED", "256"))
+API_QUEUE_TIMEOUT_MS = float(os.getenv("API_QUEUE_TIMEOUT_MS", "1000"))
+
+# Inference engine used by ChurnPredictor: "sklearn" or "compiled"
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "compiled")
+
+# Opt-in LRU cache of predictions
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+# Decimals kept for balance and estimated_salary in the cache key (unset = exact)
+PREDICTION_CACHE_ROUND_DECIMALS = (
+    int(os.environ["PREDICTION_CACHE_ROUND_DECIMALS"])
+    if os.getenv("PREDICTION_CACHE_ROUND_DECIMALS") else None
+)
+
+# Warm-up run before the API reports itself ready
+MODEL_WARMUP_REQUESTS = int(os.getenv("MODEL_WARMUP_REQUESTS", "200"))
+MODEL_WARMUP_LATENCY_TARGET_MS = float(os.getenv("MODEL_WARMUP_LATENCY_TARGET_MS", "50"))
+MODEL_WARMUP_MAX_ROUNDS = int(os.getenv("MODEL_WARMUP_MAX_ROUNDS", "5"))
+
+# Poll models/ for new versions every N seconds and hot-swap them (0 = off)
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "0"))
+# Bearer token required by POST /model/reload (unset = the endpoint is disabled)
+API_ADMIN_TOKEN = os.getenv("API_ADMIN_TOKEN", "")
+
+# Precomputed scores of the customers in DATA_PATH, rebuilt for each model
+# version and served by /customers/{customer_id}/score
+CUSTOMER_SCORES_ENABLED = os.getenv("CUSTOMER_SCORES_ENABLED", "true").lower() in ("1", "true", "yes")
+CUSTOMER_SCORES_PATH = Path(os.getenv("CUSTOMER_SCORES_PATH", str(PROJECT_ROOT / "scores" / "customers")))
+
+# Indexed in-memory copy of DATA_PATH (loaded by each API process at
+# startup) behind GET /customers, and the most records one request returns
+CUSTOMER_STORE_ENABLED = os.getenv("CUSTOMER_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+API_MAX_CUSTOMERS_PAGE = int(os.getenv("API_MAX_CUSTOMERS_PAGE", "1000"))
+
+# Rows scored per model call by /predict/stream
+API_STREAM_CHUNK_SIZE = int(os.getenv("API_STREAM_CHUNK_SIZE", "5000"))
+# Longest /predict/stream input line, in characters (longer lines are row errors)
+API_STREAM_MAX_LINE_LENGTH = int(os.getenv("API_STREAM_MAX_LINE_LENGTH", "65536"))
+
+# /explain: time per request spent on exact SHAP attributions before the
+# remaining customers get importance-based explanations, batch size limit
+# and cache of exact attributions
+API_EXPLAIN_BUDGET_MS = float(os.getenv("API_EXPLAIN_BUDGET_MS", "250"))
+API_EXPLAIN_MAX_BATCH_SIZE = int(os.getenv("API_EXPLAIN_MAX_BATCH_SIZE", "1000"))
+EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", "10000"))
+EXPLANATION_CACHE_TTL_SECONDS = float(os.getenv("EXPLANATION_CACHE_TTL_SECONDS", "3600"))
+# Build the SHAP explainer when a model version is activated instead of on
+# the first /explain call. It loads the sklearn forest in every worker,
+# about 200 MB each, even with MODEL_ENGINE=compiled
+EXPLAINER_PRELOAD = os.getenv("EXPLAINER_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+# Logging: records queued for the background writer before new ones are
+# dropped, and fraction of events kept per level (e.g. "INFO=0.1,DEBUG=0";
+# unset keeps every event)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATES = {
+    level.strip().upper(): float(rate)
+    for level, rate in (
+        item.split("=") for item in os.getenv("LOG_SAMPLE_RATES", "").split(",") if item.strip()
+    )
+}
+
+# Where metrics are exported besides the local registry: "none" or "cloud"
+# (Google Cloud Monitoring, needs credentials and network)
+METRICS_EXPORTER = os.getenv("METRICS_EXPORTER", "none").lower()
+# Directory where each worker process writes its metrics every
+# METRICS_SYNC_SECONDS, so /metrics/prometheus reports the sum over the
+# workers. Unset: src.serve uses a temporary directory, a single process
+# reports its own metrics
+METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR", "")
+METRICS_SYNC_SECONDS = float(os.getenv("METRICS_SYNC_SECONDS", "5"))
+
+# Per-stage latency histograms for /predict, and whether responses carry
+# them in a Server-Timing header
+API_STAGE_TIMING = os.getenv("API_STAGE_TIMING", "true").lower() in ("1", "true", "yes")
+API_SERVER_TIMING = os.getenv("API_SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Prediction API as seen by the Streamlit app (src/utils/api_client.py):
+# endpoints in order of preference (comma separated), connect and read
+# timeouts, keep-alive connections per endpoint, seconds a failed endpoint
+# is skipped before it is tried again, and /predict/batch calls in flight
+# (of up to API_CLIENT_BATCH_SIZE customers each) when scoring many customers
+API_CLIENT_URLS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("API_CLIENT_URLS", "http://localhost:8000,http://34.69.103.18").split(",") if url.strip()
+]
+API_CLIENT_CONNECT_TIMEOUT_SECONDS = float(os.getenv("API_CLIENT_CONNECT_TIMEOUT_SECONDS", "1"))
+API_CLIENT_TIMEOUT_SECONDS = float(os.getenv("API_CLIENT_TIMEOUT_SECONDS", "5"))
+API_CLIENT_POOL_SIZE = int(os.getenv("API_CLIENT_POOL_SIZE", "8"))
+API_CLIENT_RETRY_SECONDS = float(os.getenv("API_CLIENT_RETRY_SECONDS", "30"))
+API_CLIENT_CONCURRENCY = int(os.getenv("API_CLIENT_CONCURRENCY", "4"))
+API_CLIENT_BATCH_SIZE = int(os.getenv("API_CLIENT_BATCH_SIZE", "1000"))
+
+def _available_cpus() -> int:
+    """CPUs the process may run on, capped by the cgroup CPU quota (container CPU limit)."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    for quota_file, period_file in (
+        ("/sys/fs/cgroup/cpu.max", None),  # cgroup v2: "<quota> <period>" or "max <period>"
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")  # cgroup v1
+    ):
+        try:
+            values = Path(quota_file).read_text().split()
+            if period_file is not None:
+                values.append(Path(period_file).read_text().strip())
+            quota, period = values[0], values[-1]
+            if quota not in ("max", "-1"):
+                return max(1, min(cpus, math.ceil(int(quota) / int(period))))
+        except (OSError, ValueError, IndexError):
+            continue
+    return cpus
+
+
+AVAILABLE_CPUS = _available_cpus()
+
+# Production server (python -m src.serve): address, worker processes and
+# connection tuning. Workers default to the CPUs available to the process,
+# rounded up from the container's CPU limit.
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "0")) or AVAILABLE_CPUS
+# Pin each worker to one CPU (Linux only)
+API_CPU_PINNING = os.getenv("API_CPU_PINNING", "false").lower() in ("1", "true", "yes")
+# Pending connections queued by the kernel, and seconds idle keep-alive
+# connections stay open (above the load balancer's idle timeout)
+API_BACKLOG = int(os.getenv("API_BACKLOG", "2048"))
+API_KEEPALIVE_SECONDS = int(os.getenv("API_KEEPALIVE_SECONDS", "75"))
+# Restart a worker after this many requests (plus up to the jitter, so
+# workers do not restart together; 0 = never), waiting up to the graceful
+# timeout for its in-flight requests
+API_MAX_REQUESTS = int(os.getenv("API_MAX_REQUESTS", "50000"))
+API_MAX_REQUESTS_JITTER = int(os.getenv("API_MAX_REQUESTS_JITTER", "5000"))
+API_GRACEFUL_TIMEOUT = int(os.getenv("API_GRACEFUL_TIMEOUT", "30"))
+API_WORKER_TIMEOUT = int(os.getenv("API_WORKER_TIMEOUT", "60"))
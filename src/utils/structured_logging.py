@@ -0,0 +1,206 @@
+"""
+Asynchronous, sampled structured logging.
+
+Records are handed to a background writer thread through a bounded queue,
+so request threads never format messages or wait on file and console I/O.
+When the queue is full the record is dropped and counted instead of
+blocking the request. ``StructuredLogger`` adds per-level sampling and only
+builds an event's payload once it knows the event will be emitted.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional, Union
+
+from .config import LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+
+Payload = Union[dict, Callable[[], dict], None]
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the structured payload merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "payload", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops and counts records when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The writer thread lives in the same process, so the record is
+        # passed as is and formatted there instead of on the request thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class AsyncLogWriter:
+    """
+    Background thread writing queued records to the given handlers.
+
+    Args:
+        handlers (Iterable[logging.Handler]): Where records are written
+        queue_size (int): Records held before new ones are dropped
+    """
+
+    def __init__(self, handlers: Iterable[logging.Handler], queue_size: int = 10000):
+        self.handlers = list(handlers)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.listener = self._listener()
+        self._running = False
+
+    def _listener(self) -> logging.handlers.QueueListener:
+        return logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+
+    def start(self):
+        if not self._running:
+            self.listener.start()
+            self._running = True
+
+    def stop(self):
+        """Write the records still queued and stop the thread."""
+        if self._running:
+            self.listener.stop()
+            self._running = False
+
+    def after_fork(self):
+        """
+        Restart the writer in a forked child (e.g. a preforked API worker).
+
+        Only the forking thread survives ``fork()``, so the child gets a new
+        queue (the parent's may have been locked mid-operation) and a new
+        listener, whose writer thread is started if the parent's was running.
+        """
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.handler.queue = self.queue
+        self.handler.dropped = 0
+        self.listener = self._listener()
+        if self._running:
+            self.listener.start()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "dropped": self.handler.dropped
+        }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def configure_async_logging(
+    level: int = logging.INFO,
+    handlers: Optional[Iterable[logging.Handler]] = None,
+    queue_size: int = LOG_QUEUE_SIZE
+) -> AsyncLogWriter:
+    """
+    Route every record of the root logger through an ``AsyncLogWriter``.
+
+    Safe to call more than once (e.g. on every Streamlit rerun): only the
+    first call installs the writer, later calls return it.
+
+    Args:
+        level (int): Root logger level
+        handlers (Iterable[logging.Handler], optional): Destinations,
+            formatted as JSON lines (default: stderr)
+        queue_size (int): Records held before new ones are dropped
+
+    Returns:
+        AsyncLogWriter: The process-wide writer
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            handlers = list(handlers) if handlers is not None else [logging.StreamHandler()]
+            formatter = JsonFormatter()
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            writer = AsyncLogWriter(handlers, queue_size)
+            root = logging.getLogger()
+            root.handlers = [writer.handler]
+            root.setLevel(level)
+            writer.start()
+            atexit.register(writer.stop)
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=writer.after_fork)
+            _writer = writer
+        return _writer
+
+
+def get_log_writer() -> Optional[AsyncLogWriter]:
+    """The writer installed by ``configure_async_logging``, if any."""
+    return _writer
+
+
+class StructuredLogger:
+    """
+    Logger for structured events with per-level sampling.
+
+    The payload may be a callable; it is only called when the event passes
+    the level check and the sampling draw, so disabled or sampled-out events
+    cost a comparison and a random number.
+
+    Args:
+        name (str): Underlying ``logging`` logger name
+        sample_rates (dict, optional): Level name to fraction of events
+            kept, e.g. ``{"INFO": 0.1}``; levels not listed keep every event
+    """
+
+    def __init__(self, name: str, sample_rates: Optional[dict] = None):
+        self.logger = logging.getLogger(name)
+        rates = LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+        self.sample_rates = {logging.getLevelName(level.upper()): rate for level, rate in rates.items()}
+
+    def log(self, level: int, event: str, payload: Payload = None):
+        if not self.logger.isEnabledFor(level):
+            return
+        rate = self.sample_rates.get(level, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return
+        if callable(payload):
+            payload = payload()
+        payload = dict(payload or {}, event=event)
+        if rate < 1.0:
+            payload["sample_rate"] = rate
+        self.logger.log(level, event, extra={"payload": payload})
+
+    def debug(self, event: str, payload: Payload = None):
+        self.log(logging.DEBUG, event, payload)
+
+    def info(self, event: str, payload: Payload = None):
+        self.log(logging.INFO, event, payload)
+
+    def warning(self, event: str, payload: Payload = None):
+        self.log(logging.WARNING, event, payload)
+
+    def error(self, event: str, payload: Payload = None):
+        self.log(logging.ERROR, event, payload)
@@ -1,7 +1,8 @@
 #!/bin/bash
 
-# Inicia a API em background
-python src/run_api.py &
+# Inicia a API em background: um worker por CPU, com o modelo carregado
+# antes do fork (configurável por API_WORKERS, API_PORT etc.)
+python -m src.serve &
 
 # Aguarda alguns segundos para a API iniciar
 sleep 5
@@ -0,0 +1,49 @@
+"""
+Benchmark the sklearn and compiled inference engines.
+
+Run from the project root after training the model:
+    python -m tests.benchmark.benchmark_engines
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.api.services.prediction import ChurnPredictor
+from src.utils.config import DATA_PATH
+
+
+def measure(fn, repeats: int) -> float:
+    """Median wall time of ``fn`` in milliseconds."""
+    fn()  # warm-up (numba compilation, sklearn thread pools)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    df = pd.read_csv(DATA_PATH)
+    customers = df.drop(columns=["customer_id", "churn"])
+
+    print(f"{'engine':<10}{'1 row (ms)':>14}{'10k rows (ms)':>16}{'max |diff|':>14}")
+    reference = None
+    for engine in ("sklearn", "compiled"):
+        predictor = ChurnPredictor(engine=engine)
+        X = predictor.encoder.encode_columns(customers)[:10000]
+        single = X[:1]
+
+        probabilities = predictor.predict_proba(X)
+        if reference is None:
+            reference = probabilities
+        diff = np.abs(probabilities - reference).max()
+
+        single_ms = measure(lambda: predictor.predict_proba(single), repeats=200)
+        batch_ms = measure(lambda: predictor.predict_proba(X), repeats=10)
+        print(f"{engine:<10}{single_ms:>14.3f}{batch_ms:>16.2f}{diff:>14.2e}")
+
+
+if __name__ == "__main__":
+    main()
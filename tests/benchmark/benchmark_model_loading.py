@@ -0,0 +1,70 @@
+"""
+Compare per-worker memory and load time of the model loading strategies.
+
+Starts several fresh processes, as uvicorn workers would be, each loading
+one ChurnPredictor. PSS (proportional set size) splits shared pages
+between the processes mapping them, so it shows the real cost per worker
+when the memory-mapped node arrays are shared.
+
+Run from the project root after training the model (Linux only):
+    python -m tests.benchmark.benchmark_model_loading
+"""
+import multiprocessing as mp
+import time
+
+N_WORKERS = 4
+
+
+def memory_kb() -> dict:
+    """RSS and PSS of the current process, in kB."""
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                usage[key.lower()] = int(rest.split()[0])
+    return usage
+
+
+def worker(engine: str, ready, release, results):
+    from src.api.services.prediction import ChurnPredictor
+
+    baseline = memory_kb()
+    start = time.perf_counter()
+    predictor = ChurnPredictor(engine=engine)
+    predictor.predict_proba(predictor.encoder.allocate(1))
+    load_ms = (time.perf_counter() - start) * 1000
+    ready.wait()
+    # Every worker has the model loaded, so shared pages are now split
+    usage = memory_kb()
+    results.put((load_ms, usage["rss"] - baseline["rss"], usage["pss"] - baseline["pss"]))
+    release.wait()
+
+
+def run(engine: str) -> list:
+    ctx = mp.get_context("spawn")
+    ready = ctx.Barrier(N_WORKERS)
+    release = ctx.Barrier(N_WORKERS)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(engine, ready, release, results)) for _ in range(N_WORKERS)]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measurements
+
+
+def main():
+    print(f"{N_WORKERS} workers, model memory per worker (kB) and load time (ms)")
+    print(f"{'engine':<10}{'load (ms)':>12}{'RSS (kB)':>12}{'PSS (kB)':>12}")
+    for engine in ("sklearn", "compiled"):
+        measurements = run(engine)
+        load_ms = sum(m[0] for m in measurements) / len(measurements)
+        rss = sum(m[1] for m in measurements) / len(measurements)
+        pss = sum(m[2] for m in measurements) / len(measurements)
+        print(f"{engine:<10}{load_ms:>12.1f}{rss:>12.0f}{pss:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark the serialization of prediction responses.
+
+Compares the previous response path (one Pydantic model per row, then
+``jsonable_encoder`` and ``JSONResponse``, as FastAPI does for a returned
+model) with ``batch_response``, which encodes the model output arrays
+directly. Inference is not included.
+
+Run from the project root:
+    python -m tests.benchmark.benchmark_serialization
+"""
+import json
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.api.schemas.customer import BatchPrediction, BatchResponse
+from src.api.services.serialization import batch_response, orjson
+from tests.benchmark.benchmark_engines import measure
+
+
+def pydantic_path(probabilities: np.ndarray, labels: np.ndarray) -> bytes:
+    predictions = [
+        BatchPrediction(customer_index=i, churn_probability=probability, is_likely_to_churn=label)
+        for i, (probability, label) in enumerate(zip(probabilities.tolist(), labels.tolist()))
+    ]
+    response = BatchResponse(predictions=predictions)
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def fast_path(probabilities: np.ndarray, labels: np.ndarray) -> bytes:
+    return batch_response(len(probabilities), range(len(probabilities)), probabilities, labels, {}).body
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"{'rows':>8}{'pydantic (ms)':>16}{'fast (ms)':>12}{'speedup':>10}")
+    for n_rows in (1, 1_000, 100_000):
+        probabilities = rng.uniform(0, 1, size=n_rows)
+        labels = probabilities >= 0.5
+        assert json.loads(pydantic_path(probabilities, labels)) == json.loads(fast_path(probabilities, labels))
+
+        repeats = 200 if n_rows < 100_000 else 5
+        slow_ms = measure(lambda: pydantic_path(probabilities, labels), repeats)
+        fast_ms = measure(lambda: fast_path(probabilities, labels), repeats)
+        print(f"{n_rows:>8}{slow_ms:>16.3f}{fast_ms:>12.3f}{slow_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+from src.api.main import app, metrics
+
+client = TestClient(app)
+
+CUSTOMER = {
+    "credit_score": 619,
+    "country": "France",
+    "gender": "Female",
+    "age": 42,
+    "tenure": 2,
+    "balance": 0.0,
+    "products_number": 1,
+    "credit_card": 1,
+    "active_member": 1,
+    "estimated_salary": 101348.88
+}
+
+def test_overload_is_shed_with_503_and_retry_after(monkeypatch):
+    """Test that requests beyond the in-flight cap and the queue get 503 with Retry-After"""
+    import src.api.main as main
+
+    monkeypatch.setattr(main.admission, "max_in_flight", 1)
+    monkeypatch.setattr(main.admission, "max_queued", 1)
+    monkeypatch.setattr(main.admission, "queue_timeout_ms", 2000)
+    queue_full_before = main.admission.rejected["queue_full"]
+    predict_one = main.predict_one
+
+    def slow_predict_one(customer_data, timer=None):
+        time.sleep(0.1)
+        return predict_one(customer_data, timer)
+
+    monkeypatch.setattr(main, "predict_one", slow_predict_one)
+    monkeypatch.setattr(main, "coalescer", None)
+    shed_before = metrics["admission_rejected"].get_value()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.post("/predict", json=CUSTOMER) for _ in range(4)))
+
+    responses = asyncio.run(scenario())
+    assert sorted(r.status_code for r in responses) == [200, 200, 503, 503]
+    for response in responses:
+        if response.status_code == 503:
+            assert int(response.headers["retry-after"]) >= 1
+            assert response.json()["reason"] == "queue_full"
+    assert metrics["admission_rejected"].get_value() == shed_before + 2
+
+    admission = client.get("/metrics").json()["admission"]
+    assert admission["in_flight"] == admission["queue_depth"] == 0
+    assert admission["rejected"]["queue_full"] == queue_full_before + 2
+    prometheus = client.get("/metrics/prometheus").text
+    assert "churn_prediction_admission_in_flight 0\n" in prometheus
+    assert "churn_prediction_admission_queue_depth 0\n" in prometheus
+
+def test_other_routes_bypass_admission_control(monkeypatch):
+    """Test that health checks are answered even with no slot free"""
+    import src.api.main as main
+
+    monkeypatch.setattr(main.admission, "max_in_flight", 1)
+    monkeypatch.setattr(main.admission, "max_queued", 0)
+    monkeypatch.setattr(main.admission, "_in_flight", 1)
+
+    assert client.get("/health").status_code in (200, 503)
+    response = client.post("/predict", json=CUSTOMER)
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
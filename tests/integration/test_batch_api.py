@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.utils.config import API_MAX_BATCH_SIZE
+
+client = TestClient(app)
+
+@pytest.fixture
+def customer():
+    return {
+        "credit_score": 619,
+        "country": "France",
+        "gender": "Female",
+        "age": 42,
+        "tenure": 2,
+        "balance": 0.0,
+        "products_number": 1,
+        "credit_card": 1,
+        "active_member": 1,
+        "estimated_salary": 101348.88
+    }
+
+def test_batch_matches_single_predictions(customer):
+    """Test that batch results are in input order and match /predict"""
+    customers = [customer, dict(customer, country="Germany", age=60), dict(customer, balance=120000.0)]
+
+    response = client.post("/predict/batch", json={"customers": customers})
+    assert response.status_code == 200
+
+    predictions = response.json()["predictions"]
+    assert [p["customer_index"] for p in predictions] == [0, 1, 2]
+    for item, prediction in zip(customers, predictions):
+        single = client.post("/predict", json=item).json()
+        assert prediction["churn_probability"] == pytest.approx(single["churn_probability"])
+        assert prediction["is_likely_to_churn"] == single["is_likely_to_churn"]
+        assert prediction["error"] is None
+
+def test_batch_reports_invalid_items(customer):
+    """Test that an invalid row fails alone instead of failing the batch"""
+    customers = [customer, {"credit_score": "invalid"}, customer]
+
+    response = client.post("/predict/batch", json={"customers": customers})
+    assert response.status_code == 200
+
+    predictions = response.json()["predictions"]
+    assert predictions[1]["error"]
+    assert predictions[1]["churn_probability"] is None
+    assert predictions[0]["churn_probability"] == predictions[2]["churn_probability"]
+
+def test_batch_size_limit(customer):
+    """Test that batches above the configured limit are rejected"""
+    customers = [customer] * (API_MAX_BATCH_SIZE + 1)
+
+    response = client.post("/predict/batch", json={"customers": customers})
+    assert response.status_code == 413
@@ -0,0 +1,114 @@
+import io
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+from src.utils.config import DATA_PATH
+
+client = TestClient(app)
+
+FIELDS = ["credit_score", "country", "gender", "age", "tenure", "balance",
+          "products_number", "credit_card", "active_member", "estimated_salary"]
+
+@pytest.fixture(scope="module")
+def customers():
+    return pd.read_csv(DATA_PATH, nrows=200)
+
+@pytest.fixture(scope="module")
+def expected(customers):
+    records = customers[FIELDS].to_dict(orient="records")
+    predictions = client.post("/predict/batch", json={"customers": records}).json()["predictions"]
+    return np.array([p["churn_probability"] for p in predictions])
+
+def test_json_columns(customers, expected):
+    """Test that one JSON array per field is scored like /predict/batch"""
+    payload = {field: customers[field].tolist() for field in FIELDS + ["customer_id"]}
+
+    response = client.post("/predict/columnar", json=payload)
+    assert response.status_code == 200
+
+    result = response.json()
+    assert result["customer_id"] == customers["customer_id"].tolist()
+    assert np.allclose(result["churn_probability"], expected)
+    assert result["is_likely_to_churn"] == (expected >= 0.5).tolist()
+
+def test_arrow_ipc(customers, expected):
+    """Test that an Arrow IPC stream returns an Arrow IPC stream"""
+    table = pa.Table.from_pandas(customers[FIELDS + ["customer_id"]], preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    response = client.post(
+        "/predict/columnar", content=sink.getvalue(),
+        headers={"content-type": "application/vnd.apache.arrow.stream"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+
+    result = pa.ipc.open_stream(response.content).read_all()
+    assert result.column("customer_id").to_pylist() == customers["customer_id"].tolist()
+    assert np.allclose(result.column("churn_probability").to_numpy(), expected)
+
+def test_npz(customers, expected):
+    """Test that a NumPy .npz body returns a .npz body"""
+    sink = io.BytesIO()
+    np.savez(sink, **{field: customers[field].to_numpy(dtype=str if field in ("country", "gender") else None)
+                      for field in FIELDS})
+
+    response = client.post("/predict/columnar", content=sink.getvalue(), headers={"content-type": "application/x-npz"})
+    assert response.status_code == 200
+
+    with np.load(io.BytesIO(response.content)) as result:
+        assert np.allclose(result["churn_probability"], expected)
+        assert "customer_id" not in result.files
+
+def test_invalid_columns_are_reported(customers):
+    """Test that vectorized validation reports every bad column and row"""
+    payload = {field: customers[field].tolist()[:5] for field in FIELDS}
+    payload["age"][3] = 41.5
+    payload["balance"] = payload["balance"][:4]
+    payload["gender"][1] = 7
+    del payload["country"]
+
+    response = client.post("/predict/columnar", json=payload)
+    assert response.status_code == 422
+
+    errors = {error["column"]: error for error in response.json()["detail"]}
+    assert errors["age"]["rows"] == [3]
+    assert errors["gender"]["rows"] == [1]
+    assert errors["country"]["error"] == "missing"
+
+def test_unsupported_content_type():
+    """Test that unknown payload formats are rejected"""
+    response = client.post("/predict/columnar", content=b"a,b", headers={"content-type": "text/csv"})
+    assert response.status_code == 415
+
+def test_missing_pyarrow_is_unsupported(customers, monkeypatch):
+    """Test that Arrow payloads get 415, not 422, when pyarrow is not installed"""
+    table = pa.Table.from_pandas(customers[FIELDS], preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    response = client.post(
+        "/predict/columnar", content=sink.getvalue(),
+        headers={"content-type": "application/vnd.apache.arrow.stream"}
+    )
+    assert response.status_code == 415
+
+def test_oversized_body_is_rejected_before_reading(customers, monkeypatch):
+    """Test that a body larger than API_MAX_COLUMNAR_BYTES gets 413, by Content-Length or while streaming"""
+    payload = {field: customers[field].tolist() for field in FIELDS}
+    monkeypatch.setattr(main, "API_MAX_COLUMNAR_BYTES", 1000)
+
+    assert client.post("/predict/columnar", json=payload).status_code == 413
+    chunked = (part for part in [b"{" + b" " * 600, b" " * 600 + b"}"])
+    response = client.post("/predict/columnar", content=chunked, headers={"content-type": "application/json"})
+    assert response.status_code == 413
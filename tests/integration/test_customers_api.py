@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.utils.config import DATA_PATH
+
+client = TestClient(app)
+
+@pytest.fixture
+def store(monkeypatch):
+    import src.api.main as main
+
+    store = main.open_customer_store()
+    monkeypatch.setattr(main, "customer_store", store)
+    return store
+
+def test_search_by_compound_filter(store):
+    """Test that /customers filters on categories and ranges and pages the result"""
+    customers = pd.read_csv(DATA_PATH)
+    expected = customers[
+        customers["country"].isin(["France", "Spain"])
+        & (customers["active_member"] == 0)
+        & customers["credit_score"].between(600, 700)
+    ]
+
+    response = client.get(
+        "/customers?country=France&country=Spain&active_member=0"
+        "&min_credit_score=600&max_credit_score=700&limit=5&offset=2"
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == len(expected)
+    assert [c["customer_id"] for c in body["customers"]] == expected["customer_id"].iloc[2:7].tolist()
+
+def test_get_customer_and_errors(store):
+    """Test lookups by id, unknown ids and unknown filters"""
+    customer = pd.read_csv(DATA_PATH, nrows=1).iloc[0]
+
+    response = client.get(f"/customers/{customer['customer_id']}")
+    assert response.status_code == 200
+    assert response.json()["balance"] == customer["balance"]
+    assert client.get("/customers/1").status_code == 404
+    assert client.get("/customers?surname=Smith").status_code == 422
+    assert client.get("/customers?active_member=yes").status_code == 422
+
+def test_churn_label_is_not_exposed(store):
+    """Test that the ground-truth churn label is neither returned nor filterable"""
+    customer_id = int(pd.read_csv(DATA_PATH, nrows=1)["customer_id"].iloc[0])
+
+    assert "churn" not in client.get(f"/customers/{customer_id}").json()
+    assert "churn" not in client.get("/customers?limit=1").json()["customers"][0]
+    assert client.get("/customers?min_churn=1").status_code == 422
+
+def test_not_loaded_is_503(monkeypatch):
+    """Test that searches get 503 with Retry-After until the store is loaded"""
+    import src.api.main as main
+
+    monkeypatch.setattr(main, "customer_store", None)
+    response = client.get("/customers?country=France")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+from src.utils.config import API_EXPLAIN_MAX_BATCH_SIZE
+
+client = TestClient(app)
+
+CUSTOMER = {
+    "credit_score": 619,
+    "country": "Germany",
+    "gender": "Female",
+    "age": 42,
+    "tenure": 2,
+    "balance": 120000.0,
+    "products_number": 3,
+    "credit_card": 1,
+    "active_member": 0,
+    "estimated_salary": 101348.88
+}
+
+def test_explain_single_customer():
+    """Test that /explain returns the prediction and per-field contributions"""
+    response = client.post("/explain", json=CUSTOMER)
+    assert response.status_code == 200
+    data = response.json()
+
+    prediction = client.post("/predict", json=CUSTOMER).json()
+    assert data["churn_probability"] == prediction["churn_probability"]
+    assert data["method"] in ("shap", "importance")
+    assert {c["feature"] for c in data["contributions"]} == set(CUSTOMER)
+
+def test_explain_top_k():
+    """Test that top_k limits the contributions and must be positive"""
+    response = client.post("/explain?top_k=2", json=CUSTOMER)
+    assert response.status_code == 200
+    assert len(response.json()["contributions"]) == 2
+
+    assert client.post("/explain?top_k=0", json=CUSTOMER).status_code == 422
+
+def test_explain_batch_keeps_order_and_errors():
+    """Test that invalid customers only fail their own item"""
+    customers = [CUSTOMER, {"age": "not a number"}, dict(CUSTOMER, age=30)]
+
+    response = client.post("/explain/batch?top_k=3", json={"customers": customers})
+    assert response.status_code == 200
+    explanations = response.json()["explanations"]
+
+    assert [e["customer_index"] for e in explanations] == [0, 1, 2]
+    assert explanations[1]["error"] is not None and explanations[1]["contributions"] is None
+    assert all(len(explanations[i]["contributions"]) == 3 for i in (0, 2))
+
+def test_explain_batch_size_limit():
+    """Test that oversized explanation batches are rejected"""
+    response = client.post("/explain/batch", json={"customers": [CUSTOMER] * (API_EXPLAIN_MAX_BATCH_SIZE + 1)})
+    assert response.status_code == 413
+
+def test_explainer_is_not_built_on_activation_by_default():
+    """Test that activating a model does not load the explainer unless EXPLAINER_PRELOAD is set"""
+    assert main.explanations.on_model_activated not in main.registry._listeners
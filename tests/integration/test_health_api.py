@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+
+def test_ready_after_warmup():
+    """Test that the API reports ready once the model is warmed up"""
+    with TestClient(app) as client:
+        # Scoring blocks until the background load and warm-up finish
+        client.get("/test-profiles")
+        response = client.get("/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert body["model_version"]
+    assert body["warmup"]["meets_target"] is True
+    assert body["warmup"]["p99_latency_ms"] <= body["warmup"]["latency_target_ms"]
+
+def test_health_reports_model_status():
+    """Test that /health reports the model version and warm-up latency"""
+    with TestClient(app) as client:
+        client.get("/test-profiles")
+        response = client.get("/health")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "healthy"
+    assert body["model_loaded"] is True
+    assert body["warmup"]["requests"] > 0
+
+def test_model_info_reports_active_version():
+    """Test that /model/info reports the active version and its timings"""
+    with TestClient(app) as client:
+        client.get("/test-profiles")
+        response = client.get("/model/info")
+
+    assert response.status_code == 200
+    info = response.json()
+    assert info["model_version"] in info["available_versions"]
+    assert info["load_ms"] > 0
+    assert info["warmup"]["duration_ms"] > 0
+
+def test_reload_unknown_version(monkeypatch):
+    """Test that reloading a version that does not exist is rejected"""
+    monkeypatch.setattr(main, "API_ADMIN_TOKEN", "secret")
+    with TestClient(app) as client:
+        response = client.post(
+            "/model/reload",
+            params={"version": "does-not-exist"},
+            headers={"Authorization": "Bearer secret"}
+        )
+
+    assert response.status_code == 404
+
+def test_reload_requires_admin_token(monkeypatch):
+    """Test that /model/reload is disabled without a token and rejects a wrong one"""
+    with TestClient(app) as client:
+        monkeypatch.setattr(main, "API_ADMIN_TOKEN", "")
+        disabled = client.post("/model/reload")
+        monkeypatch.setattr(main, "API_ADMIN_TOKEN", "secret")
+        missing = client.post("/model/reload")
+        wrong = client.post("/model/reload", headers={"Authorization": "Bearer guess"})
+
+    assert disabled.status_code == 403
+    assert missing.status_code == 401
+    assert wrong.status_code == 401
+    assert wrong.headers["WWW-Authenticate"] == "Bearer"
@@ -0,0 +1,73 @@
+from fastapi.testclient import TestClient
+from src.api.main import app, metrics
+
+client = TestClient(app)
+
+CUSTOMER = {
+    "credit_score": 619,
+    "country": "France",
+    "gender": "Female",
+    "age": 42,
+    "tenure": 2,
+    "balance": 0.0,
+    "products_number": 1,
+    "credit_card": 1,
+    "active_member": 1,
+    "estimated_salary": 101348.88
+}
+
+def test_predict_records_latency_once_and_every_stage():
+    """Test that /predict feeds one latency sample and all stage histograms"""
+    client.post("/predict", json=CUSTOMER)
+    latency_before = metrics["latency_histogram"].count
+    stages_before = {stage: metrics[f"stage_{stage}"].count for stage in ("parse", "validate", "queue", "encode", "predict_proba", "serialize")}
+
+    assert client.post("/predict", json=CUSTOMER).status_code == 200
+
+    assert metrics["latency_histogram"].count == latency_before + 1
+    for stage, count in stages_before.items():
+        assert metrics[f"stage_{stage}"].count == count + 1, stage
+
+def test_metrics_endpoints():
+    """Test the JSON and Prometheus metrics endpoints"""
+    client.post("/predict", json=CUSTOMER)
+
+    data = client.get("/metrics").json()
+    assert data["total_requests"] >= 1
+    assert data["latency_ms"]["p99"] is not None
+
+    response = client.get("/metrics/prometheus")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "churn_prediction_predict_stage_predict_proba_ms_count" in response.text
+
+def test_identical_concurrent_predictions_are_coalesced(monkeypatch):
+    """Test that concurrent /predict calls for the same customer share one inference"""
+    import asyncio
+    import time
+
+    import httpx
+    import src.api.main as main
+
+    calls = []
+    predict_one = main.predict_one
+
+    def slow_predict_one(customer_data, timer=None):
+        calls.append(customer_data)
+        time.sleep(0.2)
+        return predict_one(customer_data, timer)
+
+    monkeypatch.setattr(main, "predict_one", slow_predict_one)
+    coalesced_before = metrics["coalesced_counter"].get_value()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.post("/predict", json=CUSTOMER) for _ in range(5)))
+
+    responses = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200] * 5
+    assert len({r.text for r in responses}) == 1
+    assert len(calls) == 1
+    assert metrics["coalesced_counter"].get_value() == coalesced_before + 4
+    assert client.get("/metrics").json()["coalesced_requests"] == coalesced_before + 4
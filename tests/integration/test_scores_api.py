@@ -0,0 +1,46 @@
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.api.services.score_table import ScoreTableService
+from src.utils.config import DATA_PATH
+
+client = TestClient(app)
+
+def test_customer_score_served_from_table(monkeypatch, tmp_path):
+    """Test that /customers/{id}/score answers from the active version's table"""
+    import src.api.main as main
+
+    service = ScoreTableService(tmp_path, DATA_PATH)
+    monkeypatch.setattr(main, "score_tables", service)
+    predictor = main.get_predictor()
+
+    # No table for the active version yet
+    response = client.get("/customers/15634602/score")
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
+
+    service.on_model_activated(main.registry.active)
+    customer = pd.read_csv(DATA_PATH, nrows=1).iloc[0].to_dict()
+    response = client.get(f"/customers/{customer['customer_id']}/score")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["customer_id"] == customer["customer_id"]
+    assert body["model_version"] == predictor.model_version
+    predicted = client.post("/predict", json={
+        k: v for k, v in customer.items() if k not in ("customer_id", "churn")
+    }).json()
+    assert abs(body["churn_probability"] - predicted["churn_probability"]) < 1e-6
+    assert body["is_likely_to_churn"] == predicted["is_likely_to_churn"]
+    assert client.get("/metrics").json()["customer_scores"]["customers"] > 0
+
+def test_unknown_customer_is_404(monkeypatch, tmp_path):
+    """Test that an id missing from the table is a 404"""
+    import src.api.main as main
+
+    service = ScoreTableService(tmp_path, DATA_PATH)
+    monkeypatch.setattr(main, "score_tables", service)
+    main.get_predictor()
+    service.on_model_activated(main.registry.active)
+
+    assert client.get("/customers/1/score").status_code == 404
@@ -0,0 +1,42 @@
+import json
+
+from fastapi.testclient import TestClient
+from src.api.main import app
+
+client = TestClient(app)
+
+def test_stream_matches_batch_predictions():
+    """Test that /predict/stream scores a CSV file like /predict/batch"""
+    with open("Bank Customer Churn Prediction.csv") as f:
+        lines = [next(f) for _ in range(51)]
+
+    response = client.post("/predict/stream", content="".join(lines), headers={"content-type": "text/csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = response.text.splitlines()
+    assert len(rows) == 51
+    scored = [row.split(",") for row in rows[1:]]
+
+    header = lines[0].strip().split(",")
+    customers = [dict(zip(header, line.strip().split(","))) for line in lines[1:]]
+    assert [row[0] for row in scored] == [c["customer_id"] for c in customers]
+
+    batch = client.post("/predict/batch", json={"customers": customers}).json()["predictions"]
+    for row, prediction in zip(scored, batch):
+        assert float(row[1]) == prediction["churn_probability"]
+
+def test_stream_ndjson():
+    """Test that NDJSON input returns NDJSON rows and a summary"""
+    customer = {"customer_id": "abc", "credit_score": 619, "country": "France", "gender": "Female", "age": 42,
+                "tenure": 2, "balance": 0.0, "products_number": 1, "credit_card": 1, "active_member": 1,
+                "estimated_salary": 101348.88}
+    body = json.dumps(customer) + "\n" + json.dumps(customer) + "\n"
+
+    response = client.post("/predict/stream", content=body, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["customer_id"] for row in rows[:2]] == ["abc", "abc"]
+    assert rows[0]["churn_probability"] == rows[1]["churn_probability"]
+    assert rows[2]["summary"]["rows"] == 2
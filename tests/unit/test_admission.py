@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from src.api.services.admission import AdmissionController, Overloaded
+
+class FakeInstrument:
+    def __init__(self):
+        self.values = []
+
+    def add(self, amount):
+        self.values.append(amount)
+
+    def record(self, value):
+        self.values.append(value)
+
+def fake_metrics():
+    return {key: FakeInstrument() for key in
+            ("admission_in_flight", "admission_queue_depth", "admission_queue_wait", "admission_rejected")}
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_slots_are_capped_and_handed_over_in_order():
+    """Test that requests beyond the cap wait and get freed slots first come, first served"""
+    metrics = fake_metrics()
+    controller = AdmissionController(max_in_flight=2, max_queued=10, queue_timeout_ms=1000, metrics=metrics)
+    order = []
+
+    async def request(name):
+        await controller.acquire()
+        order.append(name)
+        await asyncio.sleep(0.02)
+        controller.release(0.02)
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(request(i)) for i in range(5)]
+        await asyncio.sleep(0.005)
+        assert controller.in_flight == 2 and controller.queue_depth == 3
+        await asyncio.gather(*tasks)
+
+    run(scenario())
+    assert order == [0, 1, 2, 3, 4]
+    assert controller.in_flight == controller.queue_depth == 0
+    assert sum(metrics["admission_in_flight"].values) == sum(metrics["admission_queue_depth"].values) == 0
+    assert controller.stats()["admitted"] == 5
+    assert controller.service_time == pytest.approx(0.02)
+
+def test_full_queue_is_rejected_with_retry_after():
+    """Test that a request finding the queue full is shed at once"""
+    metrics = fake_metrics()
+    controller = AdmissionController(max_in_flight=1, max_queued=1, queue_timeout_ms=1000, metrics=metrics)
+
+    async def scenario():
+        await controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire()
+        controller.release()
+        await waiting
+        controller.release()
+        return shed.value
+
+    shed = run(scenario())
+    assert shed.reason == "queue_full" and shed.retry_after >= 1
+    assert controller.stats()["rejected"] == {"queue_full": 1, "deadline": 0, "timeout": 0}
+    assert metrics["admission_rejected"].values == [1]
+
+def test_requests_that_cannot_meet_their_deadline_are_shed_early():
+    """Test that the expected wait is checked against the queue timeout and the client's deadline"""
+    controller = AdmissionController(max_in_flight=1, max_queued=10, queue_timeout_ms=1000)
+    controller.service_time = 0.4
+
+    async def scenario():
+        await controller.acquire()
+        first = asyncio.ensure_future(controller.acquire())
+        second = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        # Third in line: two holders ahead of it would need 1.2 s
+        with pytest.raises(Overloaded) as late:
+            await controller.acquire()
+        # The client allows 500 ms for the whole request, 400 of which it runs
+        with pytest.raises(Overloaded) as tight:
+            await controller.acquire(timeout_ms=500)
+        for task in (first, second):
+            controller.release()
+            await task
+        controller.release()
+        return late.value, tight.value
+
+    late, tight = run(scenario())
+    assert late.reason == tight.reason == "deadline"
+    assert late.retry_after == 2
+    assert controller.in_flight == controller.queue_depth == 0
+
+def test_waiters_leave_the_queue_on_timeout_and_cancellation():
+    """Test that expired and cancelled waiters free their place without taking a slot"""
+    metrics = fake_metrics()
+    controller = AdmissionController(max_in_flight=1, max_queued=10, queue_timeout_ms=20, metrics=metrics)
+
+    async def scenario():
+        await controller.acquire()
+        cancelled = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(Overloaded) as expired:
+            await controller.acquire()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert controller.queue_depth == 0
+        controller.release()
+        return expired.value
+
+    assert run(scenario()).reason == "timeout"
+    assert controller.in_flight == 0
+    assert sum(metrics["admission_queue_depth"].values) == 0
+    assert sum(metrics["admission_in_flight"].values) == 0
@@ -0,0 +1,113 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.utils.api_client import APIClient, EndpointsUnavailable
+
+class StubAPI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.connections.add(self.client_address)
+        self.server.calls.append(self.path)
+        if self.path == "/predict/batch":
+            payload = {"predictions": [
+                {"customer_index": i, "churn_probability": c["age"] / 100, "is_likely_to_churn": c["age"] > 50}
+                for i, c in enumerate(body["customers"])
+            ]}
+        else:
+            payload = {"churn_probability": body["age"] / 100, "is_likely_to_churn": body["age"] > 50}
+        data = json.dumps(payload).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+    server.connections, server.calls, server.status = set(), [], 200
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+def dead_url():
+    # A port nobody listens on: connections are refused at once
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+def test_reuses_connections(server):
+    """Test that sequential predictions share one keep-alive connection"""
+    client = APIClient([url(server)])
+    for age in range(20, 30):
+        _, response = client.predict({"age": age})
+        assert response.json()["churn_probability"] == age / 100
+
+    assert len(server.calls) == 10
+    assert len(server.connections) == 1
+    client.close()
+
+def test_dead_endpoint_is_skipped(server):
+    """Test that a refused endpoint falls back to the next and is not retried right away"""
+    dead = dead_url()
+    client = APIClient([dead, url(server)], retry_seconds=60)
+
+    assert client.predict({"age": 40})[0] == url(server)
+    assert client.candidates() == [url(server), dead]
+    status = client.status()
+    assert status[0]["available"] is False and status[0]["failures"] == 1
+    assert status[1]["available"] is True and status[1]["latency_ms"] is not None
+
+    client.predict({"age": 41})
+    assert client.status()[0]["failures"] == 1
+    client.close()
+
+def test_all_endpoints_down():
+    """Test that a connection error is raised when no endpoint answers"""
+    client = APIClient([dead_url()])
+    with pytest.raises(EndpointsUnavailable):
+        client.predict({"age": 40})
+    client.close()
+
+def test_overloaded_endpoint_moves_on(server):
+    """Test that a 503 tries the next endpoint and is returned when it is the only answer"""
+    overloaded = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+    overloaded.connections, overloaded.calls, overloaded.status = set(), [], 503
+    threading.Thread(target=overloaded.serve_forever, daemon=True).start()
+    try:
+        client = APIClient([url(overloaded), url(server)])
+        assert client.predict({"age": 40})[0] == url(server)
+        # A 503 is not a dead endpoint: it is still tried first
+        assert client.candidates()[0] == url(overloaded)
+
+        only = APIClient([url(overloaded)])
+        assert only.predict({"age": 40})[1].status_code == 503
+        client.close()
+        only.close()
+    finally:
+        overloaded.shutdown()
+        overloaded.server_close()
+
+def test_predict_many_fans_out_in_order(server):
+    """Test that many customers are scored with concurrent batch calls, in input order"""
+    client = APIClient([url(server)], batch_size=7, concurrency=3)
+    customers = [{"age": age} for age in range(18, 68)]
+
+    predictions = client.predict_many(customers)
+
+    assert [p["customer_index"] for p in predictions] == list(range(50))
+    assert [p["churn_probability"] for p in predictions] == [c["age"] / 100 for c in customers]
+    assert server.calls.count("/predict/batch") == 8
+    client.close()
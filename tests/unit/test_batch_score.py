@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+from src.api.services.prediction import ChurnPredictor
+from src.batch_score import score_file
+from src.utils.config import DATA_PATH
+
+@pytest.fixture
+def customers_csv(tmp_path):
+    path = tmp_path / "customers.csv"
+    pd.read_csv(DATA_PATH, nrows=250).to_csv(path, index=False)
+    return path
+
+def test_scores_every_row_in_order(customers_csv, tmp_path):
+    """Test that the part files hold every customer with the predictor's scores"""
+    output = tmp_path / "scores"
+    report = score_file(customers_csv, output, chunk_size=100, workers=2)
+
+    assert report["rows_scored"] == 250
+    assert report["chunks_scored"] == 3
+    assert sum(w["rows"] for w in report["workers"].values()) == 250
+
+    scores = pd.read_parquet(output)
+    customers = pd.read_csv(customers_csv)
+    assert scores["customer_id"].tolist() == customers["customer_id"].tolist()
+
+    predictor = ChurnPredictor()
+    expected = predictor.predict_proba(predictor.encoder.encode_columns(customers))
+    assert scores["churn_probability"].to_numpy() == pytest.approx(expected)
+    assert (scores["is_likely_to_churn"] == (expected >= 0.5)).all()
+
+def test_resumes_missing_chunks(customers_csv, tmp_path):
+    """Test that a second run only scores the chunks without a part file"""
+    output = tmp_path / "scores"
+    score_file(customers_csv, output, chunk_size=100, workers=1)
+    (output / "part-000001.parquet").unlink()
+
+    report = score_file(customers_csv, output, chunk_size=100, workers=1)
+    assert report["chunks_scored"] == 1
+    assert report["chunks_skipped"] == 2
+    assert len(pd.read_parquet(output)) == 250
+
+def test_refuses_to_mix_runs(customers_csv, tmp_path):
+    """Test that a different chunk size does not reuse existing parts"""
+    output = tmp_path / "scores"
+    score_file(customers_csv, output, chunk_size=100, workers=1)
+
+    with pytest.raises(ValueError):
+        score_file(customers_csv, output, chunk_size=50, workers=1)
+
+    report = score_file(customers_csv, output, chunk_size=50, workers=1, overwrite=True)
+    assert report["chunks_scored"] == 5
+    assert len(pd.read_parquet(output)) == 250
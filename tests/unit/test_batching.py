@@ -0,0 +1,89 @@
+import asyncio
+
+import numpy as np
+import pytest
+from src.api.services.batching import MicroBatcher
+
+class RecordingModel:
+    """Fake predict_batch that scores a customer by its age"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_batch(self, customers):
+        self.calls.append(len(customers))
+        probabilities = np.array([c["age"] / 100 for c in customers])
+        return probabilities, probabilities >= 0.5
+
+class FakeHistogram:
+    def __init__(self):
+        self.values = []
+
+    def record(self, value):
+        self.values.append(value)
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_concurrent_requests_share_one_call():
+    """Test that concurrent submissions are scored in a single batch"""
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=64, max_wait_ms=20)
+
+    async def scenario():
+        results = await asyncio.gather(*(batcher.submit({"age": age}) for age in range(10, 60)))
+        await batcher.stop()
+        return results
+
+    results = run(scenario())
+    assert model.calls == [50]
+    assert results == [(age / 100, age >= 50) for age in range(10, 60)]
+
+def test_flushes_at_max_batch_size():
+    """Test that batches never exceed max_batch_size"""
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=8, max_wait_ms=50)
+
+    async def scenario():
+        await asyncio.gather(*(batcher.submit({"age": 30}) for _ in range(20)))
+        await batcher.stop()
+
+    run(scenario())
+    assert model.calls == [8, 8, 4]
+
+def test_errors_reach_every_waiting_request():
+    """Test that a failing batch fails all of its requests"""
+    def failing(customers):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(failing, max_wait_ms=5)
+
+    async def scenario():
+        results = await asyncio.gather(
+            batcher.submit({"age": 30}), batcher.submit({"age": 40}), return_exceptions=True
+        )
+        await batcher.stop()
+        return results
+
+    results = run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+def test_records_batch_metrics():
+    """Test that batch size and queue wait are exported"""
+    model = RecordingModel()
+    metrics = {"batch_size_histogram": FakeHistogram(), "queue_wait_histogram": FakeHistogram()}
+    batcher = MicroBatcher(model.predict_batch, max_wait_ms=5, metrics=metrics)
+
+    async def scenario():
+        await asyncio.gather(*(batcher.submit({"age": 30}) for _ in range(3)))
+        await batcher.stop()
+
+    run(scenario())
+    assert metrics["batch_size_histogram"].values == [3]
+    assert len(metrics["queue_wait_histogram"].values) == 3
+    assert all(wait >= 0 for wait in metrics["queue_wait_histogram"].values)
+
+def test_rejects_invalid_batch_size():
+    """Test that a non-positive max_batch_size is refused"""
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingModel().predict_batch, max_batch_size=0)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from src.api.services.cache import PredictionCache
+
+@pytest.fixture
+def customer():
+    return {
+        "credit_score": 619,
+        "country": "France",
+        "gender": "Female",
+        "age": 42,
+        "tenure": 2,
+        "balance": 1234.56,
+        "products_number": 1,
+        "credit_card": 1,
+        "active_member": 1,
+        "estimated_salary": 101348.88
+    }
+
+def test_key_is_canonical(customer):
+    """Test that equivalent inputs share a key"""
+    cache = PredictionCache()
+    reordered = dict(reversed(list(customer.items())))
+    as_floats = dict(customer, credit_score=619.0, age=42.0)
+
+    assert cache.key(customer) == cache.key(reordered) == cache.key(as_floats)
+    assert cache.key(customer) != cache.key(dict(customer, country="Spain"))
+
+def test_key_rounding(customer):
+    """Test optional rounding of float fields"""
+    exact = PredictionCache()
+    rounded = PredictionCache(round_decimals={"balance": 0})
+    nearby = dict(customer, balance=1234.71)
+
+    assert exact.key(customer) != exact.key(nearby)
+    assert rounded.key(customer) == rounded.key(nearby)
+
+def test_hits_and_misses(customer):
+    """Test that stored probabilities are returned and counted"""
+    cache = PredictionCache()
+    key = cache.key(customer)
+
+    assert cache.get(key, "v1") is None
+    cache.put(key, 0.42, "v1")
+    assert cache.get(key, "v1") == 0.42
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_lru_eviction(customer):
+    """Test that the least recently used entry is evicted first"""
+    cache = PredictionCache(max_size=2)
+    keys = [cache.key(dict(customer, age=age)) for age in (30, 40, 50)]
+
+    cache.put(keys[0], 0.1, "v1")
+    cache.put(keys[1], 0.2, "v1")
+    cache.get(keys[0], "v1")
+    cache.put(keys[2], 0.3, "v1")
+
+    assert cache.get(keys[1], "v1") is None
+    assert cache.get(keys[0], "v1") == 0.1
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry(customer):
+    """Test that entries expire after the TTL"""
+    cache = PredictionCache(ttl_seconds=0.05)
+    key = cache.key(customer)
+    cache.put(key, 0.5, "v1")
+
+    time.sleep(0.1)
+    assert cache.get(key, "v1") is None
+    assert cache.stats()["size"] == 0
+
+def test_entries_are_kept_per_model_version(customer):
+    """Test that versions never see each other's entries and a new one does not clear the old"""
+    cache = PredictionCache()
+    key = cache.key(customer)
+    cache.put(key, 0.5, "v1")
+
+    assert cache.get(key, "v2") is None
+    cache.put(key, 0.7, "v2")
+    assert cache.get(key, "v1") == 0.5
+    assert cache.get(key, "v2") == 0.7
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,60 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from src.api.services.prediction import ChurnPredictor
+from src.compact_model import compact, select_trees, subset_forest
+from src.utils.config import DATA_PATH
+
+def test_select_trees_prefers_informative_trees():
+    """Test that greedy selection picks the trees that separate the classes"""
+    rng = np.random.default_rng(0)
+    y = np.repeat([0, 1], 100)
+    noise = rng.random((4, 200))
+    informative = y + rng.normal(0, 0.3, (2, 200))
+
+    selected = select_trees(np.vstack([noise[:2], informative, noise[2:]]), y, 2)
+
+    assert sorted(selected) == [2, 3]
+
+def test_subset_forest_averages_selected_trees():
+    """Test that a tree subset predicts the mean of its trees"""
+    df = pd.read_csv(DATA_PATH, nrows=300)
+    X, y = df[["credit_score", "age", "balance"]].to_numpy(), df["churn"]
+    model = RandomForestClassifier(n_estimators=6, random_state=0).fit(X, y)
+
+    subset = subset_forest(model, [1, 4])
+
+    expected = np.mean([model.estimators_[i].predict_proba(X)[:, 1] for i in (1, 4)], axis=0)
+    np.testing.assert_allclose(subset.predict_proba(X)[:, 1], expected)
+    assert len(model.estimators_) == 6
+
+@pytest.fixture
+def small_model_dir(tmp_path):
+    """Model directory holding a small forest with the serving feature layout"""
+    df = pd.read_csv(DATA_PATH, nrows=2000).drop(columns=["customer_id"])
+    X = pd.get_dummies(df.drop(columns=["churn"]), columns=["country", "gender"], drop_first=True)
+    model = RandomForestClassifier(n_estimators=8, random_state=42).fit(X, df["churn"])
+    joblib.dump(model, tmp_path / "random_forest_model.joblib")
+    joblib.dump(list(X.columns), tmp_path / "feature_names.joblib")
+    return tmp_path
+
+def test_compact_reports_and_saves_candidates(small_model_dir):
+    """Test that every candidate is measured and the chosen one is served as a new version"""
+    report = compact(small_model_dir, tree_counts=(3,), max_depths=(4,), min_leaf_sizes=(),
+                     save="depth-4", version="compact")
+
+    rows = {row["candidate"]: row for row in report}
+    assert list(rows) == ["baseline", "baseline-f32", "trees-3", "depth-4"]
+    assert rows["trees-3"]["trees"] == 3
+    assert rows["baseline-f32"]["memory_mb"] < rows["baseline"]["memory_mb"]
+    assert rows["baseline-f32"]["auc_change"] == pytest.approx(0, abs=1e-6)
+    assert rows["depth-4"]["nodes"] < rows["baseline"]["nodes"]
+    for row in report:
+        assert row["single_row_ms"] > 0 and row["batch_ms"] > 0 and 0.5 < row["auc"] <= 1
+
+    predictor = ChurnPredictor(model_dir=small_model_dir / "compact")
+    assert predictor.compiled.threshold.dtype == np.float32
+    X = predictor.encoder.encode_columns(pd.read_csv(DATA_PATH, nrows=100))
+    np.testing.assert_allclose(predictor.predict_proba(X), predictor.model.predict_proba(X)[:, 1], atol=1e-6)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.customer_store import CustomerStore
+from src.data.indexes import HashIndex
+from src.utils.config import DATA_PATH
+
+@pytest.fixture(scope="module")
+def customers():
+    return pd.read_csv(DATA_PATH)
+
+@pytest.fixture(scope="module")
+def store(customers):
+    return CustomerStore(customers)
+
+def scan(customers, **conditions):
+    mask = np.ones(len(customers), dtype=bool)
+    for column, condition in conditions.items():
+        if isinstance(condition, tuple):
+            low, high = condition
+            mask &= customers[column].between(
+                -np.inf if low is None else low, np.inf if high is None else high
+            ).to_numpy()
+        elif isinstance(condition, list):
+            mask &= customers[column].isin(condition).to_numpy()
+        else:
+            mask &= (customers[column] == condition).to_numpy()
+    return np.flatnonzero(mask)
+
+def test_hash_index_finds_keys():
+    """Test that single and vectorized lookups find every key and miss unknown ones"""
+    keys = np.random.default_rng(0).choice(10**12, size=20000, replace=False)
+    index = HashIndex(keys)
+
+    assert all(index.find(key) == row for row, key in enumerate(keys[:500]))
+    rows = index.find_many(np.concatenate([keys[::-1], [-5, 10**12 + 1]]))
+    assert np.array_equal(rows[:-2], np.arange(len(keys))[::-1])
+    assert rows[-2:].tolist() == [-1, -1]
+
+def test_get_by_id(store, customers):
+    """Test that records are found by customer_id and unknown ids miss"""
+    customer = customers.iloc[1234]
+
+    assert customer["customer_id"] in store
+    assert store.get(customer["customer_id"])["balance"] == customer["balance"]
+    assert 1 not in store
+    assert store.get(1) is None
+
+def test_excluded_columns_are_neither_returned_nor_indexed(customers):
+    """Test that excluded columns are dropped before indexing"""
+    store = CustomerStore(customers.head(100), exclude=("churn",))
+
+    assert "churn" not in store.get(int(customers["customer_id"].iloc[0]))
+    assert "churn" not in store.sorted
+
+@pytest.mark.parametrize("conditions", [
+    {},
+    {"country": ["France", "Spain"]},
+    {"gender": "Female", "active_member": 0, "credit_card": 1},
+    {"credit_score": (600, 700)},
+    {"balance": (None, 0.0), "age": (40, None)},
+    {"country": "Germany", "credit_score": (650, 850), "balance": (1000.0, 150000.0), "active_member": 1},
+    {"country": ["Italy"]},
+    {"products_number": 3, "gender": ["Male"]},
+])
+def test_query_matches_scan(store, customers, conditions):
+    """Test that indexed compound queries return the rows a full scan would"""
+    assert np.array_equal(store.query(**conditions), scan(customers, **conditions))
+
+def test_query_rejects_unindexed_column(store):
+    """Test that filtering on a column without an index is refused"""
+    with pytest.raises(ValueError):
+        # customer_id only has the hash index
+        store.query(customer_id=(0, 10))
+
+def test_duplicate_ids_keep_last_row(customers):
+    """Test that the last row of a repeated customer_id wins"""
+    repeated = customers.iloc[[1]].assign(customer_id=customers["customer_id"].iloc[0])
+    store = CustomerStore(pd.concat([customers.iloc[:10], repeated]))
+
+    assert len(store) == 10
+    assert store.get(customers["customer_id"].iloc[0])["age"] == customers["age"].iloc[1]
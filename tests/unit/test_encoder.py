@@ -0,0 +1,59 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from src.api.services.encoder import FeatureEncoder
+from src.utils.config import DATA_PATH, MODELS_PATH
+
+@pytest.fixture
+def feature_names():
+    return joblib.load(MODELS_PATH / "feature_names.joblib")
+
+@pytest.fixture
+def encoder(feature_names):
+    return FeatureEncoder(feature_names)
+
+@pytest.fixture
+def customers():
+    df = pd.read_csv(DATA_PATH, nrows=500)
+    return df.drop(columns=["customer_id", "churn"])
+
+def test_matches_training_encoding(encoder, feature_names, customers):
+    """Test that encoding matches get_dummies(drop_first=True) used in training"""
+    expected = pd.get_dummies(customers, columns=["country", "gender"], drop_first=True)
+    expected = expected[feature_names].to_numpy(dtype=np.float32)
+
+    np.testing.assert_array_equal(encoder.encode_many(customers.to_dict("records")), expected)
+    np.testing.assert_array_equal(encoder.encode_columns(customers), expected)
+
+def test_single_row_matches_batch(encoder, customers):
+    """Test that encoding one row gives the same row as encoding N rows"""
+    records = customers.to_dict("records")
+    batch = encoder.encode_many(records)
+
+    for i in (0, 1, len(records) - 1):
+        single = encoder.encode(records[i])
+        assert single.shape == (1, encoder.n_features)
+        np.testing.assert_array_equal(single[0], batch[i])
+
+def test_output_layout(encoder, customers):
+    """Test that the output is a contiguous float matrix"""
+    X = encoder.encode_many(customers.to_dict("records"))
+    assert X.flags["C_CONTIGUOUS"]
+    assert X.dtype == np.float32
+    assert X.shape == (len(customers), encoder.n_features)
+
+def test_unknown_category_is_baseline(encoder):
+    """Test that unseen categories encode like the dropped baseline"""
+    base = {
+        "credit_score": 650, "country": "France", "gender": "Female", "age": 40,
+        "tenure": 3, "balance": 1000.0, "products_number": 1, "credit_card": 1,
+        "active_member": 0, "estimated_salary": 50000.0
+    }
+    unknown = dict(base, country="Brazil")
+    np.testing.assert_array_equal(encoder.encode(base), encoder.encode(unknown))
+
+def test_rejects_unsupported_columns(feature_names):
+    """Test that the encoder refuses feature columns it cannot fill"""
+    with pytest.raises(ValueError):
+        FeatureEncoder(feature_names + ["unexpected_column"])
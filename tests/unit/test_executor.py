@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+from src.api.services.executor import InferenceExecutor
+
+class FakeInstrument:
+    def __init__(self):
+        self.values = []
+
+    def add(self, value):
+        self.values.append(value)
+
+    def record(self, value):
+        self.values.append(value)
+
+def test_event_loop_stays_responsive():
+    """Test that blocking inference does not stall other coroutines"""
+    executor = InferenceExecutor(max_workers=1)
+
+    async def scenario():
+        inference = asyncio.ensure_future(executor.run(time.sleep, 0.3))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        await inference
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.1
+    executor.shutdown()
+
+def test_pool_size_bounds_concurrency():
+    """Test that queued calls wait for a free worker"""
+    executor = InferenceExecutor(max_workers=2)
+    depths = []
+
+    async def scenario():
+        calls = [asyncio.ensure_future(executor.run(time.sleep, 0.1)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        depths.append((executor.running, executor.queue_depth))
+        await asyncio.gather(*calls)
+        depths.append((executor.running, executor.queue_depth))
+
+    asyncio.run(scenario())
+    assert depths == [(2, 3), (0, 0)]
+    executor.shutdown()
+
+def test_records_queue_metrics():
+    """Test that queue depth returns to zero and waits are recorded"""
+    metrics = {"inference_queue_depth": FakeInstrument(), "inference_queue_wait": FakeInstrument()}
+    executor = InferenceExecutor(max_workers=1, metrics=metrics)
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run(pow, 2, n) for n in range(4)))
+
+    assert asyncio.run(scenario()) == [1, 2, 4, 8]
+    assert sum(metrics["inference_queue_depth"].values) == 0
+    assert len(metrics["inference_queue_wait"].values) == 4
+    executor.shutdown()
+
+def test_propagates_exceptions():
+    """Test that errors raised by the inference function reach the caller"""
+    executor = InferenceExecutor(max_workers=1)
+
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(executor.run(lambda: 1 / 0))
+    executor.shutdown()
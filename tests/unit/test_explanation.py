@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from src.api.services.cache import PredictionCache
+from src.api.services.encoder import FeatureEncoder
+from src.api.services.explanation import FIELDS, ExplanationService, field_matrix
+from src.utils.config import DATA_PATH
+
+FEATURE_NAMES = ['credit_score', 'age', 'tenure', 'balance', 'products_number', 'credit_card',
+                 'active_member', 'estimated_salary', 'country_Germany', 'country_Spain', 'gender_Male']
+
+class SmallPredictor:
+    """ChurnPredictor stand-in with a small forest"""
+
+    def __init__(self, version="v1", n_estimators=5, model=None):
+        data = pd.read_csv(DATA_PATH, nrows=500)
+        self.customers = data[list(FIELDS)].to_dict(orient="records")
+        self.encoder = FeatureEncoder(FEATURE_NAMES)
+        X = self.encoder.encode_many(self.customers)
+        self.model = model or RandomForestClassifier(n_estimators=n_estimators, max_depth=6, random_state=0)
+        self.model.fit(X, data["churn"])
+        self.model_version = version
+        self.threshold = 0.5
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)[:, 1]
+
+@pytest.fixture(scope="module")
+def predictor():
+    return SmallPredictor()
+
+def test_field_matrix_sums_one_hot_columns():
+    """Test that one-hot columns are summed into their request field"""
+    matrix = field_matrix(FeatureEncoder(FEATURE_NAMES))
+    values = np.arange(len(FEATURE_NAMES), dtype=float)[None, :]
+    by_field = dict(zip(FIELDS, (values @ matrix)[0]))
+
+    assert by_field["age"] == 1
+    assert by_field["country"] == 8 + 9
+    assert by_field["gender"] == 10
+
+def test_shap_attributions_add_up_to_the_prediction(predictor):
+    """Test that exact attributions plus the base value give the probability"""
+    pytest.importorskip("shap")
+    service = ExplanationService(budget_ms=10000)
+
+    results = service.explain(predictor, predictor.customers[:20])
+
+    for result in results:
+        assert result["method"] == "shap"
+        assert {c["feature"] for c in result["contributions"]} == set(FIELDS)
+        total = result["base_value"] + sum(c["contribution"] for c in result["contributions"])
+        assert total == pytest.approx(result["churn_probability"], abs=1e-6)
+    assert service.stats()["exact_rows"] == 20
+
+def test_boosting_attributions_are_rescaled_to_probabilities():
+    """Test that log-odds attributions of a boosting model add up to its probability"""
+    pytest.importorskip("shap")
+    xgboost = pytest.importorskip("xgboost")
+    boosted = SmallPredictor(version="xgb", model=xgboost.XGBClassifier(n_estimators=20, max_depth=3))
+
+    results = ExplanationService(budget_ms=10000).explain(boosted, boosted.customers[:20])
+
+    assert 0 < results[0]["base_value"] < 1
+    for result in results:
+        assert result["method"] == "shap"
+        total = result["base_value"] + sum(c["contribution"] for c in result["contributions"])
+        assert total == pytest.approx(result["churn_probability"], abs=1e-6)
+
+def test_top_k_keeps_largest_contributions(predictor):
+    """Test that top_k returns the k largest absolute contributions, largest first"""
+    service = ExplanationService(budget_ms=10000)
+    full = service.explain(predictor, predictor.customers[:1])[0]["contributions"]
+    top = service.explain(predictor, predictor.customers[:1], top_k=3)[0]["contributions"]
+
+    magnitudes = [abs(c["contribution"]) for c in full]
+    assert magnitudes == sorted(magnitudes, reverse=True)
+    assert top == full[:3]
+    assert top[0]["value"] == predictor.customers[0][top[0]["feature"]]
+
+def test_exhausted_budget_falls_back_to_importances(predictor):
+    """Test that rows past the time budget get importance-based explanations"""
+    service = ExplanationService(budget_ms=0)
+
+    results = service.explain(predictor, predictor.customers[:5])
+
+    for result in results:
+        assert result["method"] == "importance"
+        total = result["base_value"] + sum(c["contribution"] for c in result["contributions"])
+        assert total == pytest.approx(result["churn_probability"])
+    assert service.stats()["fallback_rows"] == 5
+
+def test_exact_attributions_are_cached_per_model_version(predictor):
+    """Test that repeated customers hit the cache until the model version changes"""
+    pytest.importorskip("shap")
+    cache = PredictionCache()
+    service = ExplanationService(budget_ms=10000, cache=cache)
+    customers = predictor.customers[:10]
+
+    first = service.explain(predictor, customers)
+    assert service.explain(predictor, customers) == first
+    assert cache.stats()["hits"] == 10
+
+    retrained = SmallPredictor(version="v2", n_estimators=3)
+    service.explain(retrained, customers)
+    assert service.stats()["model_version"] == "v2"
+    assert cache.stats()["hits"] == 10
+    assert cache.stats()["size"] == 20
+
+def test_explainer_is_built_on_activation(predictor):
+    """Test that the registry listener builds the explainer before any request"""
+    service = ExplanationService()
+    service.on_model_activated(SimpleNamespace(predictor=predictor))
+
+    assert service.stats()["model_version"] == "v1"
+    assert service.explainer_for(predictor) is service._explainer
+
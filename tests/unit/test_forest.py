@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from src.api.services import forest
+from src.api.services.forest import CompiledForest
+from src.utils.config import DATA_PATH
+
+@pytest.fixture(scope="module")
+def data():
+    df = pd.read_csv(DATA_PATH, nrows=3000).drop(columns=["customer_id"])
+    X = pd.get_dummies(df.drop(columns=["churn"]), columns=["country", "gender"], drop_first=True)
+    return X.to_numpy(dtype=np.float32), df["churn"].to_numpy()
+
+@pytest.fixture(scope="module")
+def model(data):
+    X, y = data
+    # Unpruned trees like the serving model, just fewer of them
+    return RandomForestClassifier(n_estimators=20, random_state=42).fit(X[:2000], y[:2000])
+
+def test_matches_sklearn_probabilities(model, data):
+    """Test that the compiled engine reproduces predict_proba"""
+    X, _ = data
+    engine = CompiledForest.from_sklearn(model)
+
+    expected = model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(engine.predict_proba(X), expected, atol=1e-12)
+    np.testing.assert_allclose(engine.predict_proba(X[:1]), expected[:1], atol=1e-12)
+
+def test_parallel_and_serial_paths_agree(model, data, monkeypatch):
+    """Test that large and small inputs take equivalent paths"""
+    X, _ = data
+    engine = CompiledForest.from_sklearn(model)
+    parallel = engine.predict_proba(X)
+
+    monkeypatch.setattr(forest, "PARALLEL_MIN_ROWS", len(X) + 1)
+    np.testing.assert_allclose(engine.predict_proba(X), parallel, atol=1e-12)
+
+def test_pool_threads_stay_serial_until_threads_started(model, data, monkeypatch):
+    """Test that other threads do not start numba's threading layer themselves"""
+    X, _ = data
+    engine = CompiledForest.from_sklearn(model)
+    expected = engine.predict_proba(X)
+    monkeypatch.setattr(forest, "_threads_started", False)
+
+    def fail(*args):
+        raise AssertionError("parallel traversal started off the main thread")
+
+    monkeypatch.setattr(forest, "_predict_parallel", fail)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        np.testing.assert_allclose(pool.submit(engine.predict_proba, X).result(), expected, atol=1e-12)
+
+def test_one_inference_thread_keeps_the_traversal_serial(model, data, monkeypatch):
+    """Test that a single thread never runs (or starts) the parallel traversal"""
+    X, _ = data
+    engine = CompiledForest.from_sklearn(model)
+    expected = engine.predict_proba(X)
+    monkeypatch.setattr(forest, "_serial", False)
+    monkeypatch.setattr(forest, "_threads_started", False)
+
+    def fail(*args):
+        raise AssertionError("parallel traversal used with one inference thread")
+
+    monkeypatch.setattr(forest, "_predict_parallel", fail)
+    forest.set_inference_threads(1)
+    forest.start_inference_threads()
+    np.testing.assert_allclose(engine.predict_proba(X), expected, atol=1e-12)
+    assert not forest._threads_started
+
+def test_numpy_fallback(model, data, monkeypatch):
+    """Test the vectorized traversal used when numba is unavailable"""
+    X, _ = data
+    engine = CompiledForest.from_sklearn(model)
+    monkeypatch.setattr(forest, "njit", None)
+
+    np.testing.assert_allclose(engine.predict_proba(X), model.predict_proba(X)[:, 1], atol=1e-12)
+
+def test_node_arrays_are_flat(model):
+    """Test that every tree is stored in one set of contiguous arrays"""
+    engine = CompiledForest.from_sklearn(model)
+
+    assert engine.n_trees == len(model.estimators_)
+    assert engine.n_nodes == sum(e.tree_.node_count for e in model.estimators_)
+    for array in (engine.feature, engine.threshold, engine.left, engine.right, engine.value):
+        assert array.flags["C_CONTIGUOUS"]
+        assert len(array) == engine.n_nodes
+
+def test_memory_mapped_round_trip(model, data, tmp_path):
+    """Test that saved node arrays load memory-mapped and predict the same"""
+    X, _ = data
+    path = tmp_path / "nodes.joblib"
+    CompiledForest.from_sklearn(model).save(path, model_version="abc")
+
+    engine, metadata = CompiledForest.load(path)
+    assert metadata == {"model_version": "abc"}
+    assert isinstance(engine.threshold.base, np.memmap)
+    np.testing.assert_allclose(engine.predict_proba(X), model.predict_proba(X)[:, 1], atol=1e-12)
+
+def test_float32_copy_takes_the_same_branches(model, data):
+    """Test that float32 node arrays keep every split decision, even at the thresholds"""
+    X, _ = data
+    engine = CompiledForest.from_sklearn(model)
+    compact = engine.to_float32()
+
+    assert compact.threshold.dtype == compact.value.dtype == np.float32
+    assert compact.threshold.nbytes == engine.threshold.nbytes // 2
+    np.testing.assert_allclose(compact.predict_proba(X), engine.predict_proba(X), atol=1e-6)
+
+    # Values sitting exactly on the float32 neighbours of each threshold
+    t64 = engine.threshold[engine.left >= 0]
+    t32 = compact.threshold[engine.left >= 0]
+    below = t64.astype(np.float32)
+    for x in (below, np.nextafter(below, np.float32(np.inf)), np.nextafter(below, np.float32(-np.inf))):
+        np.testing.assert_array_equal(x <= t32, x.astype(np.float64) <= t64)
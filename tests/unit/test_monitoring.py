@@ -0,0 +1,159 @@
+import json
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+from src.monitoring import Histogram, MetricsRegistry, SnapshotWriter, setup_monitoring
+
+def test_histogram_quantiles_within_relative_accuracy():
+    """Test that p50/p90/p99/p999 stay within the configured relative error"""
+    values = np.random.default_rng(0).lognormal(mean=1.0, sigma=1.0, size=20000)
+    histogram = Histogram("latency", accuracy=0.01)
+    for value in values:
+        histogram.record(value)
+
+    summary = histogram.summary()
+    assert summary["count"] == len(values)
+    for key, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999)):
+        expected = np.quantile(values, q, method="lower")
+        assert summary[key] == pytest.approx(expected, rel=0.03)
+
+def test_histogram_zero_and_empty():
+    """Test zero values and quantiles of an empty histogram"""
+    histogram = Histogram("probability")
+    assert histogram.quantile(0.5) is None
+    for value in (0.0, 0.0, 0.0, 0.8):
+        histogram.record(value)
+    assert histogram.quantile(0.5) == 0.0
+    assert histogram.quantile(1.0) == pytest.approx(0.8, rel=0.01)
+
+def test_merged_histograms_match_a_single_one():
+    """Test that merging worker snapshots gives the same quantiles as one histogram"""
+    values = np.random.default_rng(1).exponential(10, size=3000)
+    single, first, second = Histogram("a"), Histogram("a"), Histogram("a")
+    for i, value in enumerate(values):
+        single.record(value)
+        (first if i % 2 else second).record(value)
+
+    first.merge(second.snapshot())
+    assert first.count == single.count
+    assert first.summary() == pytest.approx(single.summary())
+
+def test_concurrent_updates_are_not_lost():
+    """Test that counters and histograms are safe to update from many threads"""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "requests_total")
+    histogram = registry.histogram("latency", "request_latency", unit="ms")
+
+    def work():
+        for _ in range(2000):
+            counter.add(1)
+            histogram.record(1.5)
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.get_value() == 16000
+    assert histogram.count == 16000
+
+def test_prometheus_text():
+    """Test the exposition format of counters, gauges and summaries"""
+    registry = setup_monitoring("test", exporter="none")
+    registry["request_counter"].add(3)
+    registry["inference_queue_depth"].add(2)
+    registry["inference_queue_depth"].add(-1)
+    registry["latency_histogram"].record(12.0)
+
+    text = registry.prometheus_text()
+    assert "# TYPE churn_prediction_requests_total counter\nchurn_prediction_requests_total 3\n" in text
+    assert "churn_prediction_inference_queue_depth 1\n" in text
+    assert "# TYPE churn_prediction_request_latency_ms summary" in text
+    assert 'churn_prediction_request_latency_ms{quantile="0.99"} ' in text
+    assert "churn_prediction_request_latency_ms_count 1\n" in text
+
+def test_sinks_receive_every_measurement():
+    """Test that a pluggable sink mirrors the local instruments"""
+    class RecordingSink:
+        def __init__(self):
+            self.calls = []
+
+        def create(self, kind, name, description, unit):
+            sink = self
+            class Instrument:
+                def add(self, amount, attributes=None):
+                    sink.calls.append((name, amount))
+                def record(self, value, attributes=None):
+                    sink.calls.append((name, value))
+            return Instrument()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "requests_total")
+    sink = RecordingSink()
+    registry.add_sink(sink)
+    histogram = registry.histogram("latency", "request_latency")
+
+    counter.add(2)
+    histogram.record(5.0)
+    assert sink.calls == [("requests_total", 2), ("request_latency", 5.0)]
+    assert counter.get_value() == 2
+
+def test_record_many_matches_record():
+    """Test that recording an array at once matches recording each value"""
+    values = np.concatenate([[0.0, 0.0], np.random.default_rng(2).uniform(0, 1, size=500)])
+    one_by_one, at_once = Histogram("p"), Histogram("p")
+    for value in values:
+        one_by_one.record(value)
+    at_once.record_many(values)
+
+    assert at_once.buckets == one_by_one.buckets
+    assert at_once.zero_count == one_by_one.zero_count == 2
+    assert at_once.sum == pytest.approx(one_by_one.sum)
+    assert (at_once.min, at_once.max) == (one_by_one.min, one_by_one.max)
+
+def test_snapshot_writer_sums_the_workers(tmp_path):
+    """Test that aggregate() adds the snapshots of other workers, gauges of live ones only"""
+    local, other = setup_monitoring("local"), setup_monitoring("other")
+    local["request_counter"].add(2)
+    other["request_counter"].add(3)
+    local["admission_in_flight"].add(1)
+    other["admission_in_flight"].add(4)
+    other["latency_histogram"].record(10.0)
+    writer = SnapshotWriter(local, tmp_path)
+    SnapshotWriter(other, tmp_path).write()
+
+    merged = writer.aggregate()
+    assert merged["request_counter"].get_value() == 5
+    assert merged["admission_in_flight"].get_value() == 5
+    assert merged["latency_histogram"].count == 1
+    assert local["request_counter"].get_value() == 2
+
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    (tmp_path / f"{int(exited.stdout)}-exited.json").write_text(json.dumps(other.snapshot()))
+    merged = writer.aggregate()
+    assert merged["request_counter"].get_value() == 8
+    assert merged["admission_in_flight"].get_value() == 5
+
+
+def test_snapshot_writer_retires_exited_workers(tmp_path):
+    """Test that exited workers are folded into one file, keeping counters and dropping gauges"""
+    local, other = setup_monitoring("local"), setup_monitoring("other")
+    local["request_counter"].add(2)
+    other["request_counter"].add(3)
+    other["admission_in_flight"].add(4)
+    writer = SnapshotWriter(local, tmp_path)
+    writer.write()
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    (tmp_path / f"{int(exited.stdout)}-exited.json").write_text(json.dumps(other.snapshot()))
+    stopped = SnapshotWriter(other, tmp_path)
+    stopped.start()
+    stopped.stop()
+
+    for _ in range(2):
+        merged = writer.aggregate()
+        assert merged["request_counter"].get_value() == 8
+        assert merged["admission_in_flight"].get_value() == 0
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == sorted(["retired.json", writer.path.name])
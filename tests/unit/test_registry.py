@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from src.api.services.registry import ModelRegistry
+from src.utils.config import DATA_PATH, MODELS_PATH
+
+@pytest.fixture(scope="module")
+def training_data():
+    feature_names = joblib.load(MODELS_PATH / "feature_names.joblib")
+    df = pd.read_csv(DATA_PATH, nrows=1000)
+    X = pd.get_dummies(df.drop(columns=["customer_id", "churn"]), columns=["country", "gender"], drop_first=True)
+    return X[feature_names], df["churn"], feature_names
+
+def write_version(path, training_data, n_estimators, modified_at):
+    X, y, feature_names = training_data
+    path.mkdir()
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=0).fit(X, y)
+    joblib.dump(model, path / "random_forest_model.joblib")
+    joblib.dump(feature_names, path / "feature_names.joblib")
+    (path / "metadata.json").write_text(json.dumps({"trained_at": str(modified_at)}))
+    os.utime(path / "random_forest_model.joblib", (modified_at, modified_at))
+
+@pytest.fixture
+def models_dir(tmp_path, training_data):
+    write_version(tmp_path / "v1", training_data, 3, 1_000)
+    write_version(tmp_path / "v2", training_data, 5, 2_000)
+    return tmp_path
+
+@pytest.fixture
+def registry(models_dir):
+    return ModelRegistry(models_dir, warmup_requests=5, latency_target_ms=1000)
+
+def test_lists_versions_oldest_first(registry):
+    """Test that versions are discovered and ordered by modification time"""
+    assert [v["version"] for v in registry.versions()] == ["v1", "v2"]
+
+def test_loads_latest_on_first_use(registry):
+    """Test that the latest version is loaded and warmed up on first use"""
+    predictor = registry.get_predictor()
+
+    assert registry.active.version == "v2"
+    assert predictor.compiled.n_trees == 5
+    assert registry.active.warmup["requests"] >= 5
+    assert registry.active.info()["last_trained"] == "2000"
+
+def test_swap_keeps_in_flight_predictor(registry, training_data):
+    """Test that reloading swaps atomically without touching the old predictor"""
+    X, _, _ = training_data
+    old = registry.get_predictor()
+    before = old.predict_proba(X.to_numpy(dtype=np.float32))
+
+    registry.load("v1")
+
+    assert registry.get_predictor() is not old
+    assert registry.active.version == "v1"
+    np.testing.assert_array_equal(old.predict_proba(X.to_numpy(dtype=np.float32)), before)
+
+def test_unknown_version(registry):
+    """Test that loading a missing version fails without changing the active model"""
+    registry.load()
+    with pytest.raises(ValueError):
+        registry.load("v9")
+    assert registry.active.version == "v2"
+
+def test_skips_versions_being_written(models_dir, training_data):
+    """Test that hidden directories are not treated as versions"""
+    write_version(models_dir / ".v3.tmp", training_data, 2, 3_000)
+    registry = ModelRegistry(models_dir)
+    assert [v["version"] for v in registry.versions()] == ["v1", "v2"]
+
+def test_deferred_listeners_run_once_per_activation(registry):
+    """Test that a load without notification leaves the listeners to notify_listeners"""
+    activated = []
+    registry.add_listener(lambda loaded: activated.append(loaded.version))
+
+    registry.load(notify=False)
+    assert activated == []
+    registry.notify_listeners()
+    registry.notify_listeners()
+    assert activated == ["v2"]
+
+    registry.load("v1")
+    assert activated == ["v2", "v1"]
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_watcher_keeps_rollbacks_and_skips_failed_versions(registry, models_dir, training_data):
+    """Test that polling neither undoes a manual rollback nor retries a broken version"""
+    registry.load()
+    registry.load("v1")
+    broken = models_dir / "v3"
+    broken.mkdir()
+    (broken / "random_forest_model.joblib").write_bytes(b"not a model")
+    os.utime(broken / "random_forest_model.joblib", (3_000, 3_000))
+    attempts = []
+    load = registry.load
+    registry.load = lambda version=None, notify=True: attempts.append(version) or load(version, notify)
+
+    registry.start_watching(0.01)
+    try:
+        wait_for(lambda: registry.last_error is not None)
+        time.sleep(0.2)
+        assert attempts == ["v3"]
+        assert registry.active.version == "v1"
+
+        write_version(models_dir / "v4", training_data, 2, 4_000)
+        wait_for(lambda: registry.active.version == "v4")
+        time.sleep(0.2)
+        assert attempts == ["v3", "v4"]
+    finally:
+        registry.stop_watching()
+
+def test_concurrent_reloads_start_once(registry):
+    """Test that only one of several simultaneous reload requests starts a load"""
+    registry.load()
+    barrier = threading.Barrier(8)
+    started = []
+
+    def request():
+        barrier.wait()
+        started.append(registry.reload_in_background("v1"))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert started.count(True) == 1
+    wait_for(lambda: registry.active.version == "v1")
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.api.services.prediction import ChurnPredictor
+from src.api.services.score_table import ScoreTable, ScoreTableService
+from src.utils.config import DATA_PATH, MODELS_PATH
+
+@pytest.fixture(scope="module")
+def predictor():
+    return ChurnPredictor(model_dir=MODELS_PATH)
+
+@pytest.fixture
+def data_path(tmp_path):
+    df = pd.read_csv(DATA_PATH, nrows=300)
+    # The last row repeats the first customer with another profile
+    duplicate = df.iloc[[1]].assign(customer_id=df["customer_id"].iloc[0])
+    path = tmp_path / "customers.csv"
+    pd.concat([df, duplicate]).to_csv(path, index=False)
+    return path
+
+def test_index_finds_every_id():
+    """Test that every key of the hash index is found and unknown keys miss"""
+    rng = np.random.default_rng(0)
+    ids = rng.choice(10**9, size=5000, replace=False)
+    table = ScoreTable(ids, ids / 10**9, ids > 5 * 10**8, "v", "now")
+
+    for i in rng.choice(len(ids), size=500, replace=False):
+        assert table.lookup(ids[i]) == (ids[i] / 10**9, bool(ids[i] > 5 * 10**8))
+    assert table.lookup(10**9 + 1) is None
+
+def test_build_matches_predictor(predictor, data_path):
+    """Test that the table holds the predictor's score of each customer, last row winning"""
+    table = ScoreTable.build(predictor, data_path, chunk_rows=128)
+    df = pd.read_csv(data_path)
+    expected = predictor.predict_proba(predictor.encoder.encode_columns(df))
+
+    assert len(table) == 300
+    assert table.model_version == predictor.model_version
+    assert table.lookup(df["customer_id"].iloc[5]) == (expected[5], bool(expected[5] >= predictor.threshold))
+    assert table.lookup(df["customer_id"].iloc[0])[0] == expected[-1]
+
+def test_save_load_memory_mapped(predictor, data_path, tmp_path):
+    """Test that a saved table loads memory-mapped with the same lookups"""
+    table = ScoreTable.build(predictor, data_path)
+    table.save(tmp_path / "scores.joblib")
+    loaded = ScoreTable.load(tmp_path / "scores.joblib")
+
+    assert isinstance(loaded.index.slots, np.memmap)
+    for customer_id in table.customer_ids[:50]:
+        assert loaded.lookup(customer_id) == table.lookup(customer_id)
+
+def test_service_builds_each_version_once(predictor, data_path, tmp_path, monkeypatch):
+    """Test that the service reuses the stored table of a version instead of rescoring"""
+    service = ScoreTableService(tmp_path / "scores", data_path)
+    table = service.refresh(predictor)
+
+    assert service.table_for(predictor.model_version) is table
+    assert service.path_for(predictor.model_version).exists()
+
+    monkeypatch.setattr(ScoreTable, "build", lambda *args: pytest.fail("table rebuilt"))
+    other = ScoreTableService(tmp_path / "scores", data_path)
+    assert len(other.refresh(predictor)) == len(table)
+    assert other.status()["model_version"] == predictor.model_version
+
+def test_service_rescores_a_changed_customer_file(predictor, data_path, tmp_path):
+    """Test that a table is not reused for the same model once the customer file changes"""
+    service = ScoreTableService(tmp_path / "scores", data_path)
+    before = service.refresh(predictor)
+
+    df = pd.read_csv(data_path)
+    df.iloc[:100].to_csv(data_path, index=False)
+    after = service.refresh(predictor)
+
+    assert after is not before
+    assert after.data_version != before.data_version
+    assert len(after) == 100
+    assert len(list((tmp_path / "scores").glob("scores-*.joblib"))) == 2
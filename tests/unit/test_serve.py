@@ -0,0 +1,36 @@
+import os
+
+import pytest
+from src.serve import assign_cpu, process_memory, server_options
+
+def test_assign_cpu_spreads_workers():
+    """Test that new workers go to the least used CPU, lowest first"""
+    assert assign_cpu([0, 1, 2], []) == 0
+    assert assign_cpu([0, 1, 2], [0, 1]) == 2
+    assert assign_cpu([0, 1, 2], [0, 1, 2, 0]) == 1
+
+def test_assign_cpu_reuses_cpu_of_recycled_worker():
+    """Test that a replacement worker takes the CPU freed by the one it replaces"""
+    # Workers on 0, 1 and 3; the worker on CPU 2 has just been recycled
+    assert assign_cpu([0, 1, 2, 3], [0, 1, 3, None]) == 2
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="requires Linux /proc")
+def test_process_memory_reports_current_process():
+    """Test that the memory report reads RSS, PSS and USS of the process"""
+    usage = process_memory()
+    assert set(usage) == {"rss", "pss", "uss", "shared"}
+    assert 0 < usage["uss"] <= usage["pss"] <= usage["rss"]
+
+def test_process_memory_unknown_process():
+    """Test that an unreadable process gives an empty report"""
+    assert process_memory("no-such-process") == {}
+
+def test_server_options_preload_and_recycling():
+    """Test that the app is preloaded and recycling jitter is dropped when recycling is off"""
+    options = server_options(host="127.0.0.1", port=9000, workers=3, max_requests=1000, max_requests_jitter=50)
+    assert options["bind"] == "127.0.0.1:9000"
+    assert options["workers"] == 3
+    assert options["preload_app"] is True
+    assert (options["max_requests"], options["max_requests_jitter"]) == (1000, 50)
+
+    assert server_options(max_requests=0, max_requests_jitter=50)["max_requests_jitter"] == 0
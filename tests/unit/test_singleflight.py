@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from src.api.services.singleflight import SingleFlight
+from src.api.services.timing import StageTimer
+
+class FakeCounter:
+    def __init__(self):
+        self.value = 0
+
+    def add(self, amount):
+        self.value += amount
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_concurrent_calls_share_one_computation():
+    """Test that identical concurrent calls run once and all get the result"""
+    counter = FakeCounter()
+    flight = SingleFlight(counter)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 0.42, False
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("customer", compute) for _ in range(10)))
+
+    assert run(scenario()) == [(0.42, False)] * 10
+    assert len(calls) == 1
+    assert flight.coalesced == counter.value == 9
+    assert flight.in_flight == 0
+
+def test_different_keys_and_later_calls_run_separately():
+    """Test that only concurrent calls with equal keys are coalesced"""
+    flight = SingleFlight()
+    calls = []
+
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def scenario():
+        first = await asyncio.gather(flight.run("a", lambda: compute("a")), flight.run("b", lambda: compute("b")))
+        second = await flight.run("a", lambda: compute("a"))
+        return first, second
+
+    assert run(scenario()) == (["a", "b"], "a")
+    assert calls == ["a", "b", "a"]
+    assert flight.coalesced == 0
+
+def test_errors_reach_every_caller():
+    """Test that a failing computation fails all coalesced calls"""
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model unavailable")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("customer", failing) for _ in range(3)), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight == 0
+
+def test_cancelled_leader_does_not_cancel_followers():
+    """Test that followers still get the result when the leader's client goes away"""
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.run("customer", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run("customer", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert run(scenario()) == "done"
+
+def test_follower_wait_is_charged_to_queue_stage():
+    """Test that a coalesced call records its wait in the queue stage"""
+    flight = SingleFlight()
+    timer = StageTimer()
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        return 1
+
+    async def scenario():
+        await asyncio.gather(flight.run("customer", compute), flight.run("customer", compute, timer))
+
+    run(scenario())
+    assert timer.durations["queue"] == pytest.approx(0.02, abs=0.015)
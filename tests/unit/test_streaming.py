@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from src.api.services.streaming import StreamScorer, detect_format
+
+CSV_HEADER = "customer_id,credit_score,country,gender,age,tenure,balance,products_number,credit_card,active_member,estimated_salary,churn\n"
+
+def csv_row(customer_id, age):
+    return f"{customer_id},619,France,Female,{age},2,0.0,1,1,1,101348.88,1\n"
+
+class RecordingModel:
+    """Fake scorer that scores a customer by its age"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def score(self, customers):
+        self.calls.append(len(customers))
+        probabilities = np.array([c["age"] / 100 for c in customers])
+        return probabilities, probabilities >= 0.5
+
+def run(scorer, body, piece=7):
+    """Feed the body in small pieces, splitting lines and characters"""
+    async def chunks():
+        data = body.encode("utf-8")
+        for i in range(0, len(data), piece):
+            yield data[i:i + piece]
+
+    async def collect():
+        return "".join([text async for text in scorer.stream(chunks())])
+
+    return asyncio.run(collect())
+
+def test_csv_is_scored_in_fixed_size_chunks():
+    """Test that CSV rows keep their order and are scored chunk_size at a time"""
+    model = RecordingModel()
+    scorer = StreamScorer(model.score, fmt="csv", chunk_size=4)
+    body = CSV_HEADER + "".join(csv_row(1000 + i, 20 + 5 * i) for i in range(10))
+
+    lines = run(scorer, body).splitlines()
+
+    assert model.calls == [4, 4, 2]
+    assert lines[0] == "customer_id,churn_probability,is_likely_to_churn,error"
+    assert lines[1] == "1000,0.2,0,"
+    assert lines[10] == "1009,0.65,1,"
+    assert len(lines) == 11
+    assert scorer.summary["rows"] == 10
+    assert scorer.summary["rows_per_second"] > 0
+
+def test_ndjson_reports_invalid_rows():
+    """Test that malformed or incomplete NDJSON rows fail alone"""
+    model = RecordingModel()
+    scorer = StreamScorer(model.score, fmt="ndjson", chunk_size=100)
+    customer = {"customer_id": 7, "credit_score": 600, "country": "Spain", "gender": "Male", "age": 40,
+                "tenure": 3, "balance": 0, "products_number": 2, "credit_card": 1, "active_member": 1,
+                "estimated_salary": 5000}
+    body = "\n".join([json.dumps(customer), json.dumps({"customer_id": 8, "age": 30}), "{not json", ""])
+
+    rows = [json.loads(line) for line in run(scorer, body).splitlines()]
+
+    assert rows[0] == {"customer_id": 7, "churn_probability": 0.4, "is_likely_to_churn": False, "error": None}
+    assert rows[1]["customer_id"] == 8 and rows[1]["error"]
+    assert rows[2]["customer_id"] is None and rows[2]["error"].startswith("Invalid JSON")
+    assert rows[3]["summary"]["rows"] == 3
+    assert rows[3]["summary"]["errors"] == 2
+    assert model.calls == [1]
+
+def test_ndjson_rows_that_are_not_objects_fail_alone():
+    """Test that JSON values other than objects are reported per row"""
+    model = RecordingModel()
+    scorer = StreamScorer(model.score, fmt="ndjson", chunk_size=100)
+    body = "\n".join(["5", "[1, 2]", '"text"', "null"])
+
+    rows = [json.loads(line) for line in run(scorer, body).splitlines()]
+
+    assert [row["error"] for row in rows[:4]] == [
+        "Expected a JSON object, got int",
+        "Expected a JSON object, got list",
+        "Expected a JSON object, got str",
+        "Expected a JSON object, got NoneType"
+    ]
+    assert rows[4]["summary"]["errors"] == 4
+    assert model.calls == []
+
+def test_overlong_lines_fail_alone():
+    """Test that lines above max_line_length become row errors without being buffered"""
+    model = RecordingModel()
+    scorer = StreamScorer(model.score, fmt="csv", chunk_size=100, max_line_length=200)
+    body = CSV_HEADER + csv_row(1, 30) + "9" * 1000 + "\n" + csv_row(2, 60) + "8" * 1000
+
+    lines = run(scorer, body, piece=64).splitlines()
+
+    assert lines[1:] == [
+        "1,0.3,0,",
+        ",,,Line longer than 200 characters",
+        "2,0.6,1,",
+        ",,,Line longer than 200 characters"
+    ]
+    assert scorer.summary["errors"] == 2
+
+def test_detect_format():
+    """Test that only CSV content types switch away from NDJSON"""
+    assert detect_format("text/csv; charset=utf-8") == "csv"
+    assert detect_format("application/x-ndjson") == "ndjson"
+    assert detect_format(None) == "ndjson"
+    with pytest.raises(ValueError):
+        StreamScorer(RecordingModel().score, fmt="xml")
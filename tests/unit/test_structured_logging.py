@@ -0,0 +1,106 @@
+import json
+import logging
+import queue
+import threading
+
+import pytest
+from src.utils.structured_logging import AsyncLogWriter, DroppingQueueHandler, JsonFormatter, StructuredLogger
+
+class ListHandler(logging.Handler):
+    """Handler keeping the formatted records"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+@pytest.fixture
+def captured():
+    handler = ListHandler()
+    handler.setFormatter(JsonFormatter())
+    writer = AsyncLogWriter([handler], queue_size=100)
+    logger = logging.getLogger("test_structured_logging")
+    logger.handlers = [writer.handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    writer.start()
+    yield logger, writer, handler
+    writer.stop()
+
+def test_events_are_written_as_json(captured):
+    """Test that events go through the writer thread as JSON lines"""
+    logger, writer, handler = captured
+    events = StructuredLogger(logger.name, sample_rates={})
+
+    events.info("prediction", {"churn_probability": 0.25})
+    writer.stop()
+
+    entry = json.loads(handler.lines[0])
+    assert entry["message"] == "prediction"
+    assert entry["event"] == "prediction"
+    assert entry["churn_probability"] == 0.25
+    assert entry["level"] == "INFO"
+
+def test_payload_is_built_only_when_emitted(captured):
+    """Test that disabled and sampled-out events never call the payload"""
+    logger, writer, handler = captured
+    calls = []
+    def payload():
+        calls.append(1)
+        return {}
+
+    StructuredLogger(logger.name, sample_rates={}).debug("below_level", payload)
+    StructuredLogger(logger.name, sample_rates={"INFO": 0}).info("sampled_out", payload)
+    assert calls == []
+
+    StructuredLogger(logger.name, sample_rates={"INFO": 1}).info("kept", payload)
+    writer.stop()
+    assert calls == [1]
+    assert len(handler.lines) == 1
+
+def test_sampling_rate_is_recorded(captured):
+    """Test that roughly the configured fraction is kept and tagged with its rate"""
+    logger, writer, handler = captured
+    events = StructuredLogger(logger.name, sample_rates={"INFO": 0.5})
+
+    for _ in range(80):
+        events.info("prediction")
+    writer.stop()
+
+    assert 10 < len(handler.lines) < 70
+    assert all(json.loads(line)["sample_rate"] == 0.5 for line in handler.lines)
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test that records beyond the queue capacity are dropped and counted"""
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger("test_structured_logging.full")
+    logger.handlers = [handler]
+    logger.propagate = False
+
+    done = threading.Event()
+    def log_many():
+        for i in range(5):
+            logger.warning("record %d", i)
+        done.set()
+    threading.Thread(target=log_many).start()
+
+    assert done.wait(1)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+def test_writer_restarts_after_fork(captured):
+    """Test that after_fork gives the writer a new queue and listener that keep writing"""
+    logger, writer, handler = captured
+    old_queue, old_listener = writer.queue, writer.listener
+    events = StructuredLogger(logger.name, sample_rates={})
+
+    writer.after_fork()
+    events.info("after_fork")
+    writer.stop()
+
+    assert writer.queue is not old_queue
+    assert writer.listener is not old_listener
+    assert writer.handler.queue is writer.queue
+    assert json.loads(handler.lines[-1])["event"] == "after_fork"
@@ -0,0 +1,64 @@
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from src.api.services.timing import StageTimer, current_timer, stage_histograms, timed_route
+from src.monitoring import MetricsRegistry
+
+class Item(BaseModel):
+    value: int
+
+def make_client(server_timing):
+    histograms = stage_histograms(MetricsRegistry())
+    router = APIRouter(route_class=timed_route(histograms, server_timing))
+
+    @router.post("/echo")
+    async def echo(item: Item):
+        timer = current_timer()
+        timer.lap("validate")
+        time.sleep(0.01)
+        timer.lap("predict_proba")
+        return {"value": item.value}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app), histograms
+
+def test_stages_are_recorded_per_histogram():
+    """Test that each lap feeds the histogram of its stage"""
+    client, histograms = make_client(server_timing=False)
+
+    response = client.post("/echo", json={"value": 3})
+    assert response.json() == {"value": 3}
+    assert "server-timing" not in response.headers
+
+    for stage in ("parse", "validate", "predict_proba", "serialize"):
+        assert histograms[stage].count == 1
+    assert histograms["encode"].count == 0
+    assert histograms["predict_proba"].quantile(0.5) >= 10
+
+def test_server_timing_header():
+    """Test that the optional header lists every stage in milliseconds"""
+    client, _ = make_client(server_timing=True)
+
+    header = client.post("/echo", json={"value": 3}).headers["server-timing"]
+    stages = dict(part.split(";dur=") for part in header.split(", "))
+    assert list(stages) == ["parse", "validate", "predict_proba", "serialize"]
+    assert float(stages["predict_proba"]) >= 10
+
+def test_validation_errors_are_still_reported():
+    """Test that invalid bodies keep FastAPI's error responses"""
+    client, histograms = make_client(server_timing=True)
+
+    assert client.post("/echo", content=b"{not json", headers={"content-type": "application/json"}).status_code == 422
+    assert client.post("/echo", json={"value": "x"}).status_code == 422
+    assert histograms["serialize"].count == 0
+
+def test_untimed_code_sees_no_timer():
+    """Test that code outside a timed route gets None"""
+    assert current_timer() is None
+    timer = StageTimer()
+    timer.lap("encode")
+    timer.lap("encode")
+    assert list(timer.durations) == ["encode"]
@@ -0,0 +1,72 @@
+import json
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from src.api.services.prediction import ChurnPredictor
+from src.compact_model import save_candidate
+from src.tune_model import objective_score, pareto_front, slo_violation, tune
+from src.utils.config import DATA_PATH
+
+def test_pareto_front_keeps_undominated_candidates():
+    """Test that the front holds the candidates no other beats on both AUC and latency"""
+    rows = [
+        {"name": "fast", "val_auc": 0.84, "single_row_ms": 0.01},
+        {"name": "slow-worse", "val_auc": 0.83, "single_row_ms": 0.5},
+        {"name": "balanced", "val_auc": 0.86, "single_row_ms": 0.1},
+        {"name": "slow-best", "val_auc": 0.87, "single_row_ms": 0.9},
+        {"name": "tie-slower", "val_auc": 0.86, "single_row_ms": 0.2}
+    ]
+
+    assert [row["name"] for row in pareto_front(rows)] == ["fast", "balanced", "slow-best"]
+
+def test_slo_and_objective_charge_latency():
+    """Test that the SLO rejects slow candidates and the objective trades AUC for latency"""
+    fast = {"single_row_ms": 0.1, "batch_ms": 5, "size_mb": 1}
+    slow = {"single_row_ms": 3, "batch_ms": 5, "size_mb": 1}
+    weights = {"latency": 0.01, "batch": 0.001, "size": 0.001}
+
+    assert slo_violation(fast, 1, 50) is None
+    assert "single row" in slo_violation(slow, 1, 50)
+    assert "batch" in slo_violation(dict(fast, batch_ms=80), 1, 50)
+    assert objective_score(0.86, fast, weights) == pytest.approx(0.86 - 0.001 - 0.005 - 0.001)
+    assert objective_score(0.87, slow, weights) < objective_score(0.86, fast, weights)
+
+def test_tune_saves_the_chosen_model_with_its_front(tmp_path):
+    """Test that a short search saves a servable model version and its Pareto front"""
+    pytest.importorskip("xgboost")
+    df = pd.read_csv(DATA_PATH, nrows=10).drop(columns=["customer_id", "churn"])
+    feature_names = list(pd.get_dummies(df, columns=["country", "gender"], drop_first=True).columns)
+    joblib.dump(feature_names, tmp_path / "feature_names.joblib")
+
+    report = tune(families=["random_forest", "xgboost"], n_trials=2, n_jobs=2,
+                  slo_single_row_ms=100, slo_batch_ms=1000, model_dir=tmp_path, save=True, version="tuned")
+
+    assert report["front"] and report["chosen"]["meets_slo"]
+    aucs = [row["val_auc"] for row in report["front"]]
+    assert aucs == sorted(aucs)
+    assert sum(counts["completed"] for counts in report["trials"].values()) >= 1
+    saved = json.loads((tmp_path / "tuned" / "pareto_front.json").read_text())
+    assert saved["chosen"]["family"] == report["chosen"]["family"]
+    metadata = json.loads((tmp_path / "tuned" / "metadata.json").read_text())
+    assert metadata["tuning"]["family"] == report["chosen"]["family"]
+
+    predictor = ChurnPredictor(engine="compiled", model_dir=tmp_path / "tuned")
+    assert (predictor.compiled is not None) == (report["chosen"]["family"] == "random_forest")
+    X = predictor.encoder.encode_columns(pd.read_csv(DATA_PATH, nrows=50))
+    np.testing.assert_allclose(predictor.predict_proba(X), predictor.model.predict_proba(X)[:, 1], atol=1e-6)
+
+def test_compiled_engine_serves_boosting_models_with_sklearn(tmp_path):
+    """Test that a model the compiled engine cannot flatten is served by sklearn"""
+    xgboost = pytest.importorskip("xgboost")
+    df = pd.read_csv(DATA_PATH, nrows=500).drop(columns=["customer_id"])
+    X = pd.get_dummies(df.drop(columns=["churn"]), columns=["country", "gender"], drop_first=True)
+    model = xgboost.XGBClassifier(n_estimators=10, max_depth=3).fit(X.to_numpy(dtype=float), df["churn"])
+    save_candidate(model, True, list(X.columns), "boosted", {}, models_path=tmp_path)
+
+    predictor = ChurnPredictor(engine="compiled", model_dir=tmp_path / "boosted")
+
+    assert predictor.engine == "sklearn" and predictor.compiled is None
+    assert not (tmp_path / "boosted" / "random_forest_nodes.joblib").exists()
+    probability, _ = predictor.predict(df.drop(columns=["churn"]).iloc[0].to_dict())
+    assert probability == pytest.approx(float(model.predict_proba(X.to_numpy(dtype=float)[:1])[0, 1]), abs=1e-6)